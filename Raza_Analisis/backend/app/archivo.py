@@ -0,0 +1,104 @@
+# app/archivo.py
+"""
+Ciclo de vida del historial: mueve por lotes a enrollment_archive las
+inscripciones de cursos terminados (fecha_fin hace más de
+ARCHIVE_COURSE_GRACE_DAYS días) o eliminados, y a application_archive las
+postulaciones de ofertas vencidas (publicadas hace más de ARCHIVE_OFFER_DAYS
+días) o eliminadas. Así enrollment y application solo guardan lo vigente y
+sus índices siguen siendo chicos.
+
+Los contadores y resúmenes no cambian (el historial archivado sigue
+contando) y los reportes con ?historico=1 leen ambas tablas. Cada fila
+archivada deja una lápida para los listados con ?since= y, al final, se
+purgan las lápidas viejas (ver sync.py).
+Se ejecuta con `flask archive` (por ejemplo, una vez por noche).
+"""
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, insert, literal, or_, select
+
+from app import sync
+from app.cache import invalidate
+from app.db import db, transaction, on_commit
+from app.models import Application, ApplicationArchive, Course, Enrollment, EnrollmentArchive, JobOffer
+
+ARCHIVE_BATCH = int(os.environ.get("ARCHIVE_BATCH", 1000))
+ARCHIVE_COURSE_GRACE_DAYS = int(os.environ.get("ARCHIVE_COURSE_GRACE_DAYS", 30))
+ARCHIVE_OFFER_DAYS = int(os.environ.get("ARCHIVE_OFFER_DAYS", 180))
+
+logger = logging.getLogger(__name__)
+
+
+def _cursos_archivables(hoy):
+    return select(Course.id).where(or_(
+        Course.fecha_fin < hoy - timedelta(days=ARCHIVE_COURSE_GRACE_DAYS),
+        Course.eliminado_en.isnot(None),
+    ))
+
+
+def _ofertas_archivables(hoy):
+    return select(JobOffer.id).where(or_(
+        JobOffer.fecha_publicacion < hoy - timedelta(days=ARCHIVE_OFFER_DAYS),
+        JobOffer.eliminado_en.isnot(None),
+    ))
+
+
+def _mover_lote(recurso, modelo, archivo, columnas, filtro, lote):
+    """
+    Copia al archivo y borra hasta `lote` filas en una transacción corta.
+    Devuelve la cantidad movida.
+    """
+    with transaction():
+        filas = db.session.execute(
+            select(modelo.id, modelo.user_id).where(filtro).order_by(modelo.id).limit(lote)
+        ).all()
+        if not filas:
+            return 0
+        ids = [fila.id for fila in filas]
+        origen = [getattr(modelo, columna) for columna in columnas]
+        db.session.execute(
+            insert(archivo).from_select(
+                columnas + ["archivado_en"],
+                select(*origen, literal(datetime.utcnow())).where(modelo.id.in_(ids)),
+            )
+        )
+        db.session.execute(
+            delete(modelo).where(modelo.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        sync.bury(recurso, [tuple(fila) for fila in filas])
+    return len(ids)
+
+
+def archive_history(lote=ARCHIVE_BATCH, hoy=None, log=None):
+    """
+    Archiva todo lo que corresponde, lote por lote. Devuelve
+    {"inscripciones": n, "postulaciones": m, "lapidas_purgadas": k}.
+    """
+    hoy = hoy or date.today()
+    tareas = (
+        ("inscripciones", Enrollment, EnrollmentArchive,
+         ["id", "user_id", "course_id", "fecha_inscripcion"],
+         Enrollment.course_id.in_(_cursos_archivables(hoy))),
+        ("postulaciones", Application, ApplicationArchive,
+         ["id", "user_id", "job_offer_id", "fecha_postulacion"],
+         Application.job_offer_id.in_(_ofertas_archivables(hoy))),
+    )
+    totales = {}
+    for nombre, modelo, archivo, columnas, filtro in tareas:
+        total = 0
+        while True:
+            movidas = _mover_lote(nombre, modelo, archivo, columnas, filtro, lote)
+            total += movidas
+            if movidas < lote:
+                break
+            if log:
+                log(f"{nombre}: {total} archivadas...")
+        totales[nombre] = total
+        if total:
+            # Los listados vigentes y los reportes cambian
+            on_commit(lambda recurso=nombre: invalidate(recurso))
+            logger.info("Historial archivado", extra={"tabla": modelo.__tablename__, "filas": total})
+    totales["lapidas_purgadas"] = sync.purge_tombstones()
+    return totales
@@ -1,39 +1,73 @@
 from flask import Blueprint, request, jsonify
 from ..models import User
-from ..db import db
-from .utils import create_token, validate_token
-from ..crud import get_user_by_username, create_user
+from .utils import create_token
+from .passwords import PoolSaturado, hash_password, verify_dummy, verify_password
+from ..crud import get_user_by_username, create_user, update_user_password
+from ..schemas import UserCreate, UserLogin
+from ..serializers import validate
+from ..ratelimit import login_failures_exceeded, rate_limit, record_login_failure
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/signup', methods=['POST'])
+@rate_limit("signup", "ip")
 def register():
-    data = request.get_json()
+    try:
+        data = validate(UserCreate, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if get_user_by_username(data['username']):
+    if get_user_by_username(data.username):
         return jsonify({"error": "El usuario ya existe"}), 400
 
-    if data.get('password') != data.get('confirm_password'):
+    if data.password != data.confirm_password:
         return jsonify({"error": "Las contraseñas no coinciden"}), 400
 
+    try:
+        password_hash = hash_password(data.password)
+    except PoolSaturado as e:
+        return jsonify({"error": str(e)}), 503
+
     nuevo_usuario = User(
-        username=data['username'],
-        email=data['email'],
-        password=data['password'],
-        role=data.get('role', 'usuario')
+        username=data.username,
+        email=data.email,
+        password=password_hash,
+        role=data.role.value
     )
 
     create_user(nuevo_usuario)
     return jsonify({"message": "Usuario registrado correctamente"}), 201
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit("login", "ip")
 def login():
-    data = request.get_json()
-    usuario = get_user_by_username(data['username'])
+    try:
+        data = validate(UserLogin, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    bloqueado = login_failures_exceeded(data.username)
+    if bloqueado is not None:
+        return bloqueado
+
+    usuario = get_user_by_username(data.username)
 
-    if not usuario or usuario.password != data['password']:
+    try:
+        if usuario:
+            valida, nuevo_hash = verify_password(data.password, usuario.password)
+        else:
+            valida, nuevo_hash = verify_dummy(data.password), None
+    except PoolSaturado as e:
+        return jsonify({"error": str(e)}), 503
+
+    if not valida:
+        record_login_failure(data.username)
         return jsonify({"error": "Credenciales inválidas"}), 401
 
+    # Contraseña en texto plano o con costo anterior: se guarda el hash actualizado
+    if nuevo_hash:
+        update_user_password(usuario, nuevo_hash)
+
     token = create_token(usuario)
     return jsonify({
         "access_token": token,
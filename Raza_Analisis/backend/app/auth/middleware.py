@@ -0,0 +1,178 @@
+# auth/middleware.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import g, request, jsonify
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from ..cache import current_version, invalidate
+from ..db import db
+from ..models import User
+from .utils import decode_token
+
+# Datos mínimos del usuario autenticado que necesitan las rutas
+Principal = namedtuple("Principal", ["id", "role"])
+
+
+class TokenCache:
+    """
+    Caché LRU acotada de tokens ya verificados. Cada entrada guarda los claims
+    y el Principal, y vence a los `ttl` segundos o en el `exp` del token, lo
+    que ocurra primero. También guarda la versión del usuario (un archivo en
+    CACHE_DIR, como el caché de respuestas): si otro proceso lo modifica o
+    elimina, la versión cambia y la entrada deja de servirse en todos.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clave -> (vence, claims, principal, version)
+        self._by_user = {}  # user_id -> claves de sus tokens
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._remove(key)
+                return None
+        if entry[3] != user_version(entry[2].id):
+            self.invalidate_user(entry[2].id)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def put(self, token, claims, principal, version):
+        key = self._key(token)
+        vence = min(time.time() + self.ttl, claims.get("exp", float("inf")))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (vence, claims, principal, version)
+            self._by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in self._by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            claves = self._by_user.get(entry[2].id)
+            if claves is not None:
+                claves.discard(key)
+                if not claves:
+                    del self._by_user[entry[2].id]
+
+
+def _recurso_usuario(user_id):
+    return os.path.join("usuarios", str(user_id))
+
+
+def user_version(user_id):
+    return current_version(_recurso_usuario(user_id))
+
+
+token_cache = TokenCache(
+    max_entries=int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", 10000)),
+    ttl=int(os.environ.get("AUTH_CACHE_TTL", 300)),
+)
+
+
+def authenticate(token):
+    """
+    Devuelve el Principal del token. Solo consulta la tabla user la primera
+    vez que se ve el token; lanza ValueError si no es válido.
+    """
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached[1]
+
+    claims = decode_token(token)
+    # La versión se lee antes de consultar: si el usuario cambia en medio, la
+    # entrada queda con la versión vieja y no se reutiliza
+    version = user_version(claims["user_id"])
+    row = db.session.query(User.id, User.role).filter_by(id=claims["user_id"]).first()
+    if not row:
+        raise ValueError("Usuario no encontrado")
+
+    principal = Principal(row.id, row.role)
+    token_cache.put(token, claims, principal, version)
+    return principal
+
+
+# Middleware para verificar autenticación
+def token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        header = request.headers.get("Authorization")
+        if not header or not header.startswith("Bearer "):
+            return jsonify({"error": "Token no válido o faltante"}), 401
+        try:
+            current_user = authenticate(header.split(" ")[1])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 401
+
+        g.current_user = current_user  # para app.replicas (leer lo propio)
+        return f(current_user, *args, **kwargs)
+
+    return decorated
+
+
+# Va debajo de @token_required: solo deja pasar al rol admin
+def admin_required(f):
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if current_user.role != "admin":
+            return jsonify({"error": "Se requiere rol de administrador"}), 403
+        return f(current_user, *args, **kwargs)
+
+    return decorated
+
+
+# ------------------------- INVALIDACIÓN -------------------------
+# Si un usuario cambia o se elimina se descartan sus tokens en caché: al hacer
+# flush (para que otra petición no lea el dato viejo) y otra vez tras el
+# commit, cuando además se publica su versión nueva para los demás procesos.
+def _usuarios_modificados(session):
+    return session.info.setdefault("auth_usuarios_modificados", set())
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidar_usuario(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
+    _usuarios_modificados(object_session(target)).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tras_commit(session):
+    for user_id in session.info.pop("auth_usuarios_modificados", ()):
+        token_cache.invalidate_user(user_id)
+        invalidate(_recurso_usuario(user_id))
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_tras_rollback(session):
+    session.info.pop("auth_usuarios_modificados", None)
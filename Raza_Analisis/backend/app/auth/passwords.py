@@ -0,0 +1,87 @@
+# auth/passwords.py
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+# pbkdf2_sha256 usa hashlib.pbkdf2_hmac, que libera el GIL: un pool de hilos
+# reparte el cálculo entre núcleos sin bloquear a los workers de peticiones.
+PASSWORD_HASH_ROUNDS = int(os.environ.get("PASSWORD_HASH_ROUNDS", 29000))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", PASSWORD_HASH_WORKERS * 4))
+PASSWORD_HASH_WAIT = float(os.environ.get("PASSWORD_HASH_WAIT", 5))
+
+
+class PoolSaturado(Exception):
+    pass
+
+
+_pwd_context = None
+_executor = None
+_cupos = None
+_hash_ficticio = None
+
+
+def configure(rounds=PASSWORD_HASH_ROUNDS, workers=PASSWORD_HASH_WORKERS, queue=PASSWORD_HASH_QUEUE):
+    """
+    (Re)crea el contexto de hash y el pool. Los hashes con menos rondas que
+    `rounds` se consideran obsoletos y se regeneran en el siguiente login.
+    """
+    global _pwd_context, _executor, _cupos, _hash_ficticio
+    _pwd_context = CryptContext(
+        schemes=["pbkdf2_sha256"],
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+    )
+    # Mismo costo que los hashes reales (ver verify_dummy)
+    _hash_ficticio = _pwd_context.hash(os.urandom(16).hex())
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    # Trabajos en curso + en cola; más allá de eso se rechaza en vez de encolar sin límite
+    _cupos = threading.BoundedSemaphore(workers + queue)
+
+
+def _run(fn, *args):
+    if not _cupos.acquire(timeout=PASSWORD_HASH_WAIT):
+        raise PoolSaturado("Servidor ocupado, intenta nuevamente")
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _cupos.release()
+
+
+def _verify_and_update(password, stored):
+    if _pwd_context.identify(stored, required=False) is None:
+        # Contraseña heredada guardada en texto plano
+        if hmac.compare_digest(password.encode(), stored.encode()):
+            return True, _pwd_context.hash(password)
+        return False, None
+    return _pwd_context.verify_and_update(password, stored)
+
+
+def hash_password(password):
+    return _run(_pwd_context.hash, password)
+
+
+def verify_password(password, stored):
+    """
+    Devuelve (valida, nuevo_hash). nuevo_hash no es None cuando la contraseña
+    guardada es texto plano o usa un costo menor al configurado.
+    """
+    return _run(_verify_and_update, password, stored)
+
+
+def verify_dummy(password):
+    """
+    Verifica contra un hash fijo y devuelve False. El login de un usuario
+    inexistente tarda lo mismo que el de uno existente, así la demora no
+    revela qué nombres de usuario existen.
+    """
+    _run(_pwd_context.verify, password, _hash_ficticio)
+    return False
+
+
+configure()
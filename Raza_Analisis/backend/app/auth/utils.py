@@ -14,15 +14,18 @@ def create_token(user):
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
     return token
 
-# Función para validar un token JWT
-def validate_token(token):
+# Función para decodificar un token JWT y devolver sus claims
+def decode_token(token):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user_id = payload.get("user_id")
-        if not user_id:
-            raise ValueError("Token inválido: falta user_id")
-        return user_id
     except jwt.ExpiredSignatureError:
         raise ValueError("Token expirado")
     except jwt.InvalidTokenError:
-        raise ValueError("Token inválido")
\ No newline at end of file
+        raise ValueError("Token inválido")
+    if not payload.get("user_id"):
+        raise ValueError("Token inválido: falta user_id")
+    return payload
+
+# Función para validar un token JWT
+def validate_token(token):
+    return decode_token(token)["user_id"]
\ No newline at end of file
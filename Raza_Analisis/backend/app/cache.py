@@ -0,0 +1,151 @@
+# app/cache.py
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import Response, request
+
+from app.compression import comprimir, elegir_codificacion
+
+# Cada recurso ("cursos", "ofertas", ...) tiene una versión guardada en un
+# archivo compartido por todos los procesos del servidor; las funciones de
+# escritura de crud.py la cambian con invalidate() después del commit.
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(tempfile.gettempdir(), "farmacia-cache"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 512))
+
+# `variantes` guarda el cuerpo ya comprimido por codificación ("gzip", "br")
+CacheEntry = namedtuple("CacheEntry", ["version", "etag", "body", "mimetype", "variantes"])
+
+
+def _version_path(recurso):
+    return os.path.join(CACHE_DIR, f"{recurso}.version")
+
+
+def current_version(recurso):
+    try:
+        with open(_version_path(recurso)) as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def version_age(recurso):
+    """
+    Segundos desde el último cambio del recurso (infinito si nunca cambió).
+    """
+    try:
+        return time.time() - os.stat(_version_path(recurso)).st_mtime
+    except FileNotFoundError:
+        return float("inf")
+
+
+def publish_version(recurso):
+    """
+    Escribe una versión nueva del recurso (reemplazo atómico del archivo)
+    y la devuelve.
+    """
+    os.makedirs(os.path.dirname(_version_path(recurso)), exist_ok=True)
+    version = uuid.uuid4().hex
+    temporal = f"{_version_path(recurso)}.{version}"
+    with open(temporal, "w") as f:
+        f.write(version)
+    os.replace(temporal, _version_path(recurso))
+    return version
+
+
+def invalidate(*recursos):
+    """
+    Publica una versión nueva de cada recurso; las respuestas guardadas con
+    la versión anterior dejan de servirse en todos los procesos.
+    """
+    for recurso in recursos:
+        publish_version(recurso)
+
+
+class ResponseCache:
+    """
+    Caché LRU en memoria de cuerpos ya serializados, por recurso y URL.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(recurso):
+    """
+    Decorador para rutas GET de catálogo: guarda el cuerpo de las respuestas
+    200 con su ETag y responde 304 Not Modified a If-None-Match sin ejecutar
+    la vista (ni consultar la base de datos). La versión comprimida se
+    calcula una vez por entrada y se reutiliza en las siguientes peticiones.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = (recurso, request.full_path)
+            # La versión se lee antes de consultar: si hay una escritura en
+            # medio, la entrada queda con la versión vieja y no se reutiliza.
+            version = current_version(recurso)
+            entry = response_cache.get(key, version)
+
+            if entry is None:
+                # Con réplicas: no guardar con la versión nueva datos que la
+                # réplica quizá todavía no recibió
+                from app.replicas import use_primary_if_recent
+                use_primary_if_recent(version_age(recurso))
+                rv = f(*args, **kwargs)
+                response = rv[0] if isinstance(rv, tuple) else rv
+                status = rv[1] if isinstance(rv, tuple) and len(rv) > 1 else response.status_code
+                if status != 200:
+                    return rv
+                body = response.get_data()
+                entry = CacheEntry(version, hashlib.sha1(body).hexdigest(), body, response.mimetype, {})
+                response_cache.put(key, entry)
+
+            body, etag = entry.body, entry.etag
+            codificacion = elegir_codificacion(entry.mimetype, len(body))
+            if codificacion is not None:
+                body = entry.variantes.get(codificacion)
+                if body is None:
+                    body = entry.variantes[codificacion] = comprimir(entry.body, codificacion)
+                etag = f"{etag}-{codificacion}"
+
+            response = Response(body, mimetype=entry.mimetype)
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            response.vary.add("Accept-Encoding")
+            if codificacion is not None:
+                response.headers["Content-Encoding"] = codificacion
+            return response.make_conditional(request)
+
+        return decorated
+
+    return decorator
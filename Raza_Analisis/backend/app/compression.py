@@ -0,0 +1,106 @@
+# app/compression.py
+"""
+Compresión de respuestas (gzip, y brotli si está instalado) según el
+Accept-Encoding del cliente. Las respuestas con cuerpo en memoria se
+comprimen si superan COMPRESS_MIN_BYTES; los CSV generados por streaming se
+comprimen bloque a bloque. Las respuestas del caché de catálogo guardan su
+versión comprimida en la entrada (ver cache.py) y no pasan por aquí.
+"""
+import gzip
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+
+# Preferencia del servidor cuando el cliente acepta varias con el mismo q
+CODIFICACIONES = ("br", "gzip") if brotli is not None else ("gzip",)
+TIPOS_COMPRIMIBLES = ("application/json", "text/csv", "text/plain", "text/html", "text/css", "application/javascript")
+
+
+def elegir_codificacion(mimetype, tamano=None):
+    """
+    Devuelve la codificación a usar para la petición actual ("br", "gzip")
+    o None si el tipo no se comprime, el cuerpo es chico o el cliente no
+    acepta ninguna. `tamano` None indica un cuerpo por streaming.
+    """
+    if mimetype not in TIPOS_COMPRIMIBLES:
+        return None
+    if tamano is not None and tamano < COMPRESS_MIN_BYTES:
+        return None
+    return request.accept_encodings.best_match(CODIFICACIONES)
+
+
+def comprimir(datos, codificacion):
+    if codificacion == "br":
+        return brotli.compress(datos, quality=BROTLI_QUALITY)
+    return gzip.compress(datos, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def _comprimir_flujo(cuerpo, codificacion):
+    if codificacion == "br":
+        compresor = brotli.Compressor(quality=BROTLI_QUALITY)
+        comprimir_bloque, terminar = compresor.process, compresor.finish
+    else:
+        compresor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # 31: formato gzip
+        comprimir_bloque, terminar = compresor.compress, compresor.flush
+    try:
+        for bloque in cuerpo:
+            if isinstance(bloque, str):
+                bloque = bloque.encode()
+            datos = comprimir_bloque(bloque)
+            if datos:
+                yield datos
+        yield terminar()
+    finally:
+        if hasattr(cuerpo, "close"):
+            cuerpo.close()
+
+
+def _despues_de_peticion(response):
+    if (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough  # send_file: el archivo va tal cual
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in TIPOS_COMPRIMIBLES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if response.is_streamed:
+        codificacion = elegir_codificacion(response.mimetype)
+        if codificacion is None:
+            return response
+        response.response = _comprimir_flujo(response.response, codificacion)
+        response.headers.pop("Content-Length", None)
+    else:
+        datos = response.get_data()
+        codificacion = elegir_codificacion(response.mimetype, len(datos))
+        if codificacion is None:
+            return response
+        response.set_data(comprimir(datos, codificacion))
+
+    response.headers["Content-Encoding"] = codificacion
+    # El ETag identifica la representación: la comprimida es distinta
+    etag, debil = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{codificacion}", weak=debil)
+    return response
+
+
+def init_app(app):
+    """
+    Registra la compresión. Debe llamarse después de metrics.init_app para
+    que el tamaño medido sea el de los bytes enviados.
+    """
+    app.after_request(_despues_de_peticion)
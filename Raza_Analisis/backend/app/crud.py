@@ -1,14 +1,69 @@
-from app.db import db
-from app.models import User, JobOffer, Course, Enrollment
-from datetime import datetime
+from app.db import db, transaction, on_commit
+from app.cache import invalidate
+from app import outbox, search, sync
+from app.models import (
+    User, JobOffer, Course, Enrollment, Application, EstadoCapacitacion,
+    EnrollmentWeeklySummary, ApplicationWeeklySummary, EnrollmentArchive, ApplicationArchive,
+)
+from datetime import datetime, timedelta
+import csv
+import io
+from sqlalchemy import and_, or_, insert, update, delete, func, select, tuple_, union_all, Date
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+def _insert_ignore(model, conflict_columns, **values):
+    """
+    Inserta una fila en un solo viaje a la base con
+    INSERT ... ON CONFLICT DO NOTHING RETURNING id.
+    Devuelve el id insertado o None si la restricción única ya existía.
+    """
+    dialect = db.session.get_bind().dialect
+    if dialect.name in ("postgresql", "sqlite") and dialect.insert_returning:
+        dialect_insert = postgresql.insert if dialect.name == "postgresql" else sqlite.insert
+        stmt = (
+            dialect_insert(model)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=conflict_columns)
+            .returning(model.id)
+        )
+        return db.session.execute(stmt).scalar()
+
+    # Otros motores: el conflicto llega como IntegrityError dentro de un savepoint
+    try:
+        with db.session.begin_nested():
+            result = db.session.execute(insert(model).values(**values))
+        return result.inserted_primary_key[0]
+    except IntegrityError:
+        return None
+
+def _on_catalog_commit(recurso, index=None, remove_id=None, reindex=False):
+    """
+    Tras el commit: invalida la caché HTTP del recurso y actualiza su índice
+    de búsqueda (documento nuevo/editado, eliminado o reconstrucción total).
+    """
+    def callback():
+        invalidate(recurso)
+        if index is not None:
+            search.index_document(recurso, index)
+        if remove_id is not None:
+            search.remove_document(recurso, remove_id)
+        if reindex:
+            search.mark_stale(recurso)
+    on_commit(callback)
 
 # ------------------------- USUARIOS -------------------------
 def get_user_by_username(username):
     return User.query.filter_by(username=username).first()
 
 def create_user(user):
-    db.session.add(user)
-    db.session.commit()
+    with transaction():
+        db.session.add(user)
+    return user
+
+def update_user_password(user, password_hash):
+    with transaction():
+        user.password = password_hash
     return user
 
 # ------------------------- OFERTAS LABORALES -------------------------
@@ -18,39 +73,77 @@ def create_job_offer(titulo, descripcion, requisitos):
         descripcion=descripcion,
         requisitos=requisitos
     )
-    db.session.add(offer)
-    db.session.commit()
+    with transaction():
+        db.session.add(offer)
+        _on_catalog_commit("ofertas", index=offer)
     return offer
 
+def _ofertas_activas():
+    # Las ofertas con borrado lógico no aparecen en el catálogo
+    return JobOffer.query.filter(JobOffer.eliminado_en.is_(None))
+
 def get_all_offers():
-    return JobOffer.query.all()
+    return _ofertas_activas().all()
 
-def get_offer_by_id(offer_id):
-    return JobOffer.query.get(offer_id)
+def get_offers_page(limit, after=None, desde=None, hasta=None):
+    """
+    Devuelve una página de ofertas (más recientes primero) y la clave
+    (fecha_publicacion, id) de la última fila si quedan más resultados.
+    """
+    query = _ofertas_activas()
+    if desde:
+        query = query.filter(JobOffer.fecha_publicacion >= desde)
+    if hasta:
+        query = query.filter(JobOffer.fecha_publicacion <= hasta)
+    if after:
+        fecha, ultimo_id = after
+        query = query.filter(or_(
+            JobOffer.fecha_publicacion < fecha,
+            and_(JobOffer.fecha_publicacion == fecha, JobOffer.id < ultimo_id),
+        ))
 
-def update_offer(offer_id, data):
-    offer = JobOffer.query.get(offer_id)
-    if not offer:
-        return None
+    ofertas = query.order_by(JobOffer.fecha_publicacion.desc(), JobOffer.id.desc()).limit(limit + 1).all()
+    siguiente = None
+    if len(ofertas) > limit:
+        ofertas = ofertas[:limit]
+        siguiente = (ofertas[-1].fecha_publicacion, ofertas[-1].id)
+    return ofertas, siguiente
 
-    offer.titulo = data.get("titulo", offer.titulo)
-    offer.descripcion = data.get("descripcion", offer.descripcion)
-    offer.requisitos = data.get("requisitos", offer.requisitos)
-    offer.fecha_publicacion = datetime.strptime(
-        data.get("fecha_publicacion", offer.fecha_publicacion.strftime('%Y-%m-%d')),
-        '%Y-%m-%d'
-    ).date()
+def get_offer_by_id(offer_id):
+    return _ofertas_activas().filter(JobOffer.id == offer_id).first()
 
-    db.session.commit()
+def update_offer(offer_id, cambios):
+    """
+    Aplica `cambios` (campos ya validados con JobOfferUpdate) a la oferta.
+    """
+    with transaction():
+        offer = get_offer_by_id(offer_id)
+        if not offer:
+            return None
+
+        for campo, valor in cambios.items():
+            setattr(offer, campo, valor)
+        db.session.flush()
+        sync.touch("ofertas", [offer.id])
+        _on_catalog_commit("ofertas", index=offer)
     return offer
 
 def delete_offer(offer_id):
-    offer = JobOffer.query.get(offer_id)
-    if offer:
-        db.session.delete(offer)
-        db.session.commit()
-        return True
-    return False
+    """
+    Borrado lógico: la oferta deja el catálogo y sus postulaciones pasan al
+    archivo con el siguiente archive_history().
+    """
+    with transaction():
+        offer = get_offer_by_id(offer_id)
+        if not offer:
+            return False
+        offer.eliminado_en = datetime.utcnow()
+        db.session.flush()
+        # La fila con eliminado_en y actualizado_en nuevo es la baja para ?since=
+        sync.touch("ofertas", [offer_id])
+        _on_catalog_commit("ofertas", remove_id=offer_id)
+        on_commit(lambda: invalidate("postulaciones"))
+    return True
 
 # ------------------------- CURSOS / CAPACITACIONES -------------------------
 def create_course(titulo, descripcion, duracion_horas, fecha_inicio, fecha_fin, instructor, cupo_maximo, estado="activo"):
@@ -58,36 +151,166 @@ def create_course(titulo, descripcion, duracion_horas, fecha_inicio, fecha_fin,
         titulo=titulo,
         descripcion=descripcion,
         duracion_horas=duracion_horas,
-        fecha_inicio=datetime.strptime(fecha_inicio, "%Y-%m-%d").date(),
-        fecha_fin=datetime.strptime(fecha_fin, "%Y-%m-%d").date(),
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
         instructor=instructor,
         cupo_maximo=cupo_maximo,
         estado=estado
     )
-    db.session.add(course)
-    db.session.commit()
+    with transaction():
+        db.session.add(course)
+        _on_catalog_commit("cursos", index=course)
+        on_commit(lambda: invalidate("inscritos"))
     return course
 
+def _cursos_activos():
+    # Los cursos con borrado lógico no aparecen en el catálogo
+    return Course.query.filter(Course.eliminado_en.is_(None))
+
 def get_all_courses():
-    return Course.query.all()
+    return _cursos_activos().all()
+
+def get_courses_page(limit, after=None, estado=None, desde=None, hasta=None, instructor=None):
+    """
+    Devuelve una página de cursos ordenados por (fecha_inicio, id) y la clave
+    de la última fila si quedan más resultados.
+    """
+    query = _cursos_activos()
+    if estado:
+        try:
+            query = query.filter(Course.estado == EstadoCapacitacion(estado))
+        except ValueError:
+            raise ValueError(f"Estado inválido: {estado}")
+    if instructor:
+        query = query.filter(Course.instructor == instructor)
+    if desde:
+        query = query.filter(Course.fecha_inicio >= desde)
+    if hasta:
+        query = query.filter(Course.fecha_inicio <= hasta)
+    if after:
+        fecha, ultimo_id = after
+        query = query.filter(or_(
+            Course.fecha_inicio > fecha,
+            and_(Course.fecha_inicio == fecha, Course.id > ultimo_id),
+        ))
+
+    cursos = query.order_by(Course.fecha_inicio, Course.id).limit(limit + 1).all()
+    siguiente = None
+    if len(cursos) > limit:
+        cursos = cursos[:limit]
+        siguiente = (cursos[-1].fecha_inicio, cursos[-1].id)
+    return cursos, siguiente
 
 def get_course_by_id(course_id):
-    return Course.query.get(course_id)
+    return _cursos_activos().filter(Course.id == course_id).first()
+
+def update_course(course_id, cambios):
+    """
+    Aplica `cambios` (campos ya validados con CourseUpdate) al curso. Lanza
+    ValueError si las fechas quedan invertidas o si el cupo nuevo es menor
+    que los inscritos; el cupo se cambia con un UPDATE condicional para no
+    competir con inscripciones concurrentes.
+    """
+    cambios = dict(cambios)
+    cupo = cambios.pop("cupo_maximo", None)
+    with transaction():
+        course = get_course_by_id(course_id)
+        if not course:
+            return None
 
-def update_course(course):
-    db.session.commit()
+        for campo, valor in cambios.items():
+            setattr(course, campo, valor)
+        if course.fecha_fin < course.fecha_inicio:
+            raise ValueError("La fecha de fin es anterior a la fecha de inicio")
+
+        if cupo is not None:
+            aplicado = db.session.execute(
+                update(Course)
+                .where(Course.id == course_id, Course.inscritos <= cupo)
+                .values(cupo_maximo=cupo)
+            ).rowcount
+            if not aplicado:
+                raise ValueError("El cupo máximo no puede ser menor que los inscritos")
+        db.session.flush()
+        sync.touch("cursos", [course.id])
+        _on_catalog_commit("cursos", index=course)
     return course
 
 def delete_course(course):
-    db.session.delete(course)
-    db.session.commit()
+    """
+    Borrado lógico: el curso deja el catálogo y sus inscripciones pasan al
+    archivo con el siguiente archive_history().
+    """
+    with transaction():
+        course.eliminado_en = datetime.utcnow()
+        db.session.flush()
+        # La fila con eliminado_en y actualizado_en nuevo es la baja para ?since=
+        sync.touch("cursos", [course.id])
+        _on_catalog_commit("cursos", remove_id=course.id)
+        on_commit(lambda: invalidate("inscritos", "inscripciones"))
+
+# ------------------------- CUPOS -------------------------
+class CupoAgotado(Exception):
+    pass
+
+class _Duplicado(Exception):
+    pass
+
+def reserve_seat(course_id):
+    """
+    Ocupa un cupo con un UPDATE condicional atómico; solo bloquea la fila del
+    curso hasta el commit. Devuelve False si el curso no tiene cupos libres.
+    """
+    result = db.session.execute(
+        update(Course)
+        .where(Course.id == course_id, Course.inscritos < Course.cupo_maximo, Course.eliminado_en.is_(None))
+        .values(inscritos=Course.inscritos + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def release_seat(course_id):
+    db.session.execute(
+        update(Course)
+        .where(Course.id == course_id, Course.inscritos > 0)
+        .values(inscritos=Course.inscritos - 1)
+        .execution_options(synchronize_session=False)
+    )
 
 # ------------------------- INSCRIPCIONES -------------------------
 def create_enrollment(user_id, course_id):
-    enrollment = Enrollment(user_id=user_id, course_id=course_id)
-    db.session.add(enrollment)
-    db.session.commit()
-    return enrollment
+    """
+    Reserva un cupo y registra la inscripción en la misma transacción.
+    Devuelve el id de la nueva inscripción o None si el usuario ya estaba
+    inscrito; lanza CupoAgotado si el curso está lleno.
+    """
+    ahora = datetime.utcnow()
+    try:
+        with transaction(savepoint=True):
+            if not reserve_seat(course_id):
+                raise CupoAgotado()
+
+            enrollment_id = _insert_ignore(
+                Enrollment, ["user_id", "course_id"],
+                user_id=user_id, course_id=course_id, fecha_inscripcion=ahora, actualizado_en=ahora,
+            )
+            if enrollment_id is None:
+                # Inscripción duplicada: deshacer el bloque devuelve el cupo reservado
+                raise _Duplicado()
+
+            _sumar_resumen(EnrollmentWeeklySummary, {"course_id": course_id, "semana": inicio_semana(ahora)}, "inscripciones", 1)
+            outbox.publish("inscripcion.creada", {
+                "inscripcion_id": enrollment_id,
+                "usuario_id": user_id,
+                "curso_id": course_id,
+                "fecha": ahora.isoformat(),
+            })
+
+            # El catálogo no incluye el contador: solo cambian los inscritos
+            on_commit(lambda: invalidate("inscritos", "inscripciones"))
+    except _Duplicado:
+        return None
+    return enrollment_id
 
 def get_all_enrollments():
     return Enrollment.query.all()
@@ -95,10 +318,425 @@ def get_all_enrollments():
 def get_enrollment_by_id(enrollment_id):
     return Enrollment.query.get(enrollment_id)
 
-def delete_enrollment(enrollment_id):
-    enrollment = Enrollment.query.get(enrollment_id)
-    if enrollment:
+def delete_enrollment(enrollment_id, user_id=None):
+    """
+    Elimina la inscripción (solo la del usuario indicado, si se pasa user_id)
+    y libera su cupo en la misma transacción.
+    """
+    with transaction():
+        query = Enrollment.query.filter_by(id=enrollment_id)
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        enrollment = query.first()
+        if not enrollment:
+            return False
+
+        release_seat(enrollment.course_id)
+        if enrollment.fecha_inscripcion:
+            _sumar_resumen(
+                EnrollmentWeeklySummary,
+                {"course_id": enrollment.course_id, "semana": inicio_semana(enrollment.fecha_inscripcion)},
+                "inscripciones", -1,
+            )
         db.session.delete(enrollment)
-        db.session.commit()
-        return True
-    return False
+        sync.bury("inscripciones", [(enrollment.id, enrollment.user_id)])
+        on_commit(lambda: invalidate("inscritos", "inscripciones"))
+    return True
+
+# ------------------------- POSTULACIONES -------------------------
+def create_application(user_id, job_offer_id):
+    """
+    Devuelve el id de la nueva postulación o None si el usuario ya había postulado.
+    """
+    ahora = datetime.utcnow()
+    with transaction():
+        application_id = _insert_ignore(
+            Application, ["user_id", "job_offer_id"],
+            user_id=user_id, job_offer_id=job_offer_id, fecha_postulacion=ahora, actualizado_en=ahora,
+        )
+        if application_id is not None:
+            _sumar_postulaciones(job_offer_id, 1)
+            _sumar_resumen(ApplicationWeeklySummary, {"job_offer_id": job_offer_id, "semana": inicio_semana(ahora)}, "postulaciones", 1)
+            outbox.publish("postulacion.creada", {
+                "postulacion_id": application_id,
+                "usuario_id": user_id,
+                "oferta_id": job_offer_id,
+                "fecha": ahora.isoformat(),
+            })
+            on_commit(lambda: invalidate("postulaciones"))
+    return application_id
+
+def delete_application(application_id, user_id):
+    """
+    Elimina la postulación si pertenece al usuario. Devuelve False si no existe.
+    """
+    with transaction():
+        application = Application.query.filter_by(id=application_id, user_id=user_id).first()
+        if not application:
+            return False
+        _sumar_postulaciones(application.job_offer_id, -1)
+        if application.fecha_postulacion:
+            _sumar_resumen(
+                ApplicationWeeklySummary,
+                {"job_offer_id": application.job_offer_id, "semana": inicio_semana(application.fecha_postulacion)},
+                "postulaciones", -1,
+            )
+        db.session.delete(application)
+        sync.bury("postulaciones", [(application.id, application.user_id)])
+        on_commit(lambda: invalidate("postulaciones"))
+    return True
+
+# ------------------------- PROYECCIONES (LISTADOS) -------------------------
+# Cada listado se resuelve con una sola consulta con JOIN que trae solo las
+# columnas necesarias y devuelve filas (tuplas con nombre) en lugar de
+# entidades ORM, así no se disparan cargas perezosas fila por fila.
+REPORT_BATCH_SIZE = 1000
+
+def enrollment_rows():
+    return (
+        db.session.query(
+            Enrollment.id,
+            User.username.label("usuario"),
+            User.email.label("email"),
+            Course.titulo.label("curso"),
+            Enrollment.fecha_inscripcion,
+        )
+        .join(Enrollment.user)
+        .join(Enrollment.course)
+        .filter(Course.eliminado_en.is_(None))
+        .order_by(Enrollment.id)
+    )
+
+def _user_enrollment_query(user_id):
+    return (
+        db.session.query(
+            Enrollment.id,
+            Course.id.label("curso_id"),
+            Course.titulo,
+            Course.descripcion,
+            Course.fecha_inicio,
+            Course.fecha_fin,
+            Enrollment.fecha_inscripcion,
+        )
+        .join(Enrollment.course)
+        .filter(Enrollment.user_id == user_id)
+        .order_by(Enrollment.id)
+    )
+
+def user_enrollment_rows(user_id):
+    return _user_enrollment_query(user_id).filter(Course.eliminado_en.is_(None))
+
+def application_rows():
+    return (
+        db.session.query(
+            Application.id,
+            User.username.label("usuario"),
+            User.email.label("email"),
+            JobOffer.titulo.label("oferta"),
+            Application.fecha_postulacion,
+        )
+        .join(Application.user)
+        .join(Application.job_offer)
+        .filter(JobOffer.eliminado_en.is_(None))
+        .order_by(Application.id)
+    )
+
+def _user_application_query(user_id):
+    return (
+        db.session.query(
+            Application.id,
+            JobOffer.titulo,
+            JobOffer.descripcion,
+            Application.fecha_postulacion,
+        )
+        .join(Application.job_offer)
+        .filter(Application.user_id == user_id)
+        .order_by(Application.id)
+    )
+
+def user_application_rows(user_id):
+    return _user_application_query(user_id).filter(JobOffer.eliminado_en.is_(None))
+
+def _historial(modelo, archivo, catalogo, clave, fecha, etiqueta, desde, hasta):
+    """
+    Une las filas vigentes y las archivadas (incluye cursos u ofertas con
+    borrado lógico) con fecha entre `desde` y `hasta` (inclusive).
+    """
+    partes = []
+    for tabla in (modelo, archivo):
+        columna_fecha = getattr(tabla, fecha)
+        consulta = (
+            select(
+                tabla.id,
+                User.username.label("usuario"),
+                User.email.label("email"),
+                catalogo.titulo.label(etiqueta),
+                columna_fecha.label(fecha),
+            )
+            .join(User, User.id == tabla.user_id)
+            .join(catalogo, catalogo.id == getattr(tabla, clave))
+        )
+        if desde:
+            consulta = consulta.where(columna_fecha >= desde)
+        if hasta:
+            consulta = consulta.where(columna_fecha < hasta + timedelta(days=1))
+        partes.append(consulta)
+    historial = union_all(*partes).subquery()
+    return db.session.query(*historial.c).order_by(historial.c[fecha], historial.c.id)
+
+def enrollment_history_rows(desde=None, hasta=None):
+    return _historial(
+        Enrollment, EnrollmentArchive, Course, "course_id", "fecha_inscripcion", "curso", desde, hasta,
+    )
+
+def application_history_rows(desde=None, hasta=None):
+    return _historial(
+        Application, ApplicationArchive, JobOffer, "job_offer_id", "fecha_postulacion", "oferta", desde, hasta,
+    )
+
+# ------------------------- CAMBIOS (?since=) -------------------------
+# Listados incrementales: solo las filas cambiadas después del token del
+# cliente, con un index range scan sobre (actualizado_en, id) (catálogos) o
+# sobre las filas del usuario (sus inscripciones y postulaciones). Ver app/sync.py.
+def _catalogo_desde(modelo, desde, limit):
+    """
+    Hasta `limit` filas de `modelo` en orden de (actualizado_en, id) y si
+    quedan más. Con desde=None solo las vigentes (listado completo); si no,
+    las posteriores a la clave `desde`, incluidas las eliminadas (su baja).
+    """
+    if desde is None:
+        query = modelo.query.filter(modelo.eliminado_en.is_(None))
+    else:
+        query = modelo.query.filter(tuple_(modelo.actualizado_en, modelo.id) > desde)
+    filas = query.order_by(modelo.actualizado_en, modelo.id).limit(limit + 1).all()
+    return filas[:limit], len(filas) > limit
+
+def courses_since(desde, limit):
+    return _catalogo_desde(Course, desde, limit)
+
+def course_seat_counts(ids=None):
+    """
+    {id: inscritos} de los cursos vigentes (o solo de `ids`). El contador
+    cambia con cada inscripción sin tocar actualizado_en, así que los
+    clientes que sincronizan el catálogo lo piden por separado.
+    """
+    query = db.session.query(Course.id, Course.inscritos).filter(Course.eliminado_en.is_(None))
+    if ids is not None:
+        query = query.filter(Course.id.in_(ids))
+    return dict(query.all())
+
+def offers_since(desde, limit):
+    return _catalogo_desde(JobOffer, desde, limit)
+
+def _cambios_usuario(query, modelo, catalogo, recurso, user_id, desde):
+    cambios = (
+        query.add_columns(catalogo.eliminado_en)
+        .filter(or_(modelo.actualizado_en >= desde, catalogo.actualizado_en >= desde))
+        .all()
+    )
+    vigentes = [fila for fila in cambios if fila.eliminado_en is None]
+    # Bajas: filas cuyo curso u oferta se eliminó y lápidas de las canceladas o archivadas
+    bajas = [fila.id for fila in cambios if fila.eliminado_en is not None]
+    bajas += sync.tombstones(recurso, user_id, desde)
+    return vigentes, bajas
+
+def user_enrollment_changes(user_id, desde):
+    """
+    Inscripciones del usuario que cambiaron (ellas o su curso) desde el
+    momento `desde`: (filas vigentes, ids dados de baja).
+    """
+    return _cambios_usuario(
+        _user_enrollment_query(user_id), Enrollment, Course, "inscripciones", user_id, desde,
+    )
+
+def user_application_changes(user_id, desde):
+    """
+    Postulaciones del usuario que cambiaron (ellas o su oferta) desde el
+    momento `desde`: (filas vigentes, ids dados de baja).
+    """
+    return _cambios_usuario(
+        _user_application_query(user_id), Application, JobOffer, "postulaciones", user_id, desde,
+    )
+
+def stream_rows(query):
+    """
+    Lee la proyección por lotes (cursor del lado del servidor en PostgreSQL)
+    para recorrer listados grandes sin cargarlos completos en memoria.
+    """
+    return query.execution_options(yield_per=REPORT_BATCH_SIZE)
+
+# ------------------------- RESÚMENES -------------------------
+# Contadores para el panel de administración: total por curso (inscritos) y
+# por oferta (total_postulaciones), y conteos por semana. Se actualizan en la
+# misma transacción que el evento, así los reportes leen O(cursos/ofertas)
+# filas en lugar de recorrer enrollment y application.
+def inicio_semana(fecha):
+    """
+    Lunes de la semana de `fecha` (date o datetime).
+    """
+    dia = fecha.date() if isinstance(fecha, datetime) else fecha
+    return dia - timedelta(days=dia.weekday())
+
+def _semana_sql(columna, dialecto):
+    # Misma semana que inicio_semana(), calculada en la base para reconstruir
+    if dialecto == "postgresql":
+        return func.date_trunc("week", columna).cast(Date)
+    return func.date(columna, "weekday 0", "-6 days")
+
+def _sumar_resumen(model, claves, columna, delta):
+    """
+    Suma `delta` al contador de la fila `claves`, creándola si no existe
+    (INSERT ... ON CONFLICT DO UPDATE en PostgreSQL y SQLite).
+    """
+    dialect = db.session.get_bind().dialect
+    contador = model.__table__.c[columna]
+    if delta > 0 and dialect.name in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect.name == "postgresql" else sqlite.insert
+        db.session.execute(
+            dialect_insert(model)
+            .values(**claves, **{columna: delta})
+            .on_conflict_do_update(index_elements=list(claves), set_={columna: contador + delta})
+        )
+        return
+
+    filtro = [model.__table__.c[k] == v for k, v in claves.items()]
+    if delta < 0:
+        filtro.append(contador >= -delta)
+    result = db.session.execute(
+        update(model).where(*filtro).values({columna: contador + delta})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0 and delta > 0:
+        db.session.execute(insert(model).values(**claves, **{columna: delta}))
+
+def _sumar_postulaciones(job_offer_id, delta):
+    filtro = [JobOffer.id == job_offer_id]
+    if delta < 0:
+        filtro.append(JobOffer.total_postulaciones >= -delta)
+    db.session.execute(
+        update(JobOffer).where(*filtro)
+        .values(total_postulaciones=JobOffer.total_postulaciones + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+def rebuild_summaries(conn):
+    """
+    Recalcula todos los resúmenes desde enrollment y application (y sus
+    tablas de archivo: el historial archivado sigue contando). Lo usan las
+    cargas de datos fuera de crud.py. Recibe una conexión o la sesión; no
+    hace commit.
+    """
+    dialecto = conn.get_bind().dialect.name if hasattr(conn, "get_bind") else conn.dialect.name
+    for model, eventos, clave, fecha, columna in (
+        (EnrollmentWeeklySummary, (Enrollment, EnrollmentArchive), "course_id", "fecha_inscripcion", "inscripciones"),
+        (ApplicationWeeklySummary, (Application, ApplicationArchive), "job_offer_id", "fecha_postulacion", "postulaciones"),
+    ):
+        todos = union_all(*(
+            select(getattr(evento, clave).label("clave"), getattr(evento, fecha).label("fecha"))
+            .where(getattr(evento, fecha).isnot(None))
+            for evento in eventos
+        )).subquery()
+        semana = _semana_sql(todos.c.fecha, dialecto)
+        conn.execute(delete(model))
+        conn.execute(
+            insert(model).from_select(
+                [clave, "semana", columna],
+                select(todos.c.clave, semana, func.count()).group_by(todos.c.clave, semana),
+            )
+        )
+
+    def contar(filtro):
+        return select(func.count()).where(filtro).scalar_subquery()
+
+    inscritos = contar(Enrollment.course_id == Course.id) + contar(EnrollmentArchive.course_id == Course.id)
+    postulaciones = contar(Application.job_offer_id == JobOffer.id) + contar(ApplicationArchive.job_offer_id == JobOffer.id)
+    conn.execute(update(Course).values(inscritos=inscritos))
+    conn.execute(update(JobOffer).values(total_postulaciones=postulaciones))
+
+def course_summary_rows(estado=None):
+    query = db.session.query(
+        Course.id, Course.titulo, Course.estado, Course.fecha_inicio, Course.cupo_maximo, Course.inscritos,
+    ).filter(Course.eliminado_en.is_(None)).order_by(Course.fecha_inicio.desc(), Course.id.desc())
+    if estado:
+        query = query.filter(Course.estado == EstadoCapacitacion(estado))
+    return query
+
+def offer_summary_rows():
+    return db.session.query(
+        JobOffer.id, JobOffer.titulo, JobOffer.fecha_publicacion, JobOffer.total_postulaciones,
+    ).filter(JobOffer.eliminado_en.is_(None)).order_by(JobOffer.fecha_publicacion.desc(), JobOffer.id.desc())
+
+def summary_totals():
+    cursos = db.session.query(
+        func.count(Course.id), func.coalesce(func.sum(Course.inscritos), 0), func.coalesce(func.sum(Course.cupo_maximo), 0),
+    ).filter(Course.eliminado_en.is_(None)).one()
+    ofertas = (
+        db.session.query(func.count(JobOffer.id), func.coalesce(func.sum(JobOffer.total_postulaciones), 0))
+        .filter(JobOffer.eliminado_en.is_(None))
+        .one()
+    )
+    return {
+        "cursos": cursos[0],
+        "inscripciones": int(cursos[1]),
+        "cupos": int(cursos[2]),
+        "ofertas": ofertas[0],
+        "postulaciones": int(ofertas[1]),
+    }
+
+def _weekly_rows(model, clave, columna, id_filtro=None, desde=None, hasta=None):
+    semana = model.semana
+    total = func.sum(getattr(model, columna)).label(columna)
+    query = db.session.query(semana, total).group_by(semana).order_by(semana)
+    if id_filtro is not None:
+        query = query.filter(getattr(model, clave) == id_filtro)
+    if desde:
+        query = query.filter(semana >= inicio_semana(desde))
+    if hasta:
+        query = query.filter(semana <= hasta)
+    return query
+
+def weekly_enrollment_rows(course_id=None, desde=None, hasta=None):
+    return _weekly_rows(EnrollmentWeeklySummary, "course_id", "inscripciones", course_id, desde, hasta)
+
+def weekly_application_rows(job_offer_id=None, desde=None, hasta=None):
+    return _weekly_rows(ApplicationWeeklySummary, "job_offer_id", "postulaciones", job_offer_id, desde, hasta)
+
+# ------------------------- CARGA MASIVA -------------------------
+def _bulk_insert(model, rows):
+    """
+    Inserta todas las filas con una sola sentencia: COPY en PostgreSQL
+    (psycopg2) y executemany en los demás motores. No hace commit.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        columnas = list(rows[0].keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                valor.value if isinstance(valor, EstadoCapacitacion) else valor
+                for valor in (row[c] for c in columnas)
+            ])
+        buffer.seek(0)
+        preparer = connection.dialect.identifier_preparer
+        sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+            preparer.format_table(model.__table__),
+            ", ".join(preparer.quote(c) for c in columnas),
+        )
+        with connection.connection.driver_connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
+    else:
+        db.session.execute(insert(model), rows)
+
+def bulk_create_courses(rows):
+    with transaction():
+        _bulk_insert(Course, sync.stamp_rows(rows))
+        _on_catalog_commit("cursos", reindex=True)
+        on_commit(lambda: invalidate("inscritos"))
+    return len(rows)
+
+def bulk_create_offers(rows):
+    with transaction():
+        _bulk_insert(JobOffer, sync.stamp_rows(rows))
+        _on_catalog_commit("ofertas", reindex=True)
+    return len(rows)
@@ -1,14 +1,118 @@
 # app/db.py
+import logging
+from contextlib import contextmanager
+from functools import wraps
+
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """
+    Sesión que envía las lecturas a la réplica elegida para la petición
+    (session.info["replica"], ver app/replicas.py). Los flush, las sentencias
+    de escritura y todo lo que corre dentro de transaction() van a la primaria.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get("replica")
+        if (
+            replica is not None
+            and bind is None
+            and not self._flushing
+            and not self.info.get("tx_depth")
+            and not (clause is not None and getattr(clause, "is_dml", False))
+        ):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
-db = SQLAlchemy()
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+logger = logging.getLogger(__name__)
 
 def init_db(app):
     """
-    Inicializa la base de datos y crea las tablas si no existen.
+    Registra la extensión en la aplicación. No abre conexiones ni ejecuta DDL:
+    el esquema se crea y actualiza con las migraciones (flask migrate).
     """
+    from .pool import instrument_pool
+    from . import models  # Registra los modelos en la metadata
+
     db.init_app(app)
     with app.app_context():
-        from .models import User, JobOffer, Course, Enrollment  # Importa los modelos
-        db.create_all()
-        print("✅ Tablas creadas correctamente")
\ No newline at end of file
+        instrument_pool(db.engine)
+
+# ------------------------- TRANSACCIONES -------------------------
+# Las funciones de crud.py abren su propio bloque transaction(); si se llaman
+# dentro de otro bloque comparten la transacción y solo el más externo hace
+# commit, así una petición o un trabajo por lotes hace un único commit.
+@contextmanager
+def transaction(savepoint=False):
+    """
+    Bloque transaccional anidable. El bloque más externo hace commit al salir
+    (o rollback si hay una excepción). Con savepoint=True un bloque anidado
+    usa SAVEPOINT: si falla se deshace solo su parte y la excepción sigue.
+    """
+    session = db.session()
+    info = session.info
+    depth = info.get("tx_depth", 0)
+    callbacks = info.setdefault("tx_on_commit", [])
+
+    if depth == 0:
+        info["tx_depth"] = 1
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            del callbacks[:]
+            raise
+        finally:
+            info["tx_depth"] = 0
+        pendientes = callbacks[:]
+        del callbacks[:]
+        for callback in pendientes:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Error en callback posterior al commit")
+        return
+
+    info["tx_depth"] = depth + 1
+    marca = len(callbacks)
+    try:
+        if savepoint:
+            with session.begin_nested():
+                yield session
+        else:
+            yield session
+    except BaseException:
+        if savepoint:
+            # Lo registrado dentro del savepoint deshecho ya no debe ejecutarse
+            del callbacks[marca:]
+        raise
+    finally:
+        info["tx_depth"] = depth
+
+
+def transactional(f):
+    """
+    Decorador: ejecuta la función dentro de transaction().
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with transaction():
+            return f(*args, **kwargs)
+    return decorated
+
+
+def on_commit(callback):
+    """
+    Ejecuta `callback` después del commit de la transacción en curso (o de
+    inmediato si no hay ninguna). Se descarta si la transacción se deshace.
+    """
+    session = db.session()
+    if session.info.get("tx_depth", 0):
+        session.info.setdefault("tx_on_commit", []).append(callback)
+    else:
+        callback()
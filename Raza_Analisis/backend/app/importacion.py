@@ -0,0 +1,78 @@
+# app/importacion.py
+import csv
+import io
+
+from app.schemas import CourseCreate, JobOfferImport
+from app.serializers import validate
+
+BULK_MAX_FILAS = 50000
+
+
+def leer_filas(request, clave):
+    """
+    Devuelve la lista de filas (dicts) enviada como arreglo JSON, como
+    {clave: [...]} o como CSV (archivo 'archivo' en multipart o cuerpo text/csv).
+    """
+    archivo = request.files.get("archivo")
+    if archivo is not None:
+        texto = archivo.read().decode("utf-8-sig")
+    elif request.mimetype == "text/csv":
+        texto = request.get_data(as_text=True)
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get(clave)
+        if not isinstance(data, list):
+            raise ValueError(f"Se esperaba un arreglo JSON o un CSV con {clave}")
+        filas = data
+        texto = None
+
+    if texto is not None:
+        filas = list(csv.DictReader(io.StringIO(texto.lstrip("\ufeff"))))
+
+    if not filas:
+        raise ValueError("El lote está vacío")
+    if len(filas) > BULK_MAX_FILAS:
+        raise ValueError(f"El lote supera el máximo de {BULK_MAX_FILAS} filas")
+    return filas
+
+
+def _limpiar(fila):
+    """
+    Quita los espacios de los textos y descarta los campos vacíos: en un CSV
+    una columna vacía equivale a no enviar el campo.
+    """
+    limpia = {}
+    for campo, valor in fila.items():
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if valor not in (None, ""):
+            limpia[campo] = valor
+    return limpia
+
+
+# Cada fila se valida con el mismo modelo que la creación individual
+# (longitudes, tipos, estado y orden de las fechas)
+def validar_curso(fila):
+    return validate(CourseCreate, _limpiar(fila)).model_dump()
+
+
+def validar_oferta(fila):
+    return validate(JobOfferImport, _limpiar(fila)).model_dump()
+
+
+def validar_lote(filas, validador):
+    """
+    Valida todas las filas de una vez. Devuelve (filas_validas, errores), con
+    errores como [{"fila": n, "error": mensaje}] numerados desde 1.
+    """
+    validas, errores = [], []
+    for numero, fila in enumerate(filas, 1):
+        if not isinstance(fila, dict):
+            errores.append({"fila": numero, "error": "La fila debe ser un objeto"})
+            continue
+        try:
+            validas.append(validador(fila))
+        except ValueError as e:
+            errores.append({"fila": numero, "error": str(e)})
+    return validas, errores
@@ -0,0 +1,205 @@
+# app/jobs.py
+"""
+Reportes en segundo plano: un pool acotado de hilos genera el CSV
+comprimido con gzip en REPORTES_DIR mientras la petición responde de
+inmediato. El estado de cada trabajo vive en un archivo JSON junto al
+resultado, así cualquier worker del servidor puede informarlo o servirlo.
+
+El id del trabajo se deriva del tipo y de la versión de los datos que usa:
+pedir el mismo reporte mientras se genera devuelve el trabajo en curso, y
+un resultado terminado se reutiliza hasta que esos datos cambian.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app.cache import current_version
+
+REPORTES_DIR = os.environ.get("REPORTES_DIR", os.path.join(tempfile.gettempdir(), "farmacia-reportes"))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", 2))
+REPORT_QUEUE = int(os.environ.get("REPORT_QUEUE", 8))
+# Antigüedad máxima de un resultado en disco y silencio máximo de un trabajo en curso
+REPORT_TTL = int(os.environ.get("REPORT_TTL", 24 * 3600))
+REPORT_STALE = int(os.environ.get("REPORT_STALE", 300))
+FILAS_POR_AVANCE = 5000
+
+logger = logging.getLogger(__name__)
+
+TipoReporte = namedtuple("TipoReporte", ["recursos", "campos", "filas", "total"])
+
+_tipos = {}
+_executor = None
+_cupos = None
+_lock = threading.Lock()
+
+
+class ColaLlena(Exception):
+    pass
+
+
+def register(tipo, recursos, campos, filas, total=None):
+    """
+    Declara un tipo de reporte. `recursos` son las versiones de caché de las
+    que dependen sus datos; `filas()` devuelve las filas ya formateadas y
+    `total()` (opcional) una estimación barata para el progreso.
+    """
+    _tipos[tipo] = TipoReporte(tuple(recursos), list(campos), filas, total)
+
+
+def tipos():
+    return set(_tipos)
+
+
+def _reset():
+    global _executor, _cupos
+    _executor = None
+    _cupos = None
+
+
+# Cada worker del servidor crea su propio pool después del fork
+os.register_at_fork(after_in_child=_reset)
+
+
+def _pool():
+    global _executor, _cupos
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="reportes")
+            _cupos = threading.BoundedSemaphore(REPORT_WORKERS + REPORT_QUEUE)
+    return _executor, _cupos
+
+
+def _ruta(job_id, extension):
+    return os.path.join(REPORTES_DIR, f"{job_id}.{extension}")
+
+
+def _guardar_estado(estado):
+    estado["actualizado"] = time.time()
+    temporal = f"{_ruta(estado['id'], 'json')}.{threading.get_ident()}"
+    with open(temporal, "w") as f:
+        json.dump(estado, f)
+    os.replace(temporal, _ruta(estado["id"], "json"))
+
+
+def status(job_id):
+    """
+    Estado del trabajo o None si no existe.
+    """
+    if not job_id.isalnum():
+        return None
+    try:
+        with open(_ruta(job_id, "json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def result_path(job_id):
+    estado = status(job_id)
+    if estado is None or estado["estado"] != "listo":
+        return None
+    ruta = _ruta(job_id, "csv.gz")
+    return ruta if os.path.exists(ruta) else None
+
+
+def _job_id(tipo):
+    versiones = "|".join(current_version(recurso) for recurso in _tipos[tipo].recursos)
+    return hashlib.sha1(f"{tipo}|{versiones}".encode()).hexdigest()[:24]
+
+
+def _vigente(estado):
+    if estado is None or estado["estado"] == "error":
+        return False
+    if estado["estado"] == "listo":
+        return os.path.exists(_ruta(estado["id"], "csv.gz"))
+    # Pendiente o en proceso: sigue vivo si informó avance hace poco
+    return time.time() - estado["actualizado"] < REPORT_STALE
+
+
+def _limpiar():
+    limite = time.time() - REPORT_TTL
+    for archivo in os.listdir(REPORTES_DIR):
+        ruta = os.path.join(REPORTES_DIR, archivo)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+
+def submit(tipo):
+    """
+    Encola el reporte (o reutiliza el trabajo vigente con los mismos datos) y
+    devuelve su estado. Lanza ColaLlena si el pool está saturado.
+    """
+    os.makedirs(REPORTES_DIR, exist_ok=True)
+    job_id = _job_id(tipo)
+    estado = status(job_id)
+    if _vigente(estado):
+        return estado
+
+    executor, cupos = _pool()
+    if not cupos.acquire(blocking=False):
+        raise ColaLlena("Hay demasiados reportes en preparación, intenta más tarde")
+
+    _limpiar()
+    estado = {"id": job_id, "tipo": tipo, "estado": "pendiente", "filas": 0, "total": None, "creado": time.time()}
+    _guardar_estado(estado)
+    app = current_app._get_current_object()
+
+    def tarea():
+        try:
+            with app.app_context():
+                _generar(estado)
+        finally:
+            cupos.release()
+
+    executor.submit(tarea)
+    # Copia: el hilo del reporte sigue modificando `estado`
+    return dict(estado)
+
+
+def _generar(estado):
+    reporte = _tipos[estado["tipo"]]
+    temporal = _ruta(estado["id"], f"csv.gz.{threading.get_ident()}")
+    try:
+        estado["estado"] = "en_proceso"
+        estado["total"] = reporte.total() if reporte.total else None
+        _guardar_estado(estado)
+
+        # Sin nombre ni fecha en la cabecera gzip: el archivo se envía tal cual
+        # con Content-Encoding: gzip y gzip.open() guardaría el nombre temporal
+        with open(temporal, "wb") as crudo, \
+                gzip.GzipFile(fileobj=crudo, mode="wb", filename="", mtime=0, compresslevel=6) as comprimido, \
+                io.TextIOWrapper(comprimido, encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(reporte.campos)
+            for n, fila in enumerate(reporte.filas(), 1):
+                writer.writerow(fila)
+                if n % FILAS_POR_AVANCE == 0:
+                    estado["filas"] = n
+                    _guardar_estado(estado)
+                estado["filas"] = n
+        os.replace(temporal, _ruta(estado["id"], "csv.gz"))
+
+        estado["estado"] = "listo"
+        estado["terminado"] = time.time()
+        _guardar_estado(estado)
+    except Exception as e:
+        logger.exception("Error al generar el reporte", extra={"job_id": estado["id"], "tipo": estado["tipo"]})
+        estado["estado"] = "error"
+        estado["error"] = str(e)
+        _guardar_estado(estado)
+        if os.path.exists(temporal):
+            os.remove(temporal)
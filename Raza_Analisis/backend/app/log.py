@@ -0,0 +1,51 @@
+# app/log.py
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+# Atributos propios de LogRecord; el resto viene de `extra=` y se agrega al JSON
+_ATRIBUTOS_BASE = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Una línea JSON por evento, con los campos pasados en `extra=`.
+    """
+
+    def format(self, record):
+        evento = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+            "pid": record.process,
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_BASE:
+                evento[clave] = valor
+        if record.exc_info:
+            evento["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+def configure_logging():
+    """
+    Configura el logger "app" según LOG_LEVEL (INFO) y LOG_FORMAT
+    (json | texto). Es idempotente: create_app puede llamarse varias veces.
+    """
+    logger = logging.getLogger("app")
+    logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    if any(getattr(h, "_farmacia", False) for h in logger.handlers):
+        return logger
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler._farmacia = True
+    if os.environ.get("LOG_FORMAT", "json") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,310 @@
+# app/metrics.py
+"""
+Métricas por endpoint en formato de exposición de Prometheus (GET /metrics):
+latencia, tamaño de respuesta, cantidad de sentencias SQL y tiempo en la base
+por petición. Cada proceso acumula sus métricas en memoria y las vuelca cada
+pocos segundos a METRICS_DIR; /metrics suma las de todos los workers. Los
+archivos de workers que ya terminaron se borran al combinar y el master de
+gunicorn vacía el directorio al arrancar (ver gunicorn.conf.py).
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from app.cache import CACHE_DIR
+from app.db import db
+from app.pool import pool_snapshot
+
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(CACHE_DIR, "metrics"))
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 1000))
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, etiquetas, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        self.series = {}  # valores de etiquetas -> [conteo por bucket..., +Inf, suma]
+
+    def observe(self, valores, valor):
+        serie = self.series.get(valores)
+        if serie is None:
+            serie = self.series[valores] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                serie[i] += 1
+                break
+        else:
+            serie[len(self.buckets)] += 1
+        serie[-1] += valor
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass  # existe pero es de otro usuario, o la plataforma no lo permite
+    return True
+
+
+def clear_dir():
+    """
+    Borra los volcados de todos los procesos (al arrancar el servidor).
+    """
+    try:
+        for archivo in os.listdir(METRICS_DIR):
+            try:
+                os.remove(os.path.join(METRICS_DIR, archivo))
+            except FileNotFoundError:
+                pass
+    except FileNotFoundError:
+        pass
+
+
+class Registro:
+    """
+    Histogramas del proceso actual y su volcado a disco para sumarlos entre
+    workers.
+    """
+
+    def __init__(self, *histogramas):
+        self.histogramas = {h.nombre: h for h in histogramas}
+        self.lock = threading.Lock()
+        self._reset_proceso()
+        # Tras el fork cada worker empieza de cero con su propio archivo
+        os.register_at_fork(after_in_child=self._reset_proceso)
+
+    def _reset_proceso(self):
+        self.proceso = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.ultimo_volcado = 0.0
+        for histograma in self.histogramas.values():
+            histograma.series = {}
+
+    def observe(self, nombre, valores, valor):
+        with self.lock:
+            self.histogramas[nombre].observe(valores, valor)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                nombre: [[list(valores), list(serie)] for valores, serie in h.series.items()]
+                for nombre, h in self.histogramas.items()
+            }
+
+    def flush(self, forzar=False):
+        ahora = time.monotonic()
+        if not forzar and ahora - self.ultimo_volcado < METRICS_FLUSH_SECONDS:
+            return
+        self.ultimo_volcado = ahora
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            destino = os.path.join(METRICS_DIR, f"{self.proceso}.json")
+            temporal = f"{destino}.tmp"
+            with open(temporal, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temporal, destino)
+        except OSError:
+            logger.exception("No se pudieron volcar las métricas")
+
+    def combinar(self):
+        """
+        Suma los volcados de todos los procesos (incluido este).
+        """
+        self.flush(forzar=True)
+        total = {nombre: {} for nombre in self.histogramas}
+        try:
+            archivos = [a for a in os.listdir(METRICS_DIR) if a.endswith(".json")]
+        except FileNotFoundError:
+            archivos = []
+        for archivo in archivos:
+            # "<pid>-<id>.json": el volcado de un worker que ya terminó se borra
+            pid = archivo.split("-", 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _proceso_vivo(int(pid)):
+                try:
+                    os.remove(os.path.join(METRICS_DIR, archivo))
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                with open(os.path.join(METRICS_DIR, archivo)) as f:
+                    datos = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for nombre, series in datos.items():
+                if nombre not in total:
+                    continue
+                for valores, serie in series:
+                    acumulada = total[nombre].setdefault(tuple(valores), [0] * len(serie))
+                    for i, valor in enumerate(serie):
+                        acumulada[i] += valor
+        return total
+
+
+registro = Registro(
+    Histograma("farmacia_http_request_duration_seconds", "Latencia de las peticiones HTTP",
+               ("blueprint", "endpoint", "method", "status"), BUCKETS_LATENCIA),
+    Histograma("farmacia_http_response_size_bytes", "Tamaño del cuerpo de las respuestas",
+               ("blueprint", "endpoint"), BUCKETS_BYTES),
+    Histograma("farmacia_db_queries_per_request", "Sentencias SQL ejecutadas por petición",
+               ("blueprint", "endpoint"), BUCKETS_CONSULTAS),
+    Histograma("farmacia_db_duration_seconds", "Tiempo total en la base de datos por petición",
+               ("blueprint", "endpoint"), BUCKETS_LATENCIA),
+)
+
+
+# ------------------------- MEDICIÓN POR PETICIÓN -------------------------
+class _Medicion:
+    __slots__ = ("inicio", "consultas", "tiempo_db", "bytes")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.bytes = 0
+
+
+def _antes_de_sentencia(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+
+def _despues_de_sentencia(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info["metricas_inicio"].pop()
+    if has_request_context():
+        medicion = g.get("_medicion")
+        if medicion is not None:
+            medicion.consultas += 1
+            medicion.tiempo_db += time.perf_counter() - inicio
+
+
+def _error_de_sentencia(contexto):
+    # Si la sentencia falla no hay after_cursor_execute: se descarta su inicio
+    if contexto.connection is not None:
+        pila = contexto.connection.info.get("metricas_inicio")
+        if pila:
+            pila.pop()
+
+
+def _contar_bytes(cuerpo, medicion):
+    for bloque in cuerpo:
+        medicion.bytes += len(bloque)
+        yield bloque
+
+
+def _registrar(medicion, blueprint, endpoint, metodo, status):
+    duracion = time.perf_counter() - medicion.inicio
+    registro.observe("farmacia_http_request_duration_seconds", (blueprint, endpoint, metodo, status), duracion)
+    registro.observe("farmacia_http_response_size_bytes", (blueprint, endpoint), medicion.bytes)
+    registro.observe("farmacia_db_queries_per_request", (blueprint, endpoint), medicion.consultas)
+    registro.observe("farmacia_db_duration_seconds", (blueprint, endpoint), medicion.tiempo_db)
+    registro.flush()
+
+    if duracion * 1000 >= SLOW_REQUEST_MS:
+        logger.warning("Petición lenta", extra={
+            "endpoint": endpoint,
+            "metodo": metodo,
+            "status": status,
+            "duracion_ms": round(duracion * 1000, 1),
+            "consultas": medicion.consultas,
+            "db_ms": round(medicion.tiempo_db * 1000, 1),
+        })
+
+
+def _antes_de_peticion():
+    g._medicion = _Medicion()
+
+
+def _despues_de_peticion(response):
+    medicion = g.get("_medicion")
+    if medicion is None or request.endpoint == "metricas":
+        return response
+
+    etiquetas = (
+        request.blueprint or "app",
+        request.endpoint or "desconocido",
+        request.method,
+        str(response.status_code),
+    )
+    if response.is_streamed:
+        # Los CSV se generan mientras se envían: se mide al cerrar la respuesta
+        response.response = _contar_bytes(response.response, medicion)
+        response.call_on_close(lambda: _registrar(medicion, *etiquetas))
+    else:
+        medicion.bytes = response.calculate_content_length() or 0
+        _registrar(medicion, *etiquetas)
+    return response
+
+
+# ------------------------- EXPOSICIÓN -------------------------
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres, valores):
+    return ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores))
+
+
+def exposicion():
+    lineas = []
+    for nombre, series in registro.combinar().items():
+        histograma = registro.histogramas[nombre]
+        lineas.append(f"# HELP {nombre} {histograma.ayuda}")
+        lineas.append(f"# TYPE {nombre} histogram")
+        for valores, serie in sorted(series.items()):
+            base = _etiquetas(histograma.etiquetas, valores)
+            acumulado = 0
+            for limite, conteo in zip(histograma.buckets + ("+Inf",), serie):
+                acumulado += conteo
+                lineas.append(f'{nombre}_bucket{{{base},le="{limite}"}} {acumulado}')
+            lineas.append(f"{nombre}_sum{{{base}}} {serie[-1]}")
+            lineas.append(f"{nombre}_count{{{base}}} {acumulado}")
+
+    # El pool es propio de cada proceso: se reporta el del worker que responde
+    pool = pool_snapshot(db.engine)
+    pid = os.getpid()
+    for clave, tipo in (("en_uso", "gauge"), ("libres", "gauge"), ("overflow", "gauge"),
+                        ("checkouts", "counter"), ("timeouts", "counter")):
+        if clave in pool:
+            nombre = f"farmacia_db_pool_{clave}" + ("_total" if tipo == "counter" else "")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            lineas.append(f'{nombre}{{pid="{pid}"}} {pool[clave]}')
+    nombre = "farmacia_db_pool_wait_seconds_total"
+    lineas.append(f"# TYPE {nombre} counter")
+    lineas.append(f'{nombre}{{pid="{pid}"}} {pool["espera_total_ms"] / 1000}')
+    return "\n".join(lineas) + "\n"
+
+
+def init_app(app):
+    """
+    Registra la medición de peticiones, los eventos del engine y GET /metrics.
+    """
+    app.before_request(_antes_de_peticion)
+    app.after_request(_despues_de_peticion)
+
+    # Primaria y réplicas: las consultas cuentan igual venga de donde venga
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _antes_de_sentencia):
+            event.listen(engine, "before_cursor_execute", _antes_de_sentencia)
+            event.listen(engine, "after_cursor_execute", _despues_de_sentencia)
+            event.listen(engine, "handle_error", _error_de_sentencia)
+
+    @app.route("/metrics", endpoint="metricas")
+    def metricas():
+        return Response(exposicion(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,69 @@
+# app/migrations/__init__.py
+"""
+Migraciones de esquema versionadas. Cada migración se aplica una sola vez y
+queda registrada en la tabla schema_version; se ejecutan con `flask migrate`
+(nunca al iniciar los workers).
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+
+from app.migrations.versiones import MIGRACIONES
+
+_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("nombre", String(100), nullable=False),
+    Column("aplicada_en", DateTime, nullable=False),
+)
+
+# Clave del advisory lock de PostgreSQL que serializa migraciones concurrentes
+_LOCK_ID = 7291001
+
+
+def _aplicadas(conn):
+    return set(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def pendientes(conn):
+    """
+    Versiones conocidas que aún no se aplicaron en la base de `conn`.
+    """
+    aplicadas = _aplicadas(conn)
+    return [version for version, _, _ in MIGRACIONES if version not in aplicadas]
+
+
+def estado(engine):
+    """
+    Devuelve [(version, nombre, aplicada)] de todas las migraciones conocidas.
+    """
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+        aplicadas = _aplicadas(conn)
+    return [(version, nombre, version in aplicadas) for version, nombre, _ in MIGRACIONES]
+
+
+def upgrade(engine, log=print):
+    """
+    Aplica en orden las migraciones pendientes, cada una en su transacción.
+    Devuelve la lista de versiones aplicadas.
+    """
+    aplicadas = []
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+
+    for version, nombre, migracion in MIGRACIONES:
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _LOCK_ID})
+            if version in _aplicadas(conn):
+                continue
+            migracion(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, nombre=nombre, aplicada_en=datetime.utcnow()
+            ))
+        log(f"Migración {version:04d} aplicada: {nombre}")
+        aplicadas.append(version)
+    return aplicadas
@@ -0,0 +1,325 @@
+# app/migrations/versiones.py
+"""
+Migraciones del esquema, en orden. Todas son idempotentes: las bases creadas
+con el antiguo db.create_all() ya tienen parte del esquema y solo se agrega
+lo que falta.
+
+Cada migración declara aquí mismo las tablas, índices y consultas que usa,
+tal como eran cuando se escribió: no importa app.models ni funciones de
+crud.py o sync.py, así una versión siempre significa el mismo esquema
+aunque el código cambie después. Un cambio nuevo va en una migración nueva.
+"""
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, Date, DateTime, Enum, ForeignKey, Index, Integer, JSON, MetaData,
+    String, Table, Text, delete, func, insert, inspect, literal_column,
+    select, text, update,
+)
+
+
+def _crear_indices(conn, *indices):
+    for indice in indices:
+        indice.create(conn, checkfirst=True)
+
+
+def _columnas(conn, tabla):
+    return {c["name"] for c in inspect(conn).get_columns(tabla)}
+
+
+def _tiene_indice(conn, tabla, nombre):
+    inspector = inspect(conn)
+    nombres = {i["name"] for i in inspector.get_indexes(tabla)}
+    nombres |= {u["name"] for u in inspector.get_unique_constraints(tabla)}
+    return nombre in nombres
+
+
+def _restriccion_unica(conn, tabla, nombre, columnas):
+    """
+    Borra los duplicados históricos (conserva el registro más antiguo) y crea
+    el índice único que respalda la restricción del modelo.
+    """
+    if _tiene_indice(conn, tabla, nombre):
+        return
+    cols = ", ".join(columnas)
+    conn.execute(text(
+        f'DELETE FROM "{tabla}" WHERE id NOT IN '
+        f'(SELECT MIN(id) FROM "{tabla}" GROUP BY {cols})'
+    ))
+    conn.execute(text(f'CREATE UNIQUE INDEX {nombre} ON "{tabla}" ({cols})'))
+
+
+def _documento_busqueda(principal, *secundarias):
+    # Expresión tsvector de los índices GIN (igual a models.documento_busqueda
+    # cuando se crearon los índices)
+    def vector(texto, peso):
+        return func.setweight(
+            func.to_tsvector(literal_column("'spanish'"), texto),
+            literal_column(f"'{peso}'"),
+        )
+
+    resto = func.coalesce(secundarias[0], '')
+    for columna in secundarias[1:]:
+        resto = resto + ' ' + func.coalesce(columna, '')
+    return vector(func.coalesce(principal, ''), 'A').op('||')(vector(resto, 'B'))
+
+
+def m0001_tablas_base(conn):
+    # Esquema original de db.create_all()
+    meta = MetaData()
+    Table(
+        "user", meta,
+        Column("id", Integer, primary_key=True),
+        Column("username", String(100), nullable=False, unique=True),
+        Column("email", String(100), nullable=False, unique=True),
+        Column("password", String(200), nullable=False),
+        Column("role", String(20)),
+    )
+    Table(
+        "job_offer", meta,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("titulo", String(150), nullable=False),
+        Column("descripcion", Text, nullable=False),
+        Column("requisitos", Text),
+        Column("fecha_publicacion", Date, nullable=False),
+    )
+    Table(
+        "course", meta,
+        Column("id", Integer, primary_key=True),
+        Column("titulo", String(150), nullable=False),
+        Column("descripcion", Text),
+        Column("duracion_horas", Integer, nullable=False),
+        Column("fecha_inicio", Date, nullable=False),
+        Column("fecha_fin", Date, nullable=False),
+        Column("instructor", String(255), nullable=False),
+        Column("cupo_maximo", Integer, nullable=False),
+        Column("estado", Enum("activo", "inactivo", name="estadocapacitacion"), nullable=False),
+    )
+    Table(
+        "enrollment", meta,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+        Column("course_id", Integer, ForeignKey("course.id"), nullable=False),
+        Column("fecha_inscripcion", DateTime),
+    )
+    Table(
+        "application", meta,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+        Column("job_offer_id", Integer, ForeignKey("job_offer.id"), nullable=False),
+        Column("fecha_postulacion", DateTime),
+    )
+    meta.create_all(conn, checkfirst=True)
+
+
+def m0002_indices_catalogo(conn):
+    meta = MetaData()
+    job_offer = Table(
+        "job_offer", meta,
+        Column("id", Integer), Column("titulo", String), Column("descripcion", Text),
+        Column("requisitos", Text), Column("fecha_publicacion", Date),
+    )
+    course = Table(
+        "course", meta,
+        Column("id", Integer), Column("titulo", String), Column("descripcion", Text),
+        Column("instructor", String), Column("estado", String), Column("fecha_inicio", Date),
+    )
+    _crear_indices(
+        conn,
+        Index("ix_job_offer_fecha_publicacion_id", job_offer.c.fecha_publicacion, job_offer.c.id),
+        Index("ix_course_fecha_inicio_id", course.c.fecha_inicio, course.c.id),
+        Index("ix_course_estado_fecha_inicio_id", course.c.estado, course.c.fecha_inicio, course.c.id),
+        Index("ix_course_instructor_fecha_inicio_id", course.c.instructor, course.c.fecha_inicio, course.c.id),
+    )
+    # Búsqueda de texto completo: solo PostgreSQL
+    if conn.dialect.name == "postgresql":
+        _crear_indices(
+            conn,
+            Index(
+                "ix_job_offer_busqueda",
+                _documento_busqueda(job_offer.c.titulo, job_offer.c.descripcion, job_offer.c.requisitos),
+                postgresql_using="gin",
+            ),
+            Index(
+                "ix_course_busqueda",
+                _documento_busqueda(course.c.titulo, course.c.descripcion, course.c.instructor),
+                postgresql_using="gin",
+            ),
+        )
+
+
+def m0003_restricciones_unicas(conn):
+    _restriccion_unica(conn, "enrollment", "uq_enrollment_user_course", ["user_id", "course_id"])
+    _restriccion_unica(conn, "application", "uq_application_user_job_offer", ["user_id", "job_offer_id"])
+
+
+def m0004_course_inscritos(conn):
+    if "inscritos" not in _columnas(conn, "course"):
+        conn.execute(text("ALTER TABLE course ADD COLUMN inscritos INTEGER NOT NULL DEFAULT 0"))
+    # El contador arranca con las inscripciones existentes
+    conn.execute(text(
+        "UPDATE course SET inscritos = "
+        "(SELECT COUNT(*) FROM enrollment WHERE enrollment.course_id = course.id)"
+    ))
+
+
+def m0005_indices_fk_fechas(conn):
+    meta = MetaData()
+    enrollment = Table("enrollment", meta, Column("course_id", Integer), Column("fecha_inscripcion", DateTime))
+    application = Table("application", meta, Column("job_offer_id", Integer), Column("fecha_postulacion", DateTime))
+    _crear_indices(
+        conn,
+        Index("ix_enrollment_course_id", enrollment.c.course_id),
+        Index("ix_enrollment_fecha_inscripcion", enrollment.c.fecha_inscripcion),
+        Index("ix_application_job_offer_id", application.c.job_offer_id),
+        Index("ix_application_fecha_postulacion", application.c.fecha_postulacion),
+    )
+
+
+def m0006_resumenes(conn):
+    if "total_postulaciones" not in _columnas(conn, "job_offer"):
+        conn.execute(text("ALTER TABLE job_offer ADD COLUMN total_postulaciones INTEGER NOT NULL DEFAULT 0"))
+
+    meta = MetaData()
+    course = Table("course", meta, Column("id", Integer, primary_key=True), Column("inscritos", Integer))
+    job_offer = Table(
+        "job_offer", meta, Column("id", Integer, primary_key=True), Column("total_postulaciones", Integer)
+    )
+    enrollment = Table("enrollment", meta, Column("course_id", Integer), Column("fecha_inscripcion", DateTime))
+    application = Table("application", meta, Column("job_offer_id", Integer), Column("fecha_postulacion", DateTime))
+    resumen_inscripciones = Table(
+        "enrollment_weekly_summary", meta,
+        Column("course_id", Integer, ForeignKey("course.id", ondelete="CASCADE"), primary_key=True),
+        Column("semana", Date, primary_key=True),
+        Column("inscripciones", Integer, nullable=False),
+        Index("ix_enrollment_weekly_summary_semana", "semana"),
+    )
+    resumen_postulaciones = Table(
+        "application_weekly_summary", meta,
+        Column("job_offer_id", Integer, ForeignKey("job_offer.id", ondelete="CASCADE"), primary_key=True),
+        Column("semana", Date, primary_key=True),
+        Column("postulaciones", Integer, nullable=False),
+        Index("ix_application_weekly_summary_semana", "semana"),
+    )
+    meta.create_all(conn, tables=[resumen_inscripciones, resumen_postulaciones], checkfirst=True)
+
+    # Resúmenes y contadores calculados desde las filas existentes (semana
+    # que empieza el lunes)
+    for resumen, evento, clave, fecha, columna in (
+        (resumen_inscripciones, enrollment, "course_id", "fecha_inscripcion", "inscripciones"),
+        (resumen_postulaciones, application, "job_offer_id", "fecha_postulacion", "postulaciones"),
+    ):
+        if conn.dialect.name == "postgresql":
+            semana = func.date_trunc("week", evento.c[fecha]).cast(Date)
+        else:
+            semana = func.date(evento.c[fecha], "weekday 0", "-6 days")
+        conn.execute(delete(resumen))
+        conn.execute(insert(resumen).from_select(
+            [clave, "semana", columna],
+            select(evento.c[clave], semana, func.count())
+            .where(evento.c[fecha].isnot(None))
+            .group_by(evento.c[clave], semana),
+        ))
+    conn.execute(update(course).values(inscritos=(
+        select(func.count()).where(enrollment.c.course_id == course.c.id).scalar_subquery()
+    )))
+    conn.execute(update(job_offer).values(total_postulaciones=(
+        select(func.count()).where(application.c.job_offer_id == job_offer.c.id).scalar_subquery()
+    )))
+
+
+def m0007_outbox(conn):
+    meta = MetaData()
+    Table(
+        "outbox_event", meta,
+        Column("id", Integer, primary_key=True),
+        Column("tipo", String(100), nullable=False),
+        Column("payload", JSON, nullable=False),
+        Column("estado", String(20), nullable=False, server_default="pendiente"),
+        Column("intentos", Integer, nullable=False, server_default="0"),
+        Column("disponible_en", DateTime, nullable=False),
+        Column("creado_en", DateTime, nullable=False),
+        Column("procesado_en", DateTime),
+        Column("ultimo_error", Text),
+        Index("ix_outbox_event_estado_disponible_en", "estado", "disponible_en", "id"),
+    )
+    meta.create_all(conn, checkfirst=True)
+
+
+def m0008_archivo(conn):
+    for tabla in ("course", "job_offer"):
+        if "eliminado_en" not in _columnas(conn, tabla):
+            conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN eliminado_en TIMESTAMP"))
+    meta = MetaData()
+    Table(
+        "enrollment_archive", meta,
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column("user_id", Integer, nullable=False),
+        Column("course_id", Integer, nullable=False),
+        Column("fecha_inscripcion", DateTime),
+        Column("archivado_en", DateTime, nullable=False),
+        Index("ix_enrollment_archive_fecha_inscripcion", "fecha_inscripcion"),
+        Index("ix_enrollment_archive_course_id", "course_id"),
+    )
+    Table(
+        "application_archive", meta,
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column("user_id", Integer, nullable=False),
+        Column("job_offer_id", Integer, nullable=False),
+        Column("fecha_postulacion", DateTime),
+        Column("archivado_en", DateTime, nullable=False),
+        Index("ix_application_archive_fecha_postulacion", "fecha_postulacion"),
+        Index("ix_application_archive_job_offer_id", "job_offer_id"),
+    )
+    meta.create_all(conn, checkfirst=True)
+
+
+def m0009_sincronizacion(conn):
+    # Los listados con ?since= avanzan por (actualizado_en, id); las bajas
+    # de inscripciones y postulaciones dejan lápidas en sync_tombstone
+    meta = MetaData()
+    tablas = {}
+    for tabla in ("course", "job_offer", "enrollment", "application"):
+        if "actualizado_en" not in _columnas(conn, tabla):
+            conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN actualizado_en TIMESTAMP"))
+        tablas[tabla] = Table(tabla, meta, Column("id", Integer), Column("actualizado_en", DateTime))
+
+    ahora = datetime.utcnow()
+    for tabla in tablas.values():
+        conn.execute(update(tabla).where(tabla.c.actualizado_en.is_(None)).values(actualizado_en=ahora))
+
+    Table(
+        "sync_tombstone", meta,
+        Column("id", Integer, primary_key=True),
+        Column("recurso", String(50), nullable=False),
+        Column("entidad_id", Integer, nullable=False),
+        Column("user_id", Integer, nullable=False),
+        Column("eliminado_en", DateTime, nullable=False),
+        Index("ix_sync_tombstone_recurso_user_id_eliminado_en", "recurso", "user_id", "eliminado_en"),
+        Index("ix_sync_tombstone_eliminado_en", "eliminado_en"),
+    )
+    Table(
+        "sync_purga", meta,
+        Column("recurso", String(50), primary_key=True),
+        Column("purgado_hasta", DateTime, nullable=False),
+    )
+    meta.create_all(conn, checkfirst=True)
+
+    _crear_indices(
+        conn,
+        Index("ix_course_actualizado_en_id", tablas["course"].c.actualizado_en, tablas["course"].c.id),
+        Index("ix_job_offer_actualizado_en_id", tablas["job_offer"].c.actualizado_en, tablas["job_offer"].c.id),
+    )
+
+
+MIGRACIONES = [
+    (1, "tablas_base", m0001_tablas_base),
+    (2, "indices_catalogo", m0002_indices_catalogo),
+    (3, "restricciones_unicas", m0003_restricciones_unicas),
+    (4, "course_inscritos", m0004_course_inscritos),
+    (5, "indices_fk_fechas", m0005_indices_fk_fechas),
+    (6, "resumenes", m0006_resumenes),
+    (7, "outbox", m0007_outbox),
+    (8, "archivo", m0008_archivo),
+    (9, "sincronizacion", m0009_sincronizacion),
+]
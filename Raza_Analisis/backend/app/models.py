@@ -2,6 +2,24 @@
 from app.db import db  # Usa una ruta relativa para importar db
 from datetime import datetime
 from enum import Enum
+import sqlalchemy.dialects.postgresql  # registra los tipos de to_tsvector / ts_rank
+
+
+def documento_busqueda(principal, *secundarias):
+    """
+    Expresión tsvector (configuración 'spanish') usada por los índices GIN de
+    búsqueda y por app.search en PostgreSQL: el título pesa 'A' y el resto 'B'.
+    """
+    def vector(texto, peso):
+        return db.func.setweight(
+            db.func.to_tsvector(db.literal_column("'spanish'"), texto),
+            db.literal_column(f"'{peso}'"),
+        )
+
+    resto = db.func.coalesce(secundarias[0], '')
+    for columna in secundarias[1:]:
+        resto = resto + ' ' + db.func.coalesce(columna, '')
+    return vector(db.func.coalesce(principal, ''), 'A').op('||')(vector(resto, 'B'))
 
 
 class User(db.Model):
@@ -25,10 +43,28 @@ class JobOffer(db.Model):
     descripcion = db.Column(db.Text, nullable=False)
     requisitos = db.Column(db.Text)
     fecha_publicacion = db.Column(db.Date, default=datetime.utcnow, nullable=False)
+    # Contador de postulaciones, mantenido por crud.create_application / delete_application
+    total_postulaciones = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Borrado lógico: la oferta sale del catálogo pero conserva sus postulaciones
+    eliminado_en = db.Column(db.DateTime)
+    # Momento del último cambio, clave de los listados con ?since= (ver app/sync.py)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow)  # lo actualiza sync.touch()
 
     # Relaciones
     postulaciones = db.relationship('Application', back_populates='job_offer', cascade="all, delete-orphan")
 
+    # Índice para el listado paginado (orden estable por fecha_publicacion, id)
+    # y GIN de búsqueda de texto completo (solo PostgreSQL)
+    __table_args__ = (
+        db.Index('ix_job_offer_fecha_publicacion_id', 'fecha_publicacion', 'id'),
+        db.Index('ix_job_offer_actualizado_en_id', 'actualizado_en', 'id'),
+        db.Index(
+            'ix_job_offer_busqueda',
+            documento_busqueda(titulo, descripcion, requisitos),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
+
 
 class EstadoCapacitacion(Enum):
     activo = "activo"
@@ -45,27 +81,168 @@ class Course(db.Model):
     instructor = db.Column(db.String(255), nullable=False)
     cupo_maximo = db.Column(db.Integer, nullable=False)
     estado = db.Column(db.Enum(EstadoCapacitacion), default=EstadoCapacitacion.activo, nullable=False)
+    # Contador de cupos ocupados, mantenido por crud.reserve_seat / release_seat
+    inscritos = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Borrado lógico: el curso sale del catálogo pero conserva sus inscripciones
+    eliminado_en = db.Column(db.DateTime)
+    # Momento del último cambio, clave de los listados con ?since= (ver app/sync.py)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow)  # lo actualiza sync.touch()
 
     inscripciones = db.relationship('Enrollment', back_populates='course', cascade="all, delete-orphan")
 
+    # Índices para el listado paginado y sus filtros (orden estable por fecha_inicio, id)
+    # y GIN de búsqueda de texto completo (solo PostgreSQL)
+    __table_args__ = (
+        db.Index('ix_course_fecha_inicio_id', 'fecha_inicio', 'id'),
+        db.Index('ix_course_estado_fecha_inicio_id', 'estado', 'fecha_inicio', 'id'),
+        db.Index('ix_course_instructor_fecha_inicio_id', 'instructor', 'fecha_inicio', 'id'),
+        db.Index('ix_course_actualizado_en_id', 'actualizado_en', 'id'),
+        db.Index(
+            'ix_course_busqueda',
+            documento_busqueda(titulo, descripcion, instructor),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
+
 class Enrollment(db.Model):
     __tablename__ = 'enrollment'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     fecha_inscripcion = db.Column(db.DateTime, default=datetime.utcnow)
+    # Momento del último cambio, clave de los listados con ?since= (ver app/sync.py)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow)  # lo actualiza sync.touch()
 
     # Relaciones
     user = db.relationship('User', back_populates='inscripciones')
     course = db.relationship('Course', back_populates='inscripciones')
 
+    # Un usuario solo puede inscribirse una vez en cada curso (la restricción
+    # también sirve de índice por user_id); índices por curso y por fecha
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'course_id', name='uq_enrollment_user_course'),
+        db.Index('ix_enrollment_course_id', 'course_id'),
+        db.Index('ix_enrollment_fecha_inscripcion', 'fecha_inscripcion'),
+    )
+
 class Application(db.Model):
     __tablename__ = 'application'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     job_offer_id = db.Column(db.Integer, db.ForeignKey('job_offer.id'), nullable=False)
     fecha_postulacion = db.Column(db.DateTime, default=datetime.utcnow)
+    # Momento del último cambio, clave de los listados con ?since= (ver app/sync.py)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow)  # lo actualiza sync.touch()
 
     # Relaciones
     user = db.relationship('User', back_populates='postulaciones')
-    job_offer = db.relationship('JobOffer', back_populates='postulaciones')
\ No newline at end of file
+    job_offer = db.relationship('JobOffer', back_populates='postulaciones')
+
+    # Un usuario solo puede postular una vez a cada oferta (la restricción
+    # también sirve de índice por user_id); índices por oferta y por fecha
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'job_offer_id', name='uq_application_user_job_offer'),
+        db.Index('ix_application_job_offer_id', 'job_offer_id'),
+        db.Index('ix_application_fecha_postulacion', 'fecha_postulacion'),
+    )
+
+
+# ------------------------- RESÚMENES -------------------------
+# Conteos por semana (lunes de la semana del evento) mantenidos de forma
+# incremental por crud.py al crear o cancelar inscripciones y postulaciones.
+class EnrollmentWeeklySummary(db.Model):
+    __tablename__ = 'enrollment_weekly_summary'
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), primary_key=True)
+    semana = db.Column(db.Date, primary_key=True)
+    inscripciones = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_enrollment_weekly_summary_semana', 'semana'),
+    )
+
+class ApplicationWeeklySummary(db.Model):
+    __tablename__ = 'application_weekly_summary'
+    job_offer_id = db.Column(db.Integer, db.ForeignKey('job_offer.id', ondelete='CASCADE'), primary_key=True)
+    semana = db.Column(db.Date, primary_key=True)
+    postulaciones = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_application_weekly_summary_semana', 'semana'),
+    )
+
+
+# ------------------------- OUTBOX -------------------------
+# Eventos escritos en la misma transacción que la inscripción o postulación
+# que los origina; app/outbox.py los despacha en segundo plano.
+class OutboxEvent(db.Model):
+    __tablename__ = 'outbox_event'
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # pendiente | procesado | fallido (agotó los reintentos)
+    estado = db.Column(db.String(20), nullable=False, default='pendiente', server_default='pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Próximo intento; al reclamar un evento se corre al final de la reserva
+    disponible_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    procesado_en = db.Column(db.DateTime)
+    ultimo_error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_outbox_event_estado_disponible_en', 'estado', 'disponible_en', 'id'),
+    )
+
+
+# ------------------------- ARCHIVO -------------------------
+# Historial movido por app/archivo.py: inscripciones de cursos terminados y
+# postulaciones de ofertas vencidas o eliminadas. Conservan el id original y
+# no tienen claves foráneas, así sobreviven aunque cambie el catálogo.
+class EnrollmentArchive(db.Model):
+    __tablename__ = 'enrollment_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    course_id = db.Column(db.Integer, nullable=False)
+    fecha_inscripcion = db.Column(db.DateTime)
+    archivado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_enrollment_archive_fecha_inscripcion', 'fecha_inscripcion'),
+        db.Index('ix_enrollment_archive_course_id', 'course_id'),
+    )
+
+class ApplicationArchive(db.Model):
+    __tablename__ = 'application_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    job_offer_id = db.Column(db.Integer, nullable=False)
+    fecha_postulacion = db.Column(db.DateTime)
+    archivado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_application_archive_fecha_postulacion', 'fecha_postulacion'),
+        db.Index('ix_application_archive_job_offer_id', 'job_offer_id'),
+    )
+
+
+# ------------------------- SINCRONIZACIÓN -------------------------
+# Lápidas de las inscripciones y postulaciones borradas y, por recurso
+# ("cursos", "ofertas", "inscripciones", "postulaciones"), hasta cuándo se
+# purgaron, para los listados con ?since= (ver app/sync.py).
+class SyncPurge(db.Model):
+    __tablename__ = 'sync_purga'
+    recurso = db.Column(db.String(50), primary_key=True)
+    # Un cliente con un token anterior recibe el listado completo
+    purgado_hasta = db.Column(db.DateTime, nullable=False)
+
+class SyncTombstone(db.Model):
+    __tablename__ = 'sync_tombstone'
+    id = db.Column(db.Integer, primary_key=True)
+    recurso = db.Column(db.String(50), nullable=False)
+    entidad_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    eliminado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_sync_tombstone_recurso_user_id_eliminado_en', 'recurso', 'user_id', 'eliminado_en'),
+        db.Index('ix_sync_tombstone_eliminado_en', 'eliminado_en'),
+    )
@@ -0,0 +1,40 @@
+# app/notificaciones.py
+"""
+Handlers del outbox para inscripciones y postulaciones. Por ahora dejan el
+aviso en el log; el envío de correo se conecta aquí sin tocar las rutas.
+"""
+import logging
+
+from app.db import db
+from app.models import User, Course, JobOffer
+from app.outbox import handler
+
+logger = logging.getLogger(__name__)
+
+
+@handler("inscripcion.creada")
+def confirmar_inscripcion(evento):
+    datos = evento.payload
+    usuario = db.session.get(User, datos["usuario_id"])
+    curso = db.session.get(Course, datos["curso_id"])
+    if usuario is None or curso is None:
+        return  # Cancelada o eliminada antes del despacho
+    logger.info("Confirmación de inscripción", extra={
+        "evento_id": evento.id,
+        "email": usuario.email,
+        "curso": curso.titulo,
+    })
+
+
+@handler("postulacion.creada")
+def avisar_postulacion(evento):
+    datos = evento.payload
+    usuario = db.session.get(User, datos["usuario_id"])
+    oferta = db.session.get(JobOffer, datos["oferta_id"])
+    if usuario is None or oferta is None:
+        return
+    logger.info("Nueva postulación", extra={
+        "evento_id": evento.id,
+        "usuario": usuario.username,
+        "oferta": oferta.titulo,
+    })
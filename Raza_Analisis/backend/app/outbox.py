@@ -0,0 +1,235 @@
+# app/outbox.py
+"""
+Outbox transaccional: crud.py escribe un evento en outbox_event dentro de la
+misma transacción que la inscripción o la postulación, y un hilo despachador
+de cada worker los reclama por lotes y ejecuta los handlers registrados con
+@handler. La petición no espera a los efectos secundarios (correos,
+notificaciones) y estos no se pierden si el proceso cae: un evento reclamado
+y no terminado vuelve a estar disponible al vencer su reserva.
+
+La entrega es al menos una vez: un handler puede ejecutarse de nuevo tras un
+error o una caída, así que debe ser idempotente (puede usar evento.id).
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from app.db import db, transaction, on_commit
+from app.models import OutboxEvent
+
+OUTBOX_BATCH = int(os.environ.get("OUTBOX_BATCH", 100))
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", 2))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+# Reintentos: OUTBOX_BACKOFF_BASE * 2^(intento-1) segundos, hasta OUTBOX_BACKOFF_MAX
+OUTBOX_BACKOFF_BASE = float(os.environ.get("OUTBOX_BACKOFF_BASE", 5))
+OUTBOX_BACKOFF_MAX = float(os.environ.get("OUTBOX_BACKOFF_MAX", 3600))
+# Tiempo que un evento reclamado queda reservado para el worker que lo tomó
+OUTBOX_LEASE = int(os.environ.get("OUTBOX_LEASE", 300))
+# Días que se conservan los eventos procesados
+OUTBOX_RETENTION_DAYS = int(os.environ.get("OUTBOX_RETENTION_DAYS", 7))
+# 0 = no despachar desde los workers web (usar `flask outbox` aparte)
+OUTBOX_DISPATCHER = os.environ.get("OUTBOX_DISPATCHER", "1").strip().lower() not in ("0", "false", "no")
+
+logger = logging.getLogger(__name__)
+
+_handlers = defaultdict(list)
+
+
+def handler(tipo):
+    """
+    Decorador: registra `fn(evento)` para los eventos de `tipo`. `evento`
+    tiene id, tipo, payload e intentos.
+    """
+    def decorator(fn):
+        _handlers[tipo].append(fn)
+        return fn
+    return decorator
+
+
+def publish(tipo, payload):
+    """
+    Agrega un evento a la transacción en curso. Se despacha después del
+    commit; si la transacción se deshace, el evento tampoco existe.
+    """
+    db.session.add(OutboxEvent(tipo=tipo, payload=payload))
+    on_commit(wake)
+
+
+def wake():
+    """
+    Despierta al despachador de este proceso (si está activo).
+    """
+    dispatcher = current_app.extensions.get("outbox")
+    if dispatcher is not None:
+        dispatcher.wake()
+
+
+# ------------------------- DESPACHO -------------------------
+def claim_batch(limite=OUTBOX_BATCH):
+    """
+    Reclama hasta `limite` eventos disponibles: suma un intento y corre
+    disponible_en al final de la reserva. En PostgreSQL las filas se toman
+    con FOR UPDATE SKIP LOCKED (los workers no se esperan entre sí); en
+    SQLite las escrituras ya están serializadas y el UPDATE condicional
+    descarta lo que otro proceso reclamó antes.
+    """
+    ahora = datetime.utcnow()
+    disponible = (OutboxEvent.estado == "pendiente") & (OutboxEvent.disponible_en <= ahora)
+    with transaction():
+        ids = db.session.scalars(
+            select(OutboxEvent.id)
+            .where(disponible)
+            .order_by(OutboxEvent.id)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return []
+        eventos = db.session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids), disponible)
+            .values(disponible_en=ahora + timedelta(seconds=OUTBOX_LEASE), intentos=OutboxEvent.intentos + 1)
+            .returning(OutboxEvent.id, OutboxEvent.tipo, OutboxEvent.payload, OutboxEvent.intentos)
+            .execution_options(synchronize_session=False)
+        ).all()
+    return sorted(eventos, key=lambda evento: evento.id)
+
+
+def _backoff(intentos):
+    espera = min(OUTBOX_BACKOFF_BASE * 2 ** (intentos - 1), OUTBOX_BACKOFF_MAX)
+    return espera * random.uniform(0.8, 1.2)
+
+
+def _procesar(evento):
+    try:
+        for fn in _handlers.get(evento.tipo, ()):
+            fn(evento)
+    except Exception as e:
+        db.session.rollback()
+        agotado = evento.intentos >= OUTBOX_MAX_ATTEMPTS
+        logger.warning(
+            "Error al despachar evento del outbox",
+            exc_info=True,
+            extra={"evento_id": evento.id, "tipo": evento.tipo, "intentos": evento.intentos, "agotado": agotado},
+        )
+        valores = {"ultimo_error": f"{type(e).__name__}: {e}"[:2000]}
+        if agotado:
+            valores["estado"] = "fallido"
+        else:
+            valores["disponible_en"] = datetime.utcnow() + timedelta(seconds=_backoff(evento.intentos))
+    else:
+        valores = {"estado": "procesado", "procesado_en": datetime.utcnow(), "ultimo_error": None}
+
+    with transaction():
+        db.session.execute(
+            update(OutboxEvent).where(OutboxEvent.id == evento.id).values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def dispatch_batch(limite=OUTBOX_BATCH):
+    """
+    Reclama y procesa un lote. Devuelve la cantidad de eventos reclamados.
+    """
+    eventos = claim_batch(limite)
+    for evento in eventos:
+        _procesar(evento)
+    return len(eventos)
+
+
+def purge(dias=OUTBOX_RETENTION_DAYS):
+    """
+    Borra los eventos procesados hace más de `dias` días.
+    """
+    limite = datetime.utcnow() - timedelta(days=dias)
+    with transaction():
+        return db.session.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.estado == "procesado", OutboxEvent.procesado_en < limite)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+
+def counts():
+    """
+    Cantidad de eventos por estado (para /api/sistema/outbox).
+    """
+    filas = db.session.execute(
+        select(OutboxEvent.estado, func.count()).group_by(OutboxEvent.estado)
+    ).all()
+    return {estado: total for estado, total in filas}
+
+
+class Dispatcher:
+    """
+    Hilo de fondo que despacha el outbox: procesa lotes mientras haya eventos
+    disponibles y, si no, espera OUTBOX_POLL_SECONDS o hasta que wake() avise
+    de un commit con eventos nuevos.
+    """
+
+    PURGA_CADA = 3600
+
+    def __init__(self, app):
+        self.app = app
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._ultima_purga = 0
+
+    def start(self):
+        with self._lock:
+            # Después de un fork el hilo del proceso padre ya no está vivo
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self.run, name="outbox", daemon=True)
+            self._hilo.start()
+
+    def wake(self):
+        self._despertar.set()
+
+    def stop(self):
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def run_once(self):
+        with self.app.app_context():
+            try:
+                procesados = dispatch_batch()
+                if time.monotonic() - self._ultima_purga > self.PURGA_CADA:
+                    self._ultima_purga = time.monotonic()
+                    purge()
+                return procesados
+            except Exception:
+                logger.exception("Error en el despachador del outbox")
+                return 0
+            finally:
+                db.session.remove()
+
+    def run(self):
+        while not self._detener.is_set():
+            if self.run_once() < OUTBOX_BATCH:
+                self._despertar.wait(OUTBOX_POLL_SECONDS)
+                self._despertar.clear()
+
+
+def init_app(app):
+    """
+    Crea el despachador de la aplicación. Con OUTBOX_DISPATCHER activo se
+    arranca en cada worker con su primera petición (nunca en el proceso
+    maestro antes del fork).
+    """
+    dispatcher = Dispatcher(app)
+    app.extensions["outbox"] = dispatcher
+    if OUTBOX_DISPATCHER:
+        app.before_request(dispatcher.start)
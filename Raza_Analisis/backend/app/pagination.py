@@ -0,0 +1,77 @@
+# app/pagination.py
+import base64
+import json
+from datetime import datetime
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+
+def parse_limit(valor):
+    """
+    Convierte el parámetro ?limit= en un entero entre 1 y LIMITE_MAXIMO.
+    """
+    if valor in (None, ""):
+        return LIMITE_POR_DEFECTO
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError("El parámetro 'limit' debe ser un número entero")
+    if limite < 1:
+        raise ValueError("El parámetro 'limit' debe ser mayor que cero")
+    return min(limite, LIMITE_MAXIMO)
+
+
+def parse_fecha(valor, campo):
+    if valor in (None, ""):
+        return None
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"El parámetro '{campo}' debe tener el formato YYYY-MM-DD")
+
+
+# El cursor es opaco para el cliente: codifica la clave de orden (fecha, id)
+# de la última fila entregada para continuar desde ahí con un index range scan.
+def encode_cursor(fecha, ultimo_id):
+    crudo = json.dumps([fecha.strftime("%Y-%m-%d"), ultimo_id]).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        fecha, ultimo_id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return datetime.strptime(fecha, "%Y-%m-%d").date(), int(ultimo_id)
+    except (ValueError, TypeError):
+        raise ValueError("El parámetro 'after' no es un cursor válido")
+
+
+# Token de los listados incrementales (?since=): también opaco, codifica la
+# clave (actualizado_en, id) desde la que seguir y, a mitad de una
+# paginación, el corte de su primera página (ver app/sync.py).
+def encode_since(momento, ultimo_id, corte=None):
+    partes = [momento.isoformat(), ultimo_id]
+    if corte is not None:
+        partes.append(corte.isoformat())
+    return base64.urlsafe_b64encode(json.dumps(partes).encode()).decode().rstrip("=")
+
+
+def parse_since(valor):
+    """
+    Convierte ?since= en (datetime, id, corte o None). Vacío o "0" es None:
+    el cliente todavía no tiene nada.
+    """
+    if not valor or valor == "0":
+        return None
+    try:
+        relleno = "=" * (-len(valor) % 4)
+        momento, ultimo_id, *corte = json.loads(base64.urlsafe_b64decode(valor + relleno))
+        if len(corte) > 1:
+            raise ValueError(valor)
+        corte = datetime.fromisoformat(corte[0]) if corte else None
+        return datetime.fromisoformat(momento), int(ultimo_id), corte
+    except (ValueError, TypeError):
+        raise ValueError("El parámetro 'since' no es un token válido")
@@ -0,0 +1,87 @@
+# app/pool.py
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """
+    Contadores del pool de conexiones del proceso actual.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.overflow_max = 0
+
+    def record_wait(self, segundos, overflow):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += segundos
+            self.wait_max = max(self.wait_max, segundos)
+            self.overflow_max = max(self.overflow_max, overflow)
+
+    def incr(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout por una conexión libre.
+    """
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.incr("timeouts")
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - inicio, max(self.overflow(), 0))
+
+
+def instrument_pool(engine):
+    event.listen(engine, "connect", lambda *args: pool_stats.incr("connects"))
+    event.listen(engine, "checkout", lambda *args: pool_stats.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *args: pool_stats.incr("checkins"))
+
+
+def pool_snapshot(engine):
+    pool = engine.pool
+    datos = {
+        "clase": type(pool).__name__,
+        "conexiones": pool_stats.connects,
+        "checkouts": pool_stats.checkouts,
+        "checkins": pool_stats.checkins,
+        "timeouts": pool_stats.timeouts,
+        "espera_total_ms": round(pool_stats.wait_total * 1000, 3),
+        "espera_max_ms": round(pool_stats.wait_max * 1000, 3),
+        "espera_promedio_ms": round(pool_stats.wait_total * 1000 / pool_stats.waits, 3) if pool_stats.waits else 0.0,
+        "overflow_max": pool_stats.overflow_max,
+    }
+    if isinstance(pool, QueuePool):
+        datos.update({
+            "tamano": pool.size(),
+            "en_uso": pool.checkedout(),
+            "libres": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    return datos
@@ -0,0 +1,330 @@
+# app/ratelimit.py
+"""
+Control de admisión: cubetas de tokens por IP o por usuario autenticado para
+login, registro, inscripciones y postulaciones, una cubeta de intentos
+fallidos de login por nombre de usuario e IP, y un tope global de
+exportaciones concurrentes. Al superar un límite se responde 429 con
+Retry-After.
+
+Las cubetas se guardan en memoria (por proceso, con desalojo LRU) o, con
+RATE_LIMIT_BACKEND=sqlite, en un archivo SQLite compartido por todos los
+workers del mismo servidor.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+from app.cache import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# `capacidad` peticiones de ráfaga; la cubeta se rellena en `periodo` segundos
+Limite = namedtuple("Limite", ["capacidad", "periodo"])
+
+
+def parse_limite(texto):
+    """
+    "20/60" -> Limite(20, 60.0): 20 peticiones cada 60 segundos.
+    """
+    try:
+        capacidad, periodo = texto.split("/")
+        limite = Limite(int(capacidad), float(periodo))
+    except ValueError:
+        raise ValueError(f"Límite inválido: {texto!r} (formato capacidad/segundos)")
+    if limite.capacidad <= 0 or limite.periodo <= 0:
+        raise ValueError(f"Límite inválido: {texto!r}")
+    return limite
+
+
+def _consumir(estados, limite, ahora, descontar=True):
+    """
+    Recarga las cubetas y, si todas tienen un token, descuenta uno de cada
+    una (salvo con descontar=False, que solo consulta). Devuelve
+    (estados_nuevos, espera); espera > 0 indica rechazo y no se descuenta
+    nada.
+    """
+    tasa = limite.capacidad / limite.periodo
+    recargados = []
+    espera = 0.0
+    for estado in estados:
+        tokens, ts = estado if estado is not None else (limite.capacidad, ahora)
+        tokens = min(limite.capacidad, tokens + (ahora - ts) * tasa)
+        if tokens < 1:
+            espera = max(espera, (1 - tokens) / tasa)
+        recargados.append(tokens)
+    if espera or not descontar:
+        return [(tokens, ahora) for tokens in recargados], espera
+    return [(tokens - 1, ahora) for tokens in recargados], 0.0
+
+
+class MemoryStore:
+    """
+    Cubetas en memoria del proceso: clave -> (tokens, instante). Las menos
+    usadas se descartan al pasar de max_claves (equivale a una cubeta llena).
+    """
+
+    def __init__(self, max_claves=10000):
+        self.max_claves = max_claves
+        self._cubetas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tomar(self, claves, limite, descontar=True):
+        with self._lock:
+            ahora = time.monotonic()
+            nuevos, espera = _consumir([self._cubetas.get(c) for c in claves], limite, ahora, descontar)
+            for clave, estado in zip(claves, nuevos):
+                self._cubetas[clave] = estado
+                self._cubetas.move_to_end(clave)
+            while len(self._cubetas) > self.max_claves:
+                self._cubetas.popitem(last=False)
+            return espera
+
+    def clear(self):
+        with self._lock:
+            self._cubetas.clear()
+
+
+class SQLiteStore:
+    """
+    Cubetas en un archivo SQLite local, compartidas entre procesos. Cada
+    consulta es una transacción BEGIN IMMEDIATE (serializada por SQLite).
+    """
+
+    LIMPIEZA_CADA = 1000
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._operaciones = 0
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with self._conexion() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cubetas (clave TEXT PRIMARY KEY, tokens REAL, ts REAL)"
+            )
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def tomar(self, claves, limite, descontar=True):
+        conn = self._conexion()
+        ahora = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            estados = []
+            for clave in claves:
+                fila = conn.execute("SELECT tokens, ts FROM cubetas WHERE clave = ?", (clave,)).fetchone()
+                estados.append(fila)
+            nuevos, espera = _consumir(estados, limite, ahora, descontar)
+            conn.executemany(
+                "INSERT OR REPLACE INTO cubetas (clave, tokens, ts) VALUES (?, ?, ?)",
+                [(clave, tokens, ts) for clave, (tokens, ts) in zip(claves, nuevos)],
+            )
+            self._operaciones += 1
+            if self._operaciones % self.LIMPIEZA_CADA == 0:
+                # Una cubeta sin uso durante su periodo ya está llena: se borra
+                conn.execute("DELETE FROM cubetas WHERE ts < ?", (ahora - limite.periodo,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return espera
+
+    def clear(self):
+        self._conexion().execute("DELETE FROM cubetas")
+
+
+class ConcurrencyLimit:
+    """
+    Como máximo `maximo` peticiones a la vez en todos los procesos del
+    servidor: cada una toma un archivo de bloqueo (flock) de un conjunto de
+    `maximo`. Sin fcntl (Windows) el tope es por proceso.
+    """
+
+    def __init__(self, nombre, maximo, directorio):
+        self.maximo = maximo
+        self._rutas = [os.path.join(directorio, f"{nombre}.{i}.lock") for i in range(maximo)]
+        self._semaforo = threading.BoundedSemaphore(maximo)
+        if fcntl is not None:
+            os.makedirs(directorio, exist_ok=True)
+
+    def adquirir(self):
+        """
+        Devuelve una función para liberar el lugar, o None si no hay lugar.
+        """
+        if fcntl is None:
+            if not self._semaforo.acquire(blocking=False):
+                return None
+            return self._semaforo.release
+
+        for ruta in self._rutas:
+            fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            return lambda: os.close(fd)  # cerrar el descriptor libera el flock
+        return None
+
+
+class RateLimiter:
+    def __init__(self):
+        self.activo = True
+        self.store = MemoryStore()
+        self.limites = {}
+        self.concurrencia = {}
+        self.retry_after_concurrencia = 5
+
+    def configure(self, config):
+        self.activo = config["RATE_LIMIT_ENABLED"]
+        if config["RATE_LIMIT_BACKEND"] == "sqlite":
+            ruta = config["RATE_LIMIT_SQLITE_PATH"] or os.path.join(CACHE_DIR, "ratelimit.db")
+            self.store = SQLiteStore(ruta)
+        else:
+            self.store = MemoryStore(config["RATE_LIMIT_MAX_KEYS"])
+        self.limites = {
+            "login": parse_limite(config["RATE_LIMIT_LOGIN"]),
+            "login_fallido": parse_limite(config["RATE_LIMIT_LOGIN_FALLIDO"]),
+            "signup": parse_limite(config["RATE_LIMIT_SIGNUP"]),
+            "inscripcion": parse_limite(config["RATE_LIMIT_INSCRIPCION"]),
+            "postular": parse_limite(config["RATE_LIMIT_POSTULAR"]),
+        }
+        self.concurrencia = {
+            "exportaciones": ConcurrencyLimit(
+                "exportaciones", config["EXPORT_MAX_CONCURRENT"], os.path.join(CACHE_DIR, "concurrencia")
+            ),
+        }
+        self.retry_after_concurrencia = config["EXPORT_RETRY_AFTER"]
+
+    def tomar(self, nombre, claves, descontar=True):
+        """
+        Descuenta un token de cada cubeta de `claves` (con descontar=False
+        solo consulta). Devuelve 0 si se admite la petición o los segundos a
+        esperar si no.
+        """
+        if not self.activo or not claves:
+            return 0
+        return self.store.tomar([f"{nombre}:{clave}" for clave in claves], self.limites[nombre], descontar)
+
+
+limiter = RateLimiter()
+
+
+def _claves(tipos, args):
+    claves = []
+    for tipo in tipos:
+        if tipo == "ip":
+            claves.append(f"ip:{request.remote_addr}")
+        elif tipo == "usuario":
+            # Rutas con @token_required: el primer argumento es current_user
+            claves.append(f"usuario:{args[0].id}")
+    return claves
+
+
+def _respuesta_429(mensaje, espera):
+    segundos = max(1, math.ceil(espera))
+    response = jsonify({"error": mensaje, "reintentar_en": segundos})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(segundos)
+    return response
+
+
+def rate_limit(nombre, *tipos):
+    """
+    Decorador: limita la ruta con las cubetas de `nombre` para cada tipo de
+    clave ("ip", "usuario"). Va debajo de @token_required cuando se usa
+    "usuario".
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            espera = limiter.tomar(nombre, _claves(tipos, args))
+            if espera:
+                logger.info("Límite de peticiones alcanzado", extra={
+                    "limite": nombre, "ip": request.remote_addr, "espera_s": round(espera, 1),
+                })
+                return _respuesta_429("Demasiadas solicitudes, intenta de nuevo más tarde", espera)
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
+
+
+# ------------------------- LOGIN FALLIDO -------------------------
+# Solo las contraseñas incorrectas descuentan, y la cubeta es por nombre de
+# usuario e IP: quien falla desde otra IP no bloquea al usuario legítimo.
+def _clave_login(username):
+    return [f"{username.lower()}:{request.remote_addr}"]
+
+
+def login_failures_exceeded(username):
+    """
+    Respuesta 429 si `username` agotó sus intentos fallidos desde esta IP;
+    si no, None. Se consulta antes de verificar la contraseña.
+    """
+    espera = limiter.tomar("login_fallido", _clave_login(username), descontar=False)
+    if espera:
+        logger.info("Límite de logins fallidos alcanzado", extra={
+            "ip": request.remote_addr, "espera_s": round(espera, 1),
+        })
+        return _respuesta_429("Demasiados intentos fallidos, intenta de nuevo más tarde", espera)
+    return None
+
+
+def record_login_failure(username):
+    limiter.tomar("login_fallido", _clave_login(username))
+
+
+def concurrency_limit(nombre):
+    """
+    Decorador: admite la petición solo si hay un lugar libre en el tope de
+    `nombre`. En respuestas por streaming el lugar se libera al terminar
+    de enviarlas.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not limiter.activo:
+                return f(*args, **kwargs)
+            liberar = limiter.concurrencia[nombre].adquirir()
+            if liberar is None:
+                return _respuesta_429(
+                    "Hay demasiadas exportaciones en curso, intenta de nuevo en unos segundos",
+                    limiter.retry_after_concurrencia,
+                )
+            try:
+                response = make_response(f(*args, **kwargs))
+            except BaseException:
+                liberar()
+                raise
+            if response.is_streamed:
+                response.call_on_close(liberar)
+            else:
+                liberar()
+            return response
+
+        return decorated
+
+    return decorator
+
+
+def init_app(app):
+    limiter.configure(app.config)
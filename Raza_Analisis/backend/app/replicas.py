@@ -0,0 +1,258 @@
+# app/replicas.py
+"""
+Enrutamiento de lecturas a réplicas. Las rutas GET de los blueprints
+marcados con route_reads() leen de una réplica sana (en rotación); las
+escrituras siguen en la primaria (ver RoutingSession en db.py).
+
+- Leer lo propio: después de una escritura autenticada con éxito (fuera de
+  /api/auth), el mismo usuario lee de la primaria durante
+  DB_REPLICA_STICKY_SECONDS. La marca es un archivo por usuario en
+  CACHE_DIR, así la ven todos los workers del servidor. Las escrituras
+  anónimas no marcan: una IP puede ser la de muchos clientes detrás de un
+  NAT o proxy.
+- Salud: cada réplica se revisa como mucho cada DB_REPLICA_CHECK_SECONDS
+  (conexión y, en PostgreSQL, retraso de replicación); si falla o una
+  consulta pierde la conexión queda fuera DB_REPLICA_RETRY_SECONDS y las
+  lecturas van a la primaria.
+
+Para probarlo en local basta con dos bases: DATABASE_URL para la primaria y
+DATABASE_REPLICA_URLS con la otra (sin replicación, cada lectura muestra de
+qué base salió).
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+
+from flask import current_app, g, request
+from sqlalchemy import event, text
+
+from app.auth.middleware import authenticate
+from app.cache import CACHE_DIR
+from app.db import db
+
+logger = logging.getLogger(__name__)
+
+_MARCAS_DIR = os.path.join(CACHE_DIR, "escrituras")
+_METODOS_LECTURA = ("GET", "HEAD")
+_LIMPIEZA_CADA = 1000
+_escrituras = itertools.count(1)
+
+
+class Replica:
+    def __init__(self, nombre, engine):
+        self.nombre = nombre
+        self.engine = engine
+        self.sana = True
+        self.retraso = None
+        self.revisada = 0.0
+        self.caida_hasta = 0.0
+        self.ultimo_error = None
+        self._lock = threading.Lock()
+
+    def marcar_caida(self, error, reintento):
+        if time.monotonic() >= self.caida_hasta:
+            logger.warning("Réplica fuera de servicio", extra={"replica": self.nombre, "error": str(error)})
+        self.sana = False
+        self.ultimo_error = str(error)
+        self.caida_hasta = time.monotonic() + reintento
+
+    def revisar(self, config):
+        """
+        Comprueba la conexión y el retraso. Solo un hilo revisa a la vez; los
+        demás usan el último resultado.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.revisada = time.monotonic()
+            max_retraso = config["DB_REPLICA_MAX_LAG_SECONDS"]
+            with self.engine.connect() as conn:
+                if max_retraso and conn.dialect.name == "postgresql":
+                    self.retraso = conn.execute(text(
+                        "SELECT CASE WHEN pg_is_in_recovery() "
+                        "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                        "ELSE 0 END"
+                    )).scalar()
+                else:
+                    conn.execute(text("SELECT 1"))
+            if max_retraso and self.retraso is not None and self.retraso > max_retraso:
+                self.marcar_caida(f"retraso de {self.retraso:.1f} s", config["DB_REPLICA_RETRY_SECONDS"])
+            else:
+                self.sana = True
+                self.ultimo_error = None
+        except Exception as e:
+            self.marcar_caida(e, config["DB_REPLICA_RETRY_SECONDS"])
+        finally:
+            self._lock.release()
+
+    def disponible(self, config):
+        ahora = time.monotonic()
+        if ahora < self.caida_hasta:
+            return False
+        if ahora - self.revisada >= config["DB_REPLICA_CHECK_SECONDS"]:
+            self.revisar(config)
+        return self.sana
+
+    def estado(self):
+        return {
+            "sana": self.sana and time.monotonic() >= self.caida_hasta,
+            "retraso_s": None if self.retraso is None else round(float(self.retraso), 3),
+            "error": self.ultimo_error,
+        }
+
+
+class ReplicaRouter:
+    def __init__(self, app, replicas):
+        self.config = app.config
+        self.replicas = replicas
+        self._turno = itertools.count()
+
+    def elegir(self):
+        """
+        Devuelve la siguiente réplica disponible o None (leer de la primaria).
+        """
+        if not self.replicas:
+            return None
+        inicio = next(self._turno)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(inicio + i) % len(self.replicas)]
+            if replica.disponible(self.config):
+                return replica
+        return None
+
+
+# ------------------------- LEER LO PROPIO -------------------------
+def _ruta_marca(user_id):
+    return os.path.join(_MARCAS_DIR, f"usuario-{user_id}")
+
+
+def _usuario_de_lectura():
+    """
+    Id del usuario del token de la petición, o None. Las lecturas se enrutan
+    antes de que corra @token_required; el token casi siempre ya está en la
+    caché de tokens verificados.
+    """
+    autorizacion = request.headers.get("Authorization", "")
+    if not autorizacion.startswith("Bearer "):
+        return None
+    try:
+        return authenticate(autorizacion.split(" ")[1]).id
+    except ValueError:
+        return None
+
+
+def _marcar_escritura(user_id, segundos):
+    os.makedirs(_MARCAS_DIR, exist_ok=True)
+    ruta = _ruta_marca(user_id)
+    with open(ruta, "a"):
+        pass
+    os.utime(ruta)
+    if next(_escrituras) % _LIMPIEZA_CADA == 0:
+        _limpiar_marcas(segundos)
+
+
+def _escribio_hace(user_id, segundos):
+    try:
+        modificado = os.stat(_ruta_marca(user_id)).st_mtime
+    except FileNotFoundError:
+        return False
+    return time.time() - modificado < segundos
+
+
+def _limpiar_marcas(segundos):
+    limite = time.time() - segundos
+    try:
+        with os.scandir(_MARCAS_DIR) as entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.stat().st_mtime < limite:
+                        os.remove(entrada.path)
+                except FileNotFoundError:
+                    pass
+    except FileNotFoundError:
+        pass
+
+
+# ------------------------- ENRUTAMIENTO -------------------------
+def _enrutar_lectura():
+    router = current_app.extensions.get("replicas")
+    if router is None or not router.replicas or request.method not in _METODOS_LECTURA:
+        return
+    user_id = _usuario_de_lectura()
+    if user_id is not None and _escribio_hace(user_id, router.config["DB_REPLICA_STICKY_SECONDS"]):
+        return
+    replica = router.elegir()
+    if replica is not None:
+        db.session().info["replica"] = replica.engine
+
+
+def _fin_de_peticion(exc):
+    db.session().info.pop("replica", None)
+
+
+def _despues_de_peticion(response):
+    # Solo escrituras autenticadas (el usuario lo deja @token_required en g);
+    # login y registro no cuentan
+    usuario = g.get("current_user")
+    if (
+        usuario is not None
+        and request.blueprint != "auth"
+        and request.method not in _METODOS_LECTURA + ("OPTIONS",)
+        and response.status_code < 400
+    ):
+        _marcar_escritura(usuario.id, current_app.config["DB_REPLICA_STICKY_SECONDS"])
+    return response
+
+
+def route_reads(blueprint):
+    """
+    Las rutas GET/HEAD del blueprint leen de una réplica.
+    """
+    blueprint.before_request(_enrutar_lectura)
+
+
+def use_primary_if_recent(edad_segundos):
+    """
+    Si los datos cambiaron hace menos de DB_REPLICA_STICKY_SECONDS, el resto
+    de la petición lee de la primaria (lo usa el caché de respuestas para no
+    guardar con la versión nueva datos que la réplica aún no tiene).
+    """
+    router = current_app.extensions.get("replicas")
+    if router is not None and edad_segundos < router.config["DB_REPLICA_STICKY_SECONDS"]:
+        db.session().info.pop("replica", None)
+
+
+def status():
+    router = current_app.extensions.get("replicas")
+    if router is None:
+        return {}
+    return {replica.nombre: replica.estado() for replica in router.replicas}
+
+
+def init_app(app):
+    """
+    Crea el enrutador con los binds "replica_<n>" configurados en
+    DB_REPLICA_URLS. Sin réplicas no registra nada.
+    """
+    with app.app_context():
+        replicas = [
+            Replica(nombre, engine) for nombre, engine in sorted(db.engines.items(), key=lambda par: str(par[0]))
+            if nombre and nombre.startswith("replica_")
+        ]
+    if not replicas:
+        return
+
+    reintento = app.config["DB_REPLICA_RETRY_SECONDS"]
+    for replica in replicas:
+        def error_de_conexion(contexto, replica=replica):
+            # Desconexión o fallo al conectar: la réplica queda fuera un tiempo
+            if contexto.is_disconnect or contexto.connection is None:
+                replica.marcar_caida(contexto.original_exception, reintento)
+        event.listen(replica.engine, "handle_error", error_de_conexion)
+
+    app.extensions["replicas"] = ReplicaRouter(app, replicas)
+    app.after_request(_despues_de_peticion)
+    app.teardown_request(_fin_de_peticion)
+    _limpiar_marcas(app.config["DB_REPLICA_STICKY_SECONDS"])
@@ -0,0 +1,40 @@
+from flask import Blueprint, request, jsonify
+from app import search
+from app.serializers import serialize
+
+busqueda_bp = Blueprint("busqueda", __name__, url_prefix="/api/busqueda")
+
+LIMITE_RESULTADOS = 50
+
+# Búsqueda de texto completo en cursos y ofertas, ordenada por relevancia
+# Parámetros: q (texto), tipo (cursos | ofertas; por defecto ambos), limit
+@busqueda_bp.route("", methods=["GET"])
+def buscar():
+    texto = (request.args.get("q") or "").strip()
+    if not texto:
+        return jsonify({"error": "El parámetro 'q' es obligatorio"}), 400
+
+    tipo = request.args.get("tipo")
+    if tipo not in (None, "cursos", "ofertas"):
+        return jsonify({"error": "El parámetro 'tipo' debe ser 'cursos' u 'ofertas'"}), 400
+
+    try:
+        limite = max(1, min(int(request.args.get("limit", 20)), LIMITE_RESULTADOS))
+    except ValueError:
+        return jsonify({"error": "El parámetro 'limit' debe ser un número entero"}), 400
+
+    try:
+        resultado = {}
+        if tipo in (None, "cursos"):
+            resultado["cursos"] = [
+                {**serialize("curso", curso), "puntaje": round(puntaje, 4)}
+                for curso, puntaje in search.search("cursos", texto, limite)
+            ]
+        if tipo in (None, "ofertas"):
+            resultado["ofertas"] = [
+                {**serialize("oferta", oferta), "puntaje": round(puntaje, 4)}
+                for oferta, puntaje in search.search("ofertas", texto, limite)
+            ]
+        return jsonify(resultado), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
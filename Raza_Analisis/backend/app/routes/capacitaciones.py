@@ -1,16 +1,29 @@
+import logging
 from flask import Blueprint, request, jsonify
 from ..crud import (
     create_course,
-    get_all_courses,
+    bulk_create_courses,
+    get_courses_page,
     get_course_by_id,
+    courses_since,
+    course_seat_counts,
     update_course,
     delete_course,
 )
-from datetime import datetime
-from app.auth.utils import validate_token
+from app.auth.middleware import admin_required, token_required
+from app.cache import cached_response
+from app.db import transaction
+from app.importacion import leer_filas, validar_lote, validar_curso
+from app.pagination import parse_limit, parse_fecha, encode_cursor, decode_cursor, encode_since, parse_since
+from app.replicas import route_reads
+from app.schemas import CourseCreate, CourseUpdate
+from app.serializers import serialize, serialize_many, validate
+from app.sync import next_since, resolve_since
 
 # Definición del Blueprint
 capacitaciones_bp = Blueprint('capacitaciones', __name__, url_prefix="/api/cursos")
+route_reads(capacitaciones_bp)  # Las rutas GET leen de las réplicas
+logger = logging.getLogger(__name__)
 
 # Ruta para preflight OPTIONS (CORS)
 @capacitaciones_bp.route('', methods=['OPTIONS'])
@@ -24,117 +37,144 @@ def preflight():
 # Crear una nueva capacitación
 @capacitaciones_bp.route('', methods=['POST'])
 def crear_capacitacion():
+    # Validar el cuerpo de la solicitud (campos obligatorios, tipos y fechas)
     try:
-        # Obtener datos del cuerpo de la solicitud
-        data = request.get_json()
-
-        # Validar campos obligatorios
-        required_fields = [
-            'titulo',
-            'descripcion',
-            'duracion_horas',
-            'fecha_inicio',
-            'fecha_fin',
-            'instructor',
-            'cupo_maximo',
-        ]
-        if not all(field in data and data[field] is not None for field in required_fields):
-            return jsonify({"error": "Todos los campos son obligatorios"}), 400
-
-        # Extraer datos
-        titulo = data['titulo']
-        descripcion = data['descripcion']
-        duracion_horas = data['duracion_horas']
-        fecha_inicio = data['fecha_inicio']
-        fecha_fin = data['fecha_fin']
-        instructor = data['instructor']
-        cupo_maximo = data['cupo_maximo']
-        estado = data.get('estado', 'activo')  # Estado por defecto: activo
-
-        # Crear el curso en la base de datos
-        curso = create_course(
-            titulo=titulo,
-            descripcion=descripcion,
-            duracion_horas=duracion_horas,
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin,
-            instructor=instructor,
-            cupo_maximo=cupo_maximo,
-            estado=estado,
-        )
+        data = validate(CourseCreate, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Crear el curso en la base de datos (estado por defecto: activo)
+        curso = create_course(**data.model_dump())
 
         # Respuesta exitosa
         return jsonify({
             "message": "Capacitación creada exitosamente",
-            "curso": {
-                "id": curso.id,
-                "titulo": curso.titulo,
-                "descripcion": curso.descripcion,
-                "duracion_horas": curso.duracion_horas,
-                "fecha_inicio": curso.fecha_inicio.strftime('%Y-%m-%d'),
-                "fecha_fin": curso.fecha_fin.strftime('%Y-%m-%d'),
-                "instructor": curso.instructor,
-                "cupo_maximo": curso.cupo_maximo,
-                "estado": curso.estado,
-            },
+            "curso": serialize("curso", curso),
         }), 201
 
     except Exception as e:
         # Manejo de errores
         return jsonify({"error": f"Error al crear la capacitación: {str(e)}"}), 500
 
-# Obtener todas las capacitaciones
+# Carga masiva de capacitaciones (arreglo JSON o CSV) en una sola transacción.
+# Si alguna fila tiene errores no se inserta nada, salvo con ?parcial=1.
+# Solo administradores.
+@capacitaciones_bp.route('/bulk', methods=['POST'])
+@token_required
+@admin_required
+def crear_capacitaciones_masivo(current_user):
+    try:
+        filas = leer_filas(request, "cursos")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    validas, errores = validar_lote(filas, validar_curso)
+    if not validas or (errores and request.args.get('parcial') != '1'):
+        return jsonify({"insertados": 0, "errores": errores}), 400
+
+    try:
+        insertados = bulk_create_courses(validas)
+        return jsonify({"insertados": insertados, "errores": errores}), 201
+    except Exception as e:
+        return jsonify({"error": f"Error en la carga masiva: {str(e)}"}), 500
+
+# Cambios desde un token (?since=<version>&limit=): cursos nuevos o
+# editados, ids eliminados y el token a
+# pedir la próxima vez. Con "completo" el cliente reemplaza su copia; con
+# "mas" vuelve a pedir.
+def _cambios_capacitaciones():
+    if any(request.args.get(p) for p in ('after', 'estado', 'instructor', 'desde', 'hasta')):
+        return jsonify({"error": "El parámetro 'since' no se combina con filtros ni con 'after'"}), 400
+    try:
+        limite = parse_limit(request.args.get('limit'))
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        desde, corte = resolve_since(since, "cursos")
+        cursos, mas = courses_since(desde, limite)
+
+        return jsonify({
+            "cursos": serialize_many("curso", [c for c in cursos if c.eliminado_en is None]),
+            "eliminados": [c.id for c in cursos if c.eliminado_en is not None],
+            "version": encode_since(*next_since(corte, cursos, mas)),
+            "completo": desde is None,
+            "mas": mas,
+        }), 200
+
+    except Exception as e:
+        logger.exception("Error al obtener cambios de capacitaciones")
+        return jsonify({"error": f"Error al obtener las capacitaciones: {str(e)}"}), 500
+
+# Obtener las capacitaciones (paginadas por cursor)
+# Parámetros: limit, after, estado, instructor, desde, hasta (fecha_inicio),
+# o since para recibir solo los cambios
 @capacitaciones_bp.route('', methods=['GET'])
+@cached_response("cursos")
 def obtener_capacitaciones():
+    if 'since' in request.args:
+        return _cambios_capacitaciones()
+
     try:
-        print(">> Obteniendo capacitaciones...")
-        cursos = get_all_courses()
-        print(f">> Se encontraron {len(cursos)} cursos")
-
-        cursos_formateados = [
-            {
-                "id": curso.id,
-                "titulo": curso.titulo,
-                "descripcion": curso.descripcion,
-                "duracion_horas": curso.duracion_horas,
-                "fecha_inicio": curso.fecha_inicio.strftime('%Y-%m-%d'),
-                "fecha_fin": curso.fecha_fin.strftime('%Y-%m-%d'),
-                "instructor": curso.instructor,
-                "cupo_maximo": curso.cupo_maximo,
-                "estado": curso.estado.value,
-            }
-            for curso in cursos
-        ]
-        return jsonify({"cursos": cursos_formateados}), 200
+        limite = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args.get('after'))
+        desde = parse_fecha(request.args.get('desde'), 'desde')
+        hasta = parse_fecha(request.args.get('hasta'), 'hasta')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    try:
+        cursos, siguiente = get_courses_page(
+            limite,
+            after=after,
+            estado=request.args.get('estado'),
+            desde=desde,
+            hasta=hasta,
+            instructor=request.args.get('instructor'),
+        )
+        logger.debug("Capacitaciones obtenidas", extra={"cantidad": len(cursos)})
+
+        return jsonify({
+            "cursos": serialize_many("curso", cursos),
+            "siguiente": encode_cursor(*siguiente) if siguiente else None,
+        }), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f">> ERROR al obtener capacitaciones: {e}")
+        logger.exception("Error al obtener capacitaciones")
         return jsonify({"error": f"Error al obtener las capacitaciones: {str(e)}"}), 500
 
+# Inscritos por curso ({id: inscritos}). Van aparte del catálogo, con su
+# propia versión de caché: una inscripción no invalida los cursos.
+# Parámetro opcional: ids (separados por comas)
+@capacitaciones_bp.route('/inscritos', methods=['GET'])
+@cached_response("inscritos")
+def obtener_inscritos():
+    ids = request.args.get('ids')
+    try:
+        ids = [int(i) for i in ids.split(',')] if ids else None
+    except ValueError:
+        return jsonify({"error": "El parámetro 'ids' debe ser una lista de enteros separados por comas"}), 400
+
+    try:
+        return jsonify({"inscritos": course_seat_counts(ids)}), 200
+    except Exception as e:
+        return jsonify({"error": f"Error al obtener los inscritos: {str(e)}"}), 500
+
 # Obtener una capacitación por ID
 @capacitaciones_bp.route('/<int:id>', methods=['GET'])
+@cached_response("cursos")
 def obtener_capacitacion_por_id(id):
     try:
-        print(f">> Buscando capacitación con ID: {id}")
         curso = get_course_by_id(id)
 
         if not curso:
-            print(">> No se encontró el curso con ese ID")
             return jsonify({"error": "Capacitación no encontrada"}), 404
 
-        curso_formateado = {
-            "id": curso.id,
-            "titulo": curso.titulo,
-            "descripcion": curso.descripcion,
-            "duracion_horas": curso.duracion_horas,
-            "fecha_inicio": curso.fecha_inicio.strftime('%Y-%m-%d'),
-            "fecha_fin": curso.fecha_fin.strftime('%Y-%m-%d'),
-            "instructor": curso.instructor,
-            "cupo_maximo": curso.cupo_maximo,
-            "estado": curso.estado.value,
-        }
-
-        return jsonify(curso_formateado), 200
+        return jsonify(serialize("curso", curso)), 200
 
     except Exception as e:
         return jsonify({"error": f"Error al obtener la capacitación: {str(e)}"}), 500
@@ -142,39 +182,25 @@ def obtener_capacitacion_por_id(id):
 # Editar una capacitación existente
 @capacitaciones_bp.route('/<int:id>', methods=['PUT'])
 def editar_capacitacion(id):
+    # Solo se aplican los campos enviados, validados igual que al crear
     try:
-        curso = get_course_by_id(id)
-        if not curso:
-            return jsonify({"error": "Capacitación no encontrada"}), 404
-
-        data = request.get_json()
-
-        curso.titulo = data.get('titulo', curso.titulo)
-        curso.descripcion = data.get('descripcion', curso.descripcion)
-        curso.duracion_horas = data.get('duracion_horas', curso.duracion_horas)
-        curso.fecha_inicio = datetime.strptime(data.get('fecha_inicio', curso.fecha_inicio.strftime('%Y-%m-%d')), "%Y-%m-%d").date()
-        curso.fecha_fin = datetime.strptime(data.get('fecha_fin', curso.fecha_fin.strftime('%Y-%m-%d')), "%Y-%m-%d").date()
-        curso.instructor = data.get('instructor', curso.instructor)
-        curso.cupo_maximo = data.get('cupo_maximo', curso.cupo_maximo)
-        curso.estado = data.get('estado', curso.estado)
+        data = validate(CourseUpdate, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        updated = update_course(curso)
+    try:
+        updated = update_course(id, data.model_dump(exclude_unset=True))
+        if not updated:
+            return jsonify({"error": "Capacitación no encontrada"}), 404
 
         return jsonify({
             "message": "Capacitación actualizada exitosamente",
-            "curso": {
-                "id": updated.id,
-                "titulo": updated.titulo,
-                "descripcion": updated.descripcion,
-                "duracion_horas": updated.duracion_horas,
-                "fecha_inicio": updated.fecha_inicio.strftime('%Y-%m-%d'),
-                "fecha_fin": updated.fecha_fin.strftime('%Y-%m-%d'),
-                "instructor": updated.instructor,
-                "cupo_maximo": updated.cupo_maximo,
-                "estado": updated.estado.value,  # <-- ¡CORREGIDO!
-            },
+            "curso": serialize("curso", updated),
         }), 200
 
+    except ValueError as e:
+        # Fechas invertidas o cupo menor que los inscritos
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error al actualizar la capacitación: {str(e)}"}), 500
 
@@ -182,11 +208,12 @@ def editar_capacitacion(id):
 @capacitaciones_bp.route('/<int:id>', methods=['DELETE'])
 def eliminar_capacitacion(id):
     try:
-        curso = get_course_by_id(id)
-        if not curso:
-            return jsonify({"error": "Capacitación no encontrada"}), 404
+        with transaction():
+            curso = get_course_by_id(id)
+            if not curso:
+                return jsonify({"error": "Capacitación no encontrada"}), 404
 
-        delete_course(curso)
+            delete_course(curso)
         return jsonify({"message": "Capacitación eliminada exitosamente"}), 200
 
     except Exception as e:
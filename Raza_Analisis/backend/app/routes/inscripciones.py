@@ -1,101 +1,112 @@
+import logging
 from flask import Blueprint, request, jsonify
-from app.models import Enrollment, User, Course
-from app.db import db
-from datetime import datetime
 from app.schemas import EnrollmentCreate
-from functools import wraps
-from app.auth.utils import validate_token
-
-# Middleware para verificar autenticación
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.headers.get("Authorization")
-        if not token or not token.startswith("Bearer "):
-            return jsonify({"error": "Token no válido o faltante"}), 401
-        try:
-            user_id = validate_token(token.split(" ")[1])
-        except Exception:
-            return jsonify({"error": "Token inválido"}), 401
-
-        current_user = User.query.get(user_id)
-        if not current_user:
-            return jsonify({"error": "Usuario no encontrado"}), 401
-
-        return f(current_user, *args, **kwargs)
-
-    return decorated
+from app.serializers import serialize_many, validate
+from app.pagination import encode_since, parse_since
+from app.sync import next_since, resolve_since
+from app.auth.middleware import token_required
+from app.ratelimit import rate_limit
+from app.replicas import route_reads
+from app.crud import (
+    CupoAgotado,
+    create_enrollment,
+    delete_enrollment,
+    get_course_by_id,
+    enrollment_rows,
+    user_enrollment_rows,
+    user_enrollment_changes,
+)
 
 inscripciones_bp = Blueprint('inscripciones', __name__, url_prefix="/api/inscripciones")
+route_reads(inscripciones_bp)  # Las rutas GET leen de las réplicas
+logger = logging.getLogger(__name__)
 
 # Registrar una nueva inscripción
 @inscripciones_bp.route('', methods=['POST'])
-def registrar_inscripcion():
+@token_required
+@rate_limit("inscripcion", "usuario")
+def registrar_inscripcion(current_user):
     try:
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"error": "Token faltante"}), 401
-
-        token = auth_header.split(" ")[1]
-        user_id = validate_token(token)
+        course_id = validate(EnrollmentCreate, request.get_json(silent=True)).curso_id
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        data = request.get_json()
-        course_id = data.get("curso_id")
-        if not course_id:
-            return jsonify({"error": "ID del curso faltante"}), 400
+    try:
+        user_id = current_user.id
 
-        curso = Course.query.get(course_id)
+        curso = get_course_by_id(course_id)
         if not curso:
             return jsonify({"error": "El curso no existe"}), 404
 
-        existente = Enrollment.query.filter_by(user_id=user_id, course_id=course_id).first()
-        if existente:
+        # La restricción única (user_id, course_id) detecta el duplicado en el mismo INSERT
+        try:
+            inscripcion_id = create_enrollment(user_id, course_id)
+        except CupoAgotado:
+            return jsonify({"error": "No hay cupos disponibles en este curso"}), 409
+        if inscripcion_id is None:
             return jsonify({"error": "Ya estás inscrito en este curso"}), 409
 
-        inscripcion = Enrollment(user_id=user_id, course_id=course_id, fecha_inscripcion=datetime.utcnow())
-        db.session.add(inscripcion)
-        db.session.commit()
-
         return jsonify({"message": "Inscripción registrada exitosamente"}), 201
 
     except Exception as e:
-        print(f"❌ Error en inscripción: {e}")
+        logger.exception("Error en inscripción", extra={"usuario_id": current_user.id})
         return jsonify({"error": str(e)}), 500
 
 # Listar todas las inscripciones (con email del usuario)
 @inscripciones_bp.route('/', methods=['GET'])
 def listar_inscripciones():
     try:
-        inscripciones = Enrollment.query.all()
-        return jsonify([
-            {
-                "usuario": i.user.username,
-                "email": i.user.email,
-                "curso": i.course.titulo,
-                "fecha_inscripcion": i.fecha_inscripcion.strftime('%Y-%m-%d')
-            }
-            for i in inscripciones
-        ])
+        return jsonify(serialize_many("inscripcion", enrollment_rows()))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# Listar inscripciones por usuario autenticado
+# Listar inscripciones por usuario autenticado. Con ?since=<token> (la
+# "version" de la respuesta anterior) devuelve solo las inscripciones que
+# cambiaron y los ids dados de baja
 @inscripciones_bp.route('/usuario', methods=['GET'])
 @token_required
 def obtener_inscripciones_usuario(current_user):
+    if 'since' in request.args:
+        return _cambios_inscripciones(current_user)
+
+    try:
+        inscripciones = serialize_many("inscripcion_usuario", user_enrollment_rows(current_user.id))
+        return jsonify(inscripciones), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _cambios_inscripciones(current_user):
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Lo que cambie durante la consulta se repite la próxima vez
+        desde, corte = resolve_since(since, "inscripciones", "cursos")
+        if desde is None:
+            filas, eliminados = user_enrollment_rows(current_user.id).all(), []
+        else:
+            filas, eliminados = user_enrollment_changes(current_user.id, desde[0])
+
+        return jsonify({
+            "inscripciones": serialize_many("inscripcion_usuario", filas),
+            "eliminados": eliminados,
+            "version": encode_since(*next_since(corte)),
+            "completo": desde is None,
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Cancelar una inscripción propia (libera el cupo)
+@inscripciones_bp.route('/<int:inscripcion_id>', methods=['DELETE'])
+@token_required
+def cancelar_inscripcion(current_user, inscripcion_id):
     try:
-        inscripciones = Enrollment.query.filter_by(user_id=current_user.id).all()
-        resultado = []
-        for inscripcion in inscripciones:
-            resultado.append({
-                "id": inscripcion.id,
-                "curso_id": inscripcion.course.id,
-                "titulo": inscripcion.course.titulo,
-                "descripcion": inscripcion.course.descripcion,
-                "fecha_inicio": inscripcion.course.fecha_inicio.strftime('%Y-%m-%d'),
-                "fecha_fin": inscripcion.course.fecha_fin.strftime('%Y-%m-%d'),
-                "fecha_inscripcion": inscripcion.fecha_inscripcion.strftime('%Y-%m-%d %H:%M')
-            })
-        return jsonify(resultado), 200
+        if not delete_enrollment(inscripcion_id, user_id=current_user.id):
+            return jsonify({"error": "Inscripción no encontrada"}), 404
+
+        return jsonify({"message": "Inscripción cancelada correctamente"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,81 +1,137 @@
 from flask import Blueprint, request, jsonify
-from app.models import JobOffer, Application, User
-from app.db import db
-from app.auth.utils import validate_token
+from app.auth.middleware import admin_required, token_required
+from app.ratelimit import rate_limit
+from app.replicas import route_reads
+from app.cache import cached_response
+from app.importacion import leer_filas, validar_lote, validar_oferta
+from app.pagination import parse_limit, parse_fecha, encode_cursor, decode_cursor, encode_since, parse_since
+from app.schemas import ApplicationCreate, JobOfferCreate, JobOfferUpdate
+from app.serializers import serialize, serialize_many, validate
+from app.sync import next_since, resolve_since
 from ..crud import (
     create_job_offer,
-    get_all_offers,
+    bulk_create_offers,
+    get_offers_page,
     get_offer_by_id,
+    offers_since,
     update_offer,
-    delete_offer
+    delete_offer,
+    create_application,
+    delete_application,
+    application_rows,
+    user_application_rows,
+    user_application_changes,
 )
 
 
 ofertas_bp = Blueprint("ofertas", __name__, url_prefix="/api/ofertas")
+route_reads(ofertas_bp)  # Las rutas GET leen de las réplicas
 
 # Crear una nueva oferta laboral
 @ofertas_bp.route('', methods=['POST'])
 def crear_oferta():
     try:
-        data = request.get_json()
-        titulo = data.get('titulo')
-        descripcion = data.get('descripcion')
-        requisitos = data.get('requisitos')
+        data = validate(JobOfferCreate, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        if not titulo or not descripcion:
-            return jsonify({"error": "Título y descripción son obligatorios"}), 400
-
-        oferta = create_job_offer(titulo, descripcion, requisitos)
+    try:
+        oferta = create_job_offer(data.titulo, data.descripcion, data.requisitos)
 
         return jsonify({
             "message": "Oferta creada exitosamente",
-            "oferta": {
-                "id": oferta.id,
-                "titulo": oferta.titulo,
-                "descripcion": oferta.descripcion,
-                "requisitos": oferta.requisitos,
-                "fecha_publicacion": oferta.fecha_publicacion.strftime('%Y-%m-%d')
-            }
+            "oferta": serialize("oferta", oferta),
         }), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-# Obtener todas las ofertas laborales
+# Carga masiva de ofertas laborales (arreglo JSON o CSV) en una sola transacción.
+# Si alguna fila tiene errores no se inserta nada, salvo con ?parcial=1.
+# Solo administradores.
+@ofertas_bp.route('/bulk', methods=['POST'])
+@token_required
+@admin_required
+def crear_ofertas_masivo(current_user):
+    try:
+        filas = leer_filas(request, "ofertas")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    validas, errores = validar_lote(filas, validar_oferta)
+    if not validas or (errores and request.args.get('parcial') != '1'):
+        return jsonify({"insertados": 0, "errores": errores}), 400
+
+    try:
+        insertados = bulk_create_offers(validas)
+        return jsonify({"insertados": insertados, "errores": errores}), 201
+    except Exception as e:
+        return jsonify({"error": f"Error en la carga masiva: {str(e)}"}), 500
+
+
+# Cambios desde un token (?since=<version>&limit=): ofertas nuevas o
+# editadas, ids eliminados y el token a pedir la próxima vez. Con
+# "completo" el cliente reemplaza su copia; con "mas" vuelve a pedir.
+def _cambios_ofertas():
+    if any(request.args.get(p) for p in ('after', 'desde', 'hasta')):
+        return jsonify({"error": "El parámetro 'since' no se combina con filtros ni con 'after'"}), 400
+    try:
+        limite = parse_limit(request.args.get('limit'))
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        desde, corte = resolve_since(since, "ofertas")
+        ofertas, mas = offers_since(desde, limite)
+        return jsonify({
+            "ofertas": serialize_many("oferta", [o for o in ofertas if o.eliminado_en is None]),
+            "eliminados": [o.id for o in ofertas if o.eliminado_en is not None],
+            "version": encode_since(*next_since(corte, ofertas, mas)),
+            "completo": desde is None,
+            "mas": mas,
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# Obtener las ofertas laborales (paginadas por cursor, más recientes primero)
+# Parámetros: limit, after, desde, hasta (fecha_publicacion), o since para
+# recibir solo los cambios
 @ofertas_bp.route("", methods=["GET"])
+@cached_response("ofertas")
 def obtener_ofertas():
+    if 'since' in request.args:
+        return _cambios_ofertas()
+
+    try:
+        limite = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args.get('after'))
+        desde = parse_fecha(request.args.get('desde'), 'desde')
+        hasta = parse_fecha(request.args.get('hasta'), 'hasta')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
-        ofertas = get_all_offers()
-        lista = [
-            {
-                "id": o.id,
-                "titulo": o.titulo,
-                "descripcion": o.descripcion,
-                "requisitos": o.requisitos,
-                "fecha_publicacion": o.fecha_publicacion.strftime('%Y-%m-%d')
-            }
-            for o in ofertas
-        ]
-        return jsonify({"ofertas": lista}), 200
+        ofertas, siguiente = get_offers_page(limite, after=after, desde=desde, hasta=hasta)
+        return jsonify({
+            "ofertas": serialize_many("oferta", ofertas),
+            "siguiente": encode_cursor(*siguiente) if siguiente else None,
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 # Obtener una oferta específica por ID
 @ofertas_bp.route("/<int:oferta_id>", methods=["GET"])
+@cached_response("ofertas")
 def obtener_oferta(oferta_id):
     try:
         oferta = get_offer_by_id(oferta_id)
         if not oferta:
             return jsonify({"error": "Oferta no encontrada"}), 404
 
-        return jsonify({
-            "id": oferta.id,
-            "titulo": oferta.titulo,
-            "descripcion": oferta.descripcion,
-            "requisitos": oferta.requisitos,
-            "fecha_publicacion": oferta.fecha_publicacion.strftime('%Y-%m-%d')
-        }), 200
+        return jsonify(serialize("oferta", oferta)), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -84,20 +140,18 @@ def obtener_oferta(oferta_id):
 @ofertas_bp.route("/<int:oferta_id>", methods=["PUT"])
 def actualizar_oferta(oferta_id):
     try:
-        data = request.get_json()
-        oferta_actualizada = update_offer(oferta_id, data)
+        data = validate(JobOfferUpdate, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        oferta_actualizada = update_offer(oferta_id, data.model_dump(exclude_unset=True))
         if not oferta_actualizada:
             return jsonify({"error": "Oferta no encontrada"}), 404
 
         return jsonify({
             "message": "Oferta actualizada correctamente",
-            "oferta": {
-                "id": oferta_actualizada.id,
-                "titulo": oferta_actualizada.titulo,
-                "descripcion": oferta_actualizada.descripcion,
-                "requisitos": oferta_actualizada.requisitos,
-                "fecha_publicacion": oferta_actualizada.fecha_publicacion.strftime('%Y-%m-%d')
-            }
+            "oferta": serialize("oferta", oferta_actualizada),
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -117,122 +171,87 @@ def eliminar_oferta(oferta_id):
 
 # Postular a una oferta laboral
 @ofertas_bp.route('/postular', methods=['POST'])
-def postular_oferta():
+@token_required
+@rate_limit("postular", "usuario")
+def postular_oferta(current_user):
     try:
-        token_header = request.headers.get("Authorization")
-        if not token_header or not token_header.startswith("Bearer "):
-            return jsonify({"error": "Token faltante"}), 401
+        oferta_id = validate(ApplicationCreate, request.get_json(silent=True)).idOferta
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        token = token_header.split(" ")[1]
-        user_id = validate_token(token)
-
-        data = request.get_json()
-        oferta_id = data.get("idOferta")
+    try:
+        user_id = current_user.id
 
-        if not oferta_id:
-            return jsonify({"error": "ID de oferta requerido"}), 400
+        if not get_offer_by_id(oferta_id):
+            return jsonify({"error": "La oferta no existe"}), 404
 
-        # Verifica si ya está postulando
-        existe = Application.query.filter_by(user_id=user_id, job_offer_id=oferta_id).first()
-        if existe:
+        # La restricción única (user_id, job_offer_id) detecta el duplicado en el mismo INSERT
+        postulacion_id = create_application(user_id, oferta_id)
+        if postulacion_id is None:
             return jsonify({"error": "Ya estás postulado a esta oferta."}), 409
 
-        nueva = Application(user_id=user_id, job_offer_id=oferta_id)
-        db.session.add(nueva)
-        db.session.commit()
-
         return jsonify({"message": "✅ Postulación registrada correctamente."}), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-    try:
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"error": "Token faltante"}), 401
-
-        token = auth_header.split(" ")[1]
-        user_id = validate_token(token)
-
-        data = request.get_json()
-        oferta_id = data.get("idOferta")
-        if not oferta_id:
-            return jsonify({"error": "ID de la oferta faltante"}), 400
-
-        # Verificar si ya está postulado
-        ya_postulado = Application.query.filter_by(user_id=user_id, job_offer_id=oferta_id).first()
-        if ya_postulado:
-            return jsonify({"error": "Ya te has postulado a esta oferta"}), 400
-
-        nueva_postulacion = Application(user_id=user_id, job_offer_id=oferta_id)
-        db.session.add(nueva_postulacion)
-        db.session.commit()
-
-        return jsonify({"message": "Postulación realizada exitosamente"}), 201
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
 # Listar todos los postulantes (vista admin)
 @ofertas_bp.route('/postulantes', methods=['GET'])
 def listar_postulantes():
     try:
-        postulaciones = Application.query.all()
-        lista = []
-        for p in postulaciones:
-            lista.append({
-                "nombre_usuario": p.user.username,
-                "correo": p.user.email,
-                "oferta": p.job_offer.titulo,
-                "fecha": p.fecha_postulacion.strftime('%Y-%m-%d')
-            })
-        return jsonify(lista), 200
+        return jsonify(serialize_many("postulacion", application_rows())), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Con ?since=<version> (la "version" de la respuesta anterior) devuelve solo
+# las postulaciones que cambiaron y los ids dados de baja
 @ofertas_bp.route('/mis-postulaciones', methods=['GET'])
-def mis_postulaciones():
-    try:
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"error": "Token faltante"}), 401
+@token_required
+def mis_postulaciones(current_user):
+    if 'since' in request.args:
+        return _cambios_postulaciones(current_user)
 
-        token = auth_header.split(" ")[1]
-        user_id = validate_token(token)
+    try:
+        user_id = current_user.id
 
         # Filtrar las postulaciones por usuario
-        postulaciones = Application.query.filter_by(user_id=user_id).all()
-
-        data = []
-        for p in postulaciones:
-            data.append({
-                "id_postulacion": p.id,
-                "titulo": p.job_offer.titulo,
-                "descripcion": p.job_offer.descripcion,
-                "fecha_postulacion": p.fecha_postulacion.strftime('%Y-%m-%d')
-            })
+        postulaciones = serialize_many("postulacion_usuario", user_application_rows(user_id))
 
-        return jsonify({"postulaciones": data}), 200
+        return jsonify({"postulaciones": postulaciones}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@ofertas_bp.route('/postulaciones/<int:postulacion_id>', methods=['DELETE'])
-def cancelar_postulacion(postulacion_id):
+def _cambios_postulaciones(current_user):
     try:
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"error": "Token faltante"}), 401
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        token = auth_header.split(" ")[1]
-        user_id = validate_token(token)
+    try:
+        # Lo que cambie durante la consulta se repite la próxima vez
+        desde, corte = resolve_since(since, "postulaciones", "ofertas")
+        if desde is None:
+            filas, eliminados = user_application_rows(current_user.id).all(), []
+        else:
+            filas, eliminados = user_application_changes(current_user.id, desde[0])
 
-        postulacion = Application.query.filter_by(id=postulacion_id, user_id=user_id).first()
-        if not postulacion:
-            return jsonify({"error": "Postulación no encontrada"}), 404
+        return jsonify({
+            "postulaciones": serialize_many("postulacion_usuario", filas),
+            "eliminados": eliminados,
+            "version": encode_since(*next_since(corte)),
+            "completo": desde is None,
+        }), 200
 
-        db.session.delete(postulacion)
-        db.session.commit()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@ofertas_bp.route('/postulaciones/<int:postulacion_id>', methods=['DELETE'])
+@token_required
+def cancelar_postulacion(current_user, postulacion_id):
+    try:
+        if not delete_application(postulacion_id, current_user.id):
+            return jsonify({"error": "Postulación no encontrada"}), 404
 
         return jsonify({"message": "Postulación cancelada correctamente."}), 200
 
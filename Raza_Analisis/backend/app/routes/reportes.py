@@ -1,53 +1,266 @@
-from flask import Blueprint, Response, request
-from app.models import Enrollment, Application
-from app.db import db
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context, url_for
+from app import jobs
+from app.auth.middleware import admin_required, token_required
+from app.crud import (
+    enrollment_rows,
+    application_rows,
+    enrollment_history_rows,
+    application_history_rows,
+    stream_rows,
+    course_summary_rows,
+    offer_summary_rows,
+    summary_totals,
+    weekly_enrollment_rows,
+    weekly_application_rows,
+)
+from app.pagination import parse_fecha
+from app.ratelimit import concurrency_limit
+from app.replicas import route_reads
 import csv
 import io
-from app.auth.utils import validate_token
 
 reportes_bp = Blueprint("reportes", __name__, url_prefix="/api/reportes")
+route_reads(reportes_bp)  # Las rutas GET leen de las réplicas
 
-def generar_csv(datos, campos):
+FILAS_POR_BLOQUE = 500
+
+def generar_csv(filas, campos):
+    """
+    Genera el CSV por bloques: la cabecera sale de inmediato y luego se envía
+    un bloque cada FILAS_POR_BLOQUE filas leídas de la consulta.
+    """
     buffer = io.StringIO()
-    writer = csv.DictWriter(buffer, fieldnames=campos)
-    writer.writeheader()
-    for row in datos:
-        writer.writerow(row)
+    writer = csv.writer(buffer)
+    writer.writerow(campos)
+    yield buffer.getvalue()
     buffer.seek(0)
-    return buffer.getvalue()
+    buffer.truncate(0)
 
-# Reporte de inscripciones
-@reportes_bp.route("/inscripciones", methods=["GET"])
-def reporte_inscripciones():
-    inscripciones = Enrollment.query.all()
-    datos = [{
-        "Usuario": i.user.username,
-        "Correo": i.user.email,
-        "Curso": i.course.titulo,
-        "Fecha de Inscripción": i.fecha_inscripcion.strftime("%Y-%m-%d")
-    } for i in inscripciones]
-
-    contenido = generar_csv(datos, ["Usuario", "Correo", "Curso", "Fecha de Inscripción"])
+    for n, fila in enumerate(filas, 1):
+        writer.writerow(fila)
+        if n % FILAS_POR_BLOQUE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def formatear_fecha(fecha):
+    return fecha.strftime("%Y-%m-%d") if fecha else ""
+
+def respuesta_csv(filas, campos, nombre_archivo):
     return Response(
-        contenido,
+        stream_with_context(generar_csv(filas, campos)),
         mimetype="text/csv",
-        headers={"Content-Disposition": "attachment;filename=reporte_inscripciones.csv"}
+        headers={"Content-Disposition": f"attachment;filename={nombre_archivo}"}
+    )
+
+CAMPOS_INSCRIPCIONES = ["Usuario", "Correo", "Curso", "Fecha de Inscripción"]
+CAMPOS_POSTULACIONES = ["Usuario", "Correo", "Oferta", "Fecha de Postulación"]
+
+def filas_inscripciones(consulta=None):
+    return (
+        (i.usuario, i.email, i.curso, formatear_fecha(i.fecha_inscripcion))
+        for i in stream_rows(consulta if consulta is not None else enrollment_rows())
     )
 
+def filas_postulaciones(consulta=None):
+    return (
+        (p.usuario, p.email, p.oferta, formatear_fecha(p.fecha_postulacion))
+        for p in stream_rows(consulta if consulta is not None else application_rows())
+    )
+
+def _consulta_historica(historial):
+    """
+    Con ?historico=1 el reporte incluye el historial archivado, opcionalmente
+    acotado con desde/hasta (YYYY-MM-DD). Devuelve None sin ?historico=1.
+    """
+    if request.args.get("historico") != "1":
+        return None
+    desde = parse_fecha(request.args.get("desde"), "desde")
+    hasta = parse_fecha(request.args.get("hasta"), "hasta")
+    return historial(desde, hasta)
+
+# Los mismos reportes en segundo plano; el total sale de los resúmenes
+jobs.register(
+    "inscripciones", ("inscripciones", "cursos"), CAMPOS_INSCRIPCIONES, filas_inscripciones,
+    total=lambda: summary_totals()["inscripciones"],
+)
+jobs.register(
+    "postulaciones", ("postulaciones", "ofertas"), CAMPOS_POSTULACIONES, filas_postulaciones,
+    total=lambda: summary_totals()["postulaciones"],
+)
+
+# Reporte de inscripciones (las exportaciones simultáneas tienen un tope global)
+@reportes_bp.route("/inscripciones", methods=["GET"])
+@concurrency_limit("exportaciones")
+def reporte_inscripciones():
+    try:
+        consulta = _consulta_historica(enrollment_history_rows)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return respuesta_csv(filas_inscripciones(consulta), CAMPOS_INSCRIPCIONES, "reporte_inscripciones.csv")
+
 # Reporte de postulaciones
 @reportes_bp.route("/postulaciones", methods=["GET"])
+@concurrency_limit("exportaciones")
 def reporte_postulaciones():
-    postulaciones = Application.query.all()
-    datos = [{
-        "Usuario": p.user.username,
-        "Correo": p.user.email,
-        "Oferta": p.job_offer.titulo,
-        "Fecha de Postulación": p.fecha_postulacion.strftime("%Y-%m-%d")
-    } for p in postulaciones]
-
-    contenido = generar_csv(datos, ["Usuario", "Correo", "Oferta", "Fecha de Postulación"])
-    return Response(
-        contenido,
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment;filename=reporte_postulaciones.csv"}
-    )
+    try:
+        consulta = _consulta_historica(application_history_rows)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return respuesta_csv(filas_postulaciones(consulta), CAMPOS_POSTULACIONES, "reporte_postulaciones.csv")
+
+# ------------------------- REPORTES EN SEGUNDO PLANO -------------------------
+def _estado_job(estado):
+    datos = {
+        "id": estado["id"],
+        "tipo": estado["tipo"],
+        "estado": estado["estado"],
+        "filas": estado["filas"],
+        "total": estado["total"],
+        "progreso": round(min(estado["filas"] / estado["total"], 1), 4) if estado["total"] else None,
+        "estado_url": url_for("reportes.estado_reporte", job_id=estado["id"]),
+    }
+    if estado["estado"] == "listo":
+        datos["progreso"] = 1
+        datos["descarga_url"] = url_for("reportes.descargar_reporte", job_id=estado["id"])
+    if estado["estado"] == "error":
+        datos["error"] = estado.get("error")
+    return datos
+
+# Los reportes en segundo plano incluyen correos de usuarios: solo
+# administradores, también para consultar el estado y descargar.
+
+# Encolar un reporte (o reutilizar el que ya se está generando / ya generado)
+@reportes_bp.route("/<tipo>/jobs", methods=["POST"])
+@token_required
+@admin_required
+def encolar_reporte(current_user, tipo):
+    if tipo not in jobs.tipos():
+        return jsonify({"error": "Tipo de reporte no encontrado"}), 404
+    try:
+        estado = jobs.submit(tipo)
+    except jobs.ColaLlena as e:
+        return jsonify({"error": str(e)}), 503
+
+    datos = _estado_job(estado)
+    codigo = 200 if estado["estado"] == "listo" else 202
+    return jsonify(datos), codigo, {"Location": datos["estado_url"]}
+
+# Estado y progreso de un reporte
+@reportes_bp.route("/jobs/<job_id>", methods=["GET"])
+@token_required
+@admin_required
+def estado_reporte(current_user, job_id):
+    estado = jobs.status(job_id)
+    if estado is None:
+        return jsonify({"error": "Reporte no encontrado"}), 404
+    return jsonify(_estado_job(estado)), 200
+
+# Descargar el CSV terminado (el servidor lo envía con sendfile)
+@reportes_bp.route("/jobs/<job_id>/archivo", methods=["GET"])
+@token_required
+@admin_required
+def descargar_reporte(current_user, job_id):
+    ruta = jobs.result_path(job_id)
+    if ruta is None:
+        return jsonify({"error": "El reporte no existe o aún no está listo"}), 404
+
+    tipo = jobs.status(job_id)["tipo"]
+    if "gzip" in request.accept_encodings:
+        # Se envía el gzip tal cual: el navegador lo descomprime y guarda el .csv
+        response = send_file(
+            ruta, mimetype="text/csv", as_attachment=True,
+            download_name=f"reporte_{tipo}.csv", conditional=True,
+        )
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = send_file(
+            ruta, mimetype="application/gzip", as_attachment=True,
+            download_name=f"reporte_{tipo}.csv.gz", conditional=True,
+        )
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+# ------------------------- RESÚMENES (PANEL DE ADMINISTRACIÓN) -------------------------
+# Leen los contadores mantenidos por crud.py: no recorren enrollment ni application.
+
+# Totales generales
+@reportes_bp.route("/resumen", methods=["GET"])
+def resumen_general():
+    try:
+        totales = summary_totals()
+        totales["ocupacion"] = round(totales["inscripciones"] / totales["cupos"], 4) if totales["cupos"] else 0.0
+        return jsonify(totales), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Inscritos y ocupación (inscritos / cupo_maximo) por curso; ?estado=activo|inactivo
+@reportes_bp.route("/resumen/cursos", methods=["GET"])
+def resumen_cursos():
+    try:
+        cursos = course_summary_rows(request.args.get("estado")).all()
+    except ValueError:
+        return jsonify({"error": "Estado inválido"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify([
+        {
+            "id": c.id,
+            "titulo": c.titulo,
+            "estado": c.estado.value,
+            "fecha_inicio": formatear_fecha(c.fecha_inicio),
+            "cupo_maximo": c.cupo_maximo,
+            "inscritos": c.inscritos,
+            "ocupacion": round(c.inscritos / c.cupo_maximo, 4) if c.cupo_maximo else 0.0,
+        }
+        for c in cursos
+    ]), 200
+
+# Postulaciones por oferta
+@reportes_bp.route("/resumen/ofertas", methods=["GET"])
+def resumen_ofertas():
+    try:
+        ofertas = offer_summary_rows().all()
+        return jsonify([
+            {
+                "id": o.id,
+                "titulo": o.titulo,
+                "fecha_publicacion": formatear_fecha(o.fecha_publicacion),
+                "postulaciones": o.total_postulaciones,
+            }
+            for o in ofertas
+        ]), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _resumen_semanal(consulta, id_parametro, columna):
+    try:
+        desde = parse_fecha(request.args.get("desde"), "desde")
+        hasta = parse_fecha(request.args.get("hasta"), "hasta")
+        filtro = request.args.get(id_parametro, type=int)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        filas = consulta(filtro, desde, hasta).all()
+        return jsonify([
+            {"semana": formatear_fecha(f.semana), columna: int(getattr(f, columna))}
+            for f in filas
+        ]), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Inscripciones vigentes por semana de inscripción; ?curso_id=&desde=&hasta=
+@reportes_bp.route("/resumen/inscripciones-semanales", methods=["GET"])
+def resumen_inscripciones_semanales():
+    return _resumen_semanal(weekly_enrollment_rows, "curso_id", "inscripciones")
+
+# Postulaciones vigentes por semana de postulación; ?oferta_id=&desde=&hasta=
+@reportes_bp.route("/resumen/postulaciones-semanales", methods=["GET"])
+def resumen_postulaciones_semanales():
+    return _resumen_semanal(weekly_application_rows, "oferta_id", "postulaciones")
@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from app import outbox, replicas
+from app.db import db
+from app.pool import pool_snapshot
+
+sistema_bp = Blueprint("sistema", __name__, url_prefix="/api/sistema")
+
+# Estado y contadores del pool de conexiones de este proceso
+@sistema_bp.route("/pool", methods=["GET"])
+def estado_pool():
+    return jsonify(pool_snapshot(db.engine)), 200
+
+# Eventos del outbox por estado (pendiente, procesado, fallido)
+@sistema_bp.route("/outbox", methods=["GET"])
+def estado_outbox():
+    return jsonify(outbox.counts()), 200
+
+# Salud y retraso de las réplicas de lectura configuradas
+@sistema_bp.route("/replicas", methods=["GET"])
+def estado_replicas():
+    return jsonify(replicas.status()), 200
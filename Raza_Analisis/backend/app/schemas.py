@@ -1,47 +1,143 @@
-from pydantic import BaseModel, EmailStr
+from datetime import date
 from enum import Enum as PyEnum
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
+
+from app.models import EstadoCapacitacion
 
 class RoleEnum(str, PyEnum):
     admin = "admin"
     usuario = "usuario"
 
+# ------------------------- ENTRADA -------------------------
 class UserCreate(BaseModel):
-    username: str
+    username: str = Field(min_length=1, max_length=100)
     email: EmailStr
-    password: str
+    password: str = Field(min_length=1)
+    confirm_password: Optional[str] = None
+    role: RoleEnum = RoleEnum.usuario
 
 class UserLogin(BaseModel):
     username: str
     password: str
 
+class CourseCreate(BaseModel):
+    titulo: str = Field(min_length=1, max_length=150)
+    descripcion: str
+    duracion_horas: int = Field(ge=0)
+    fecha_inicio: date
+    fecha_fin: date
+    instructor: str = Field(min_length=1, max_length=255)
+    cupo_maximo: int = Field(ge=0)
+    estado: EstadoCapacitacion = EstadoCapacitacion.activo
+
+    @model_validator(mode="after")
+    def fechas_en_orden(self):
+        if self.fecha_fin < self.fecha_inicio:
+            raise ValueError("La fecha de fin es anterior a la fecha de inicio")
+        return self
+
+class JobOfferCreate(BaseModel):
+    titulo: str = Field(min_length=1, max_length=150)
+    descripcion: str = Field(min_length=1)
+    requisitos: Optional[str] = None
+
+# Edición parcial (PUT): solo se aplican los campos enviados. Los que no
+# admiten null tienen el tipo sin Optional, así un null explícito es inválido.
+class CourseUpdate(BaseModel):
+    titulo: str = Field(None, min_length=1, max_length=150)
+    descripcion: Optional[str] = None
+    duracion_horas: int = Field(None, ge=0)
+    fecha_inicio: date = None
+    fecha_fin: date = None
+    instructor: str = Field(None, min_length=1, max_length=255)
+    cupo_maximo: int = Field(None, ge=0)
+    estado: EstadoCapacitacion = None
+
+class JobOfferUpdate(BaseModel):
+    titulo: str = Field(None, min_length=1, max_length=150)
+    descripcion: str = Field(None, min_length=1)
+    requisitos: Optional[str] = None
+    fecha_publicacion: date = None
+
+# Carga masiva: la fecha de publicación puede venir en el lote
+class JobOfferImport(JobOfferCreate):
+    fecha_publicacion: date = Field(default_factory=date.today)
+
+class EnrollmentCreate(BaseModel):
+    curso_id: int
+
+class ApplicationCreate(BaseModel):
+    idOferta: int
+
+# ------------------------- SALIDA -------------------------
+# El orden y los nombres de los campos definen la respuesta JSON; los
+# serializadores de app/serializers.py se construyen a partir de estos modelos.
 class UserOut(BaseModel):
     id: int
     username: str
     email: EmailStr
     role: RoleEnum
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
-class CourseCreate(BaseModel):
+class CourseOut(BaseModel):
+    id: int
     titulo: str
-    descripcion: str
+    descripcion: Optional[str]
     duracion_horas: int
-    fecha_inicio: str
-    fecha_fin: str
+    fecha_inicio: date
+    fecha_fin: date
     instructor: str
     cupo_maximo: int
-    estado: str
+    # Sin los inscritos: cambian con cada inscripción y se piden aparte
+    # (GET /api/cursos/inscritos) para no invalidar la caché del catálogo
+    estado: EstadoCapacitacion
 
-class EnrollmentCreate(BaseModel):
-    user_id: int
-    course_id: int
+    model_config = ConfigDict(from_attributes=True)
+
+class JobOfferOut(BaseModel):
+    id: int
+    titulo: str
+    descripcion: str
+    requisitos: Optional[str]
+    fecha_publicacion: date
+
+    model_config = ConfigDict(from_attributes=True)
 
 class EnrollmentOut(BaseModel):
     id: int
     usuario: str
+    email: str
     curso: str
+    fecha_inscripcion: date
+
+    model_config = ConfigDict(from_attributes=True)
+
+class UserEnrollmentOut(BaseModel):
+    id: int
+    curso_id: int
+    titulo: str
+    descripcion: Optional[str]
+    fecha_inicio: date
+    fecha_fin: date
     fecha_inscripcion: str
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ApplicationOut(BaseModel):
+    nombre_usuario: str
+    correo: str
+    oferta: str
+    fecha: date
+
+    model_config = ConfigDict(from_attributes=True)
+
+class UserApplicationOut(BaseModel):
+    id_postulacion: int
+    titulo: str
+    descripcion: str
+    fecha_postulacion: date
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,209 @@
+# app/search.py
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from sqlalchemy import func
+
+from app.db import db
+from app.models import Course, JobOffer, documento_busqueda
+from app.cache import current_version, publish_version
+
+# Campos indexados por recurso y su peso en el ranking (el título pesa más)
+CAMPOS = {
+    "cursos": (Course, {"titulo": 3, "descripcion": 1, "instructor": 2}),
+    "ofertas": (JobOffer, {"titulo": 3, "descripcion": 1, "requisitos": 1}),
+}
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los",
+    "o", "para", "por", "que", "se", "su", "sus", "u", "un", "una", "y",
+}
+
+_PALABRA = re.compile(r"\w+")
+
+
+def _stem(palabra):
+    # Stemming ligero para español: quita el plural y la vocal final
+    # (farmacias / farmacia -> farmaci, técnicos / técnica -> tecnic)
+    if len(palabra) > 4 and palabra.endswith("es"):
+        palabra = palabra[:-2]
+    elif len(palabra) > 3 and palabra.endswith("s"):
+        palabra = palabra[:-1]
+    if len(palabra) > 3 and palabra[-1] in "aeo":
+        palabra = palabra[:-1]
+    return palabra
+
+
+def tokenize(texto):
+    if not texto:
+        return []
+    sin_acentos = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode()
+    return [_stem(p) for p in _PALABRA.findall(sin_acentos) if p not in STOPWORDS]
+
+
+class InvertedIndex:
+    """
+    Índice invertido en memoria con ranking BM25. Se usa cuando la base no
+    es PostgreSQL; se construye desde los modelos la primera vez y luego se
+    actualiza documento por documento.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, campos):
+        self.campos = campos
+        self.version = None
+        self.lock = threading.RLock()
+        self._postings = defaultdict(dict)  # término -> {doc_id: frecuencia ponderada}
+        self._docs = {}  # doc_id -> (longitud, términos)
+        self._total = 0
+
+    def clear(self):
+        with self.lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._total = 0
+
+    def add(self, doc_id, valores):
+        frecuencias = Counter()
+        for campo, peso in self.campos.items():
+            for termino in tokenize(valores.get(campo)):
+                frecuencias[termino] += peso
+        longitud = sum(frecuencias.values())
+
+        with self.lock:
+            self.remove(doc_id)
+            for termino, frecuencia in frecuencias.items():
+                self._postings[termino][doc_id] = frecuencia
+            self._docs[doc_id] = (longitud, tuple(frecuencias))
+            self._total += longitud
+
+    def remove(self, doc_id):
+        with self.lock:
+            doc = self._docs.pop(doc_id, None)
+            if doc is None:
+                return
+            longitud, terminos = doc
+            self._total -= longitud
+            for termino in terminos:
+                docs = self._postings.get(termino)
+                if docs is not None:
+                    docs.pop(doc_id, None)
+                    if not docs:
+                        del self._postings[termino]
+
+    def search(self, texto, limit):
+        terminos = set(tokenize(texto))
+        with self.lock:
+            n = len(self._docs)
+            if not n or not terminos:
+                return []
+            promedio = self._total / n or 1
+            puntajes = defaultdict(float)
+            for termino in terminos:
+                docs = self._postings.get(termino)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, frecuencia in docs.items():
+                    longitud = self._docs[doc_id][0]
+                    norma = self.K1 * (1 - self.B + self.B * longitud / promedio)
+                    puntajes[doc_id] += idf * frecuencia * (self.K1 + 1) / (frecuencia + norma)
+        return heapq.nlargest(limit, puntajes.items(), key=lambda item: (item[1], -item[0]))
+
+
+_indices = {recurso: InvertedIndex(campos) for recurso, (_, campos) in CAMPOS.items()}
+
+
+def _usa_postgres():
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def _version_key(recurso):
+    return f"busqueda-{recurso}"
+
+
+def _indice_actualizado(recurso):
+    """
+    Devuelve el índice del recurso, reconstruyéndolo desde la base si nunca
+    se construyó o si otro proceso modificó el catálogo.
+    """
+    indice = _indices[recurso]
+    version = current_version(_version_key(recurso))
+    with indice.lock:
+        if indice.version != version:
+            modelo, campos = CAMPOS[recurso]
+            columnas = [modelo.id] + [getattr(modelo, campo) for campo in campos]
+            indice.clear()
+            activos = db.session.query(*columnas).filter(modelo.eliminado_en.is_(None))
+            for fila in activos.yield_per(1000):
+                indice.add(fila.id, fila._mapping)
+            indice.version = version
+    return indice
+
+
+def index_document(recurso, obj):
+    """
+    Actualiza el índice en memoria tras crear o editar un curso u oferta.
+    """
+    if _usa_postgres():
+        return
+    indice = _indices[recurso]
+    with indice.lock:
+        vigente = indice.version == current_version(_version_key(recurso))
+        version = publish_version(_version_key(recurso))
+        if vigente:
+            indice.add(obj.id, {campo: getattr(obj, campo) for campo in indice.campos})
+            indice.version = version
+
+
+def remove_document(recurso, doc_id):
+    if _usa_postgres():
+        return
+    indice = _indices[recurso]
+    with indice.lock:
+        vigente = indice.version == current_version(_version_key(recurso))
+        version = publish_version(_version_key(recurso))
+        if vigente:
+            indice.remove(doc_id)
+            indice.version = version
+
+
+def mark_stale(recurso):
+    """
+    Tras una carga masiva: el índice se reconstruye en la próxima búsqueda.
+    """
+    if not _usa_postgres():
+        publish_version(_version_key(recurso))
+
+
+def search(recurso, texto, limit=20):
+    """
+    Devuelve [(entidad, puntaje)] ordenados por relevancia.
+    """
+    modelo, campos = CAMPOS[recurso]
+
+    if _usa_postgres():
+        documento = documento_busqueda(*(getattr(modelo, campo) for campo in campos))
+        consulta = func.plainto_tsquery(db.literal_column("'spanish'"), texto)
+        puntaje = func.ts_rank(documento, consulta)
+        filas = (
+            db.session.query(modelo, puntaje.label("puntaje"))
+            .filter(documento.op("@@")(consulta), modelo.eliminado_en.is_(None))
+            .order_by(puntaje.desc(), modelo.id)
+            .limit(limit)
+            .all()
+        )
+        return [(fila[0], float(fila.puntaje)) for fila in filas]
+
+    resultados = _indice_actualizado(recurso).search(texto, limit)
+    if not resultados:
+        return []
+    ids = [doc_id for doc_id, _ in resultados]
+    por_id = {obj.id: obj for obj in modelo.query.filter(modelo.id.in_(ids), modelo.eliminado_en.is_(None))}
+    return [(por_id[doc_id], puntaje) for doc_id, puntaje in resultados if doc_id in por_id]
@@ -0,0 +1,163 @@
+# app/serializers.py
+"""
+Serialización JSON de las respuestas. Cada recurso tiene un serializador
+construido a partir de su modelo de salida en schemas.py: los campos se leen
+de entidades ORM o de filas de proyecciones con un único attrgetter y el
+JSON se codifica con orjson (fechas y enums nativos, sin strftime por fila).
+Sin orjson instalado se usa el módulo json de la biblioteca estándar.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from operator import attrgetter
+
+from flask.json.provider import DefaultJSONProvider
+from pydantic import ValidationError
+
+from app import schemas
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if orjson is None:
+        if isinstance(obj, (date, datetime)):
+            return obj.isoformat()
+        if isinstance(obj, Enum):
+            return obj.value
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def dumps(obj):
+    """
+    Codifica `obj` como JSON (bytes).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de la aplicación: jsonify() y request.get_json() pasan por
+    dumps()/loads() de este módulo.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+# ------------------------- SERIALIZADORES -------------------------
+def solo_fecha(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def fecha_hora(valor):
+    return valor.strftime("%Y-%m-%d %H:%M") if valor else None
+
+
+class Serializer:
+    """
+    Convierte objetos (entidades o filas) en dicts con los campos del modelo
+    de salida. `fuentes` renombra campos (campo -> atributo) y `conversiones`
+    transforma valores (campo -> función).
+    """
+
+    def __init__(self, schema, fuentes=None, conversiones=None):
+        fuentes = fuentes or {}
+        self.campos = tuple(schema.model_fields)
+        atributos = [fuentes.get(campo, campo) for campo in self.campos]
+        getter = attrgetter(*atributos)
+        self._leer = getter if len(atributos) > 1 else (lambda obj: (getter(obj),))
+        self._conversiones = [
+            (i, conversiones[campo]) for i, campo in enumerate(self.campos) if campo in (conversiones or {})
+        ]
+
+    def one(self, obj):
+        valores = self._leer(obj)
+        if self._conversiones:
+            valores = list(valores)
+            for i, convertir in self._conversiones:
+                valores[i] = convertir(valores[i])
+        return dict(zip(self.campos, valores))
+
+    def many(self, objs):
+        if not self._conversiones:
+            campos, leer = self.campos, self._leer
+            return [dict(zip(campos, leer(obj))) for obj in objs]
+        return [self.one(obj) for obj in objs]
+
+
+_registro = {}
+
+
+def register(nombre, schema, fuentes=None, conversiones=None):
+    _registro[nombre] = Serializer(schema, fuentes, conversiones)
+
+
+def serialize(nombre, obj):
+    return _registro[nombre].one(obj)
+
+
+def serialize_many(nombre, objs):
+    return _registro[nombre].many(objs)
+
+
+register("usuario", schemas.UserOut)
+register("curso", schemas.CourseOut)
+register("oferta", schemas.JobOfferOut)
+register("inscripcion", schemas.EnrollmentOut, conversiones={"fecha_inscripcion": solo_fecha})
+register("inscripcion_usuario", schemas.UserEnrollmentOut, conversiones={"fecha_inscripcion": fecha_hora})
+register(
+    "postulacion", schemas.ApplicationOut,
+    fuentes={"nombre_usuario": "usuario", "correo": "email", "fecha": "fecha_postulacion"},
+    conversiones={"fecha": solo_fecha},
+)
+register(
+    "postulacion_usuario", schemas.UserApplicationOut,
+    fuentes={"id_postulacion": "id"},
+    conversiones={"fecha_postulacion": solo_fecha},
+)
+
+
+# ------------------------- VALIDACIÓN DE ENTRADA -------------------------
+def validate(schema, data):
+    """
+    Valida el cuerpo de la petición con un modelo de schemas.py. Lanza
+    ValueError con un mensaje para el cliente si no es válido.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Se esperaba un objeto JSON")
+    try:
+        return schema.model_validate(data)
+    except ValidationError as e:
+        error = e.errors()[0]
+        campo = ".".join(str(parte) for parte in error["loc"])
+        if not campo:
+            # Regla entre campos (model_validator): el mensaje ya es para el cliente
+            causa = error.get("ctx", {}).get("error")
+            raise ValueError(str(causa) if causa is not None else error["msg"])
+        if error["type"] == "missing":
+            raise ValueError(f"El campo '{campo}' es obligatorio")
+        raise ValueError(f"El campo '{campo}' no es válido: {error['msg']}")
@@ -0,0 +1,179 @@
+# app/sync.py
+"""
+Sincronización incremental de listados (?since=<token>). Cada fila de
+course, job_offer, enrollment y application guarda en actualizado_en el
+momento de su último cambio y los listados avanzan por (actualizado_en, id).
+No hay contadores compartidos: dos cambios en filas distintas no se esperan
+entre sí.
+
+actualizado_en se fija antes del commit, así que un cambio puede hacerse
+visible con un momento anterior a otro ya entregado. Por eso el token final
+de una sincronización es el corte (ahora - SYNC_MARGEN_SEGUNDOS, tomado
+antes de leer la primera página): lo anterior al corte ya está confirmado
+mientras ninguna transacción dure más que el margen ni los relojes de los
+servidores difieran más que eso (en las réplicas también debe cubrir
+DB_REPLICA_MAX_LAG_SECONDS). Las filas posteriores al corte se entregan
+igual y se repiten en la sincronización siguiente; el cliente las reemplaza
+por id.
+
+Las bajas dejan rastro: los cursos y ofertas con borrado lógico conservan su
+fila (con actualizado_en nuevo) y las inscripciones y postulaciones
+canceladas o archivadas dejan una lápida en sync_tombstone. `flask archive`
+borra las lápidas de más de SYNC_TOMBSTONE_DAYS días y anota hasta cuándo en
+sync_purga; un cliente con un token anterior recibe el listado completo.
+"""
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.db import db, transaction
+from app.models import Application, Course, Enrollment, JobOffer, SyncPurge, SyncTombstone
+
+SYNC_TOMBSTONE_DAYS = int(os.environ.get("SYNC_TOMBSTONE_DAYS", 30))
+SYNC_MARGEN_SEGUNDOS = float(os.environ.get("SYNC_MARGEN_SEGUNDOS", 30))
+
+RECURSOS = {
+    "cursos": Course,
+    "ofertas": JobOffer,
+    "inscripciones": Enrollment,
+    "postulaciones": Application,
+}
+
+
+# ------------------------- CAMBIOS -------------------------
+def touch(recurso, ids):
+    """
+    Marca como cambiadas las filas `ids` del recurso (actualizado_en = ahora).
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    modelo = RECURSOS[recurso]
+    db.session.execute(
+        update(modelo).where(modelo.id.in_(ids)).values(actualizado_en=datetime.utcnow())
+    )
+
+
+def stamp_rows(filas):
+    """
+    Fija actualizado_en en las filas (dicts) de una carga masiva: COPY no
+    aplica los valores por defecto del modelo.
+    """
+    ahora = datetime.utcnow()
+    for fila in filas:
+        fila["actualizado_en"] = ahora
+    return filas
+
+
+def bury(recurso, filas):
+    """
+    Registra la baja de las filas [(id, user_id)] del recurso (inscripciones
+    o postulaciones) para los listados por usuario.
+    """
+    if not filas:
+        return
+    ahora = datetime.utcnow()
+    db.session.execute(insert(SyncTombstone), [
+        {"recurso": recurso, "entidad_id": id_, "user_id": user_id, "eliminado_en": ahora}
+        for id_, user_id in filas
+    ])
+
+
+# ------------------------- LECTURA -------------------------
+def cutoff():
+    """
+    Momento hasta el que todos los cambios ya están confirmados.
+    """
+    return datetime.utcnow() - timedelta(seconds=SYNC_MARGEN_SEGUNDOS)
+
+
+def resolve_since(since, *recursos):
+    """
+    Devuelve (desde, corte). `desde` es la clave (momento, id) desde la que
+    buscar cambios, o None cuando el cliente necesita el listado completo:
+    no tiene token, el token es anterior a la última purga de alguno de los
+    recursos o es futuro (por ejemplo, tras restaurar la base). `corte` es
+    el de la primera página si el token continúa una paginación; si no, el
+    actual, sin retroceder respecto del token (relojes desfasados entre
+    workers). Se llama antes de leer las filas.
+    """
+    corte = cutoff()
+    if since is None or since[0] > datetime.utcnow():
+        return None, corte
+    purgado = db.session.execute(
+        select(func.max(SyncPurge.purgado_hasta)).where(SyncPurge.recurso.in_(recursos))
+    ).scalar()
+    if purgado is not None and since[0] < purgado:
+        return None, corte
+    momento, ultimo_id, corte_inicial = since
+    return (momento, ultimo_id), corte_inicial or max(corte, momento)
+
+
+def next_since(corte, filas=(), mas=False):
+    """
+    Token (momento, id, corte) para la consulta siguiente. Con más páginas
+    se sigue desde la última fila entregada y se conserva el corte; al
+    terminar, la próxima sincronización empieza en el corte.
+    """
+    if mas:
+        return filas[-1].actualizado_en, filas[-1].id, corte
+    return corte, 0, None
+
+
+def tombstones(recurso, user_id, desde):
+    """
+    Ids del recurso dados de baja para el usuario desde el momento `desde`.
+    """
+    return db.session.scalars(
+        select(SyncTombstone.entidad_id).where(
+            SyncTombstone.recurso == recurso,
+            SyncTombstone.user_id == user_id,
+            SyncTombstone.eliminado_en >= desde,
+        ).order_by(SyncTombstone.eliminado_en)
+    ).all()
+
+
+# ------------------------- MANTENIMIENTO -------------------------
+def _marcar_purga(conn, recursos, hasta):
+    for recurso in recursos:
+        actual = conn.execute(
+            select(SyncPurge.purgado_hasta).where(SyncPurge.recurso == recurso)
+        ).scalar()
+        if actual is None:
+            conn.execute(insert(SyncPurge).values(recurso=recurso, purgado_hasta=hasta))
+        elif actual < hasta:
+            conn.execute(
+                update(SyncPurge).where(SyncPurge.recurso == recurso).values(purgado_hasta=hasta)
+            )
+
+
+def purge_tombstones(dias=SYNC_TOMBSTONE_DAYS):
+    """
+    Borra las lápidas de más de `dias` días y adelanta purgado_hasta.
+    Devuelve la cantidad borrada.
+    """
+    limite = datetime.utcnow() - timedelta(days=dias)
+    total = 0
+    with transaction():
+        recursos = db.session.scalars(
+            select(SyncTombstone.recurso).where(SyncTombstone.eliminado_en < limite).distinct()
+        ).all()
+        for recurso in recursos:
+            total += db.session.execute(
+                delete(SyncTombstone)
+                .where(SyncTombstone.recurso == recurso, SyncTombstone.eliminado_en < limite)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        _marcar_purga(db.session, recursos, limite)
+    return total
+
+
+def require_full_sync(conn):
+    """
+    Obliga a todos los clientes a pedir el listado completo en su próxima
+    consulta. Lo usan las cargas de datos fuera de crud.py. Recibe una
+    conexión o la sesión; no hace commit.
+    """
+    # Los tokens entregados antes de ahora no pasan del corte actual
+    _marcar_purga(conn, RECURSOS, cutoff())
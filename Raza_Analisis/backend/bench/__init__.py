@@ -0,0 +1,34 @@
+# bench/__init__.py
+"""
+Herramientas de medición (se ejecutan desde backend/ con python -m):
+
+    bench.seed             carga datos sintéticos con volúmenes configurables
+    bench.load             tráfico mixto contra la API y reporte de latencias
+    bench.compare          compara dos resultados guardados de bench.load
+    bench.seat_stress      concurrencia en la reserva de cupos
+    bench.login_throughput costo del hash de contraseñas
+"""
+import os
+import subprocess
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def commit_actual():
+    """
+    Hash del commit del árbol actual (con "-dirty" si hay cambios sin guardar).
+    """
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"], cwd=raiz, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        cambios = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=raiz, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+    return f"{commit}-dirty" if cambios else commit
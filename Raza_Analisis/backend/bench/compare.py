@@ -0,0 +1,51 @@
+# bench/compare.py
+"""
+Compara dos resultados de bench.load (por ejemplo, antes y después de un
+cambio) operación por operación.
+
+Uso (desde backend/):
+    python -m bench.compare bench/resultados/ANTES.json bench/resultados/DESPUES.json
+"""
+import argparse
+import json
+
+
+def _cambio(antes, despues):
+    if not antes:
+        return "     -"
+    return f"{(despues - antes) / antes * 100:+6.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("antes")
+    parser.add_argument("despues")
+    args = parser.parse_args(argv)
+
+    with open(args.antes, encoding="utf-8") as f:
+        antes = json.load(f)
+    with open(args.despues, encoding="utf-8") as f:
+        despues = json.load(f)
+
+    print(f"{antes['commit']} -> {despues['commit']}")
+    print(f"{'operación':<22} {'req/s':>16} {'p50':>16} {'p95':>16} {'p99':>16}")
+    filas = sorted(set(antes["operaciones"]) & set(despues["operaciones"]))
+    for nombre in filas + ["TOTAL"]:
+        a = antes["total"] if nombre == "TOTAL" else antes["operaciones"][nombre]
+        d = despues["total"] if nombre == "TOTAL" else despues["operaciones"][nombre]
+        columnas = [
+            f"{d[clave]:>8.1f} {_cambio(a[clave], d[clave])}"
+            for clave in ("por_segundo", "p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{nombre:<22} " + " ".join(columnas))
+
+    print("\nConsultas SQL por petición:")
+    consultas_a, consultas_d = antes["consultas_por_peticion"], despues["consultas_por_peticion"]
+    for endpoint in sorted(set(consultas_a) | set(consultas_d)):
+        a, d = consultas_a.get(endpoint), consultas_d.get(endpoint)
+        marca = "  <-- más consultas" if a is not None and d is not None and d > a else ""
+        print(f"  {endpoint:<45} {a if a is not None else '-':>6} -> {d if d is not None else '-':>6}{marca}")
+
+
+if __name__ == "__main__":
+    main()
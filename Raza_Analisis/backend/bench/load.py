@@ -0,0 +1,307 @@
+# bench/load.py
+"""
+Tráfico mixto contra la API: cada usuario virtual inicia sesión y luego
+recorre catálogos, busca, se inscribe, postula, cancela y descarga algún
+reporte según los pesos de MEZCLA. Reporta p50/p95/p99, throughput y
+consultas SQL por petición (tomadas de /metrics) y guarda el resultado en
+JSON junto con el commit, para comparar corridas con bench.compare.
+
+Uso (desde backend/, después de bench.seed sobre la misma base):
+    python -m bench.load --db sqlite:///bench.db --duracion 30 --concurrencia 8
+    python -m bench.load --db postgresql://... --url http://localhost:5000
+Sin --url se usa el test client de Flask en este mismo proceso. Con --url el
+servidor debe correr con RATE_LIMIT_ENABLED=0 (todo el tráfico sale de una IP).
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from sqlalchemy import select
+
+from app.app import create_app
+from app.db import db
+from app.models import User, Course, JobOffer
+from bench import commit_actual, percentil
+from bench.seed import CLAVE, PALABRAS
+
+RESULTADOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# Operación -> peso relativo
+MEZCLA = {
+    "cursos_listado": 22,
+    "curso_detalle": 14,
+    "ofertas_listado": 18,
+    "oferta_detalle": 10,
+    "busqueda": 8,
+    "inscribir": 6,
+    "mis_inscripciones": 5,
+    "cancelar_inscripcion": 4,
+    "postular": 4,
+    "mis_postulaciones": 4,
+    "login": 3,
+    "reporte": 2,
+}
+
+
+class ClienteFlask:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, metodo, ruta, cuerpo=None, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        respuesta = self.client.open(ruta, method=metodo, json=cuerpo, headers=headers)
+        try:
+            return respuesta.status_code, respuesta.get_data()
+        finally:
+            respuesta.close()
+
+
+class ClienteHTTP:
+    """
+    Una conexión keep-alive por usuario virtual.
+    """
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.host, self.port = partes.hostname, partes.port or 80
+        self.conexion = None
+
+    def request(self, metodo, ruta, cuerpo=None, token=None):
+        headers = {"Content-Type": "application/json"} if cuerpo is not None else {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        datos = json.dumps(cuerpo) if cuerpo is not None else None
+        for intento in (1, 2):
+            if self.conexion is None:
+                self.conexion = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.conexion.request(metodo, ruta, body=datos, headers=headers)
+                respuesta = self.conexion.getresponse()
+                return respuesta.status, respuesta.read()
+            except (http.client.HTTPException, OSError):
+                # El servidor cerró la conexión keep-alive: se reintenta una vez
+                self.conexion.close()
+                self.conexion = None
+                if intento == 2:
+                    raise
+
+
+class UsuarioVirtual:
+    def __init__(self, cliente, username, datos, rng):
+        self.cliente = cliente
+        self.username = username
+        self.datos = datos
+        self.rng = rng
+        self.token = None
+        self.inscripciones = []
+        self.postulaciones = []
+
+    def _json(self, metodo, ruta, cuerpo=None):
+        status, cuerpo_respuesta = self.cliente.request(metodo, ruta, cuerpo, self.token)
+        try:
+            return status, json.loads(cuerpo_respuesta or b"null")
+        except ValueError:
+            return status, None
+
+    def login(self):
+        status, datos = self._json("POST", "/api/auth/login", {"username": self.username, "password": CLAVE})
+        if status == 200:
+            self.token = datos["access_token"]
+        return status
+
+    def cursos_listado(self):
+        status, datos = self._json("GET", "/api/cursos?limit=20")
+        if status == 200 and datos["siguiente"] and self.rng.random() < 0.3:
+            status, _ = self._json("GET", f"/api/cursos?limit=20&after={datos['siguiente']}")
+        return status
+
+    def curso_detalle(self):
+        return self._json("GET", f"/api/cursos/{self.rng.choice(self.datos['cursos'])}")[0]
+
+    def ofertas_listado(self):
+        return self._json("GET", "/api/ofertas?limit=20")[0]
+
+    def oferta_detalle(self):
+        return self._json("GET", f"/api/ofertas/{self.rng.choice(self.datos['ofertas'])}")[0]
+
+    def busqueda(self):
+        tipo = self.rng.choice(["cursos", "ofertas"])
+        return self._json("GET", f"/api/busqueda?q={self.rng.choice(PALABRAS)}&tipo={tipo}")[0]
+
+    def inscribir(self):
+        return self._json("POST", "/api/inscripciones", {"curso_id": self.rng.choice(self.datos["cursos"])})[0]
+
+    def mis_inscripciones(self):
+        status, datos = self._json("GET", "/api/inscripciones/usuario")
+        if status == 200:
+            self.inscripciones = [i["id"] for i in datos]
+        return status
+
+    def cancelar_inscripcion(self):
+        if not self.inscripciones:
+            return self.mis_inscripciones()
+        return self._json("DELETE", f"/api/inscripciones/{self.inscripciones.pop()}")[0]
+
+    def postular(self):
+        return self._json("POST", "/api/ofertas/postular", {"idOferta": self.rng.choice(self.datos["ofertas"])})[0]
+
+    def mis_postulaciones(self):
+        status, datos = self._json("GET", "/api/ofertas/mis-postulaciones")
+        if status == 200:
+            self.postulaciones = [p["id_postulacion"] for p in datos["postulaciones"]]
+        return status
+
+    def reporte(self):
+        ruta = self.rng.choice(["/api/reportes/inscripciones", "/api/reportes/postulaciones"])
+        return self.cliente.request("GET", ruta, token=self.token)[0]
+
+
+# Códigos esperados aunque no sean 2xx (duplicados, cupo lleno, ya cancelada)
+ESPERADOS = {409, 404}
+
+_METRICA = re.compile(r'^farmacia_db_queries_per_request_(sum|count)\{blueprint="[^"]*",endpoint="([^"]*)"\} (\S+)$')
+
+
+def consultas_por_endpoint(cliente):
+    status, cuerpo = cliente.request("GET", "/metrics")
+    totales = defaultdict(lambda: [0.0, 0.0])
+    if status != 200:
+        return totales
+    for linea in cuerpo.decode().splitlines():
+        coincide = _METRICA.match(linea)
+        if coincide:
+            tipo, endpoint, valor = coincide.groups()
+            totales[endpoint][0 if tipo == "sum" else 1] += float(valor)
+    return totales
+
+
+def _cargar_datos(app):
+    with app.app_context():
+        datos = {
+            "usuarios": list(db.session.scalars(
+                select(User.username).where(User.username.like("bench%")).limit(10000)
+            )),
+            "cursos": list(db.session.scalars(select(Course.id))),
+            "ofertas": list(db.session.scalars(select(JobOffer.id))),
+        }
+    if not (datos["usuarios"] and datos["cursos"] and datos["ofertas"]):
+        raise SystemExit("La base no tiene datos de prueba: ejecutar antes python -m bench.seed")
+    return datos
+
+
+def ejecutar(app, url, duracion, concurrencia, semilla=42):
+    datos = _cargar_datos(app)
+    nuevo_cliente = (lambda: ClienteHTTP(url)) if url else (lambda: ClienteFlask(app))
+    operaciones, pesos = list(MEZCLA), list(MEZCLA.values())
+
+    latencias = defaultdict(list)
+    errores = defaultdict(int)
+    lock = threading.Lock()
+    antes = consultas_por_endpoint(nuevo_cliente())
+    fin = time.perf_counter() + duracion
+
+    def usuario_virtual(numero):
+        rng = random.Random(semilla + numero)
+        usuario = UsuarioVirtual(nuevo_cliente(), rng.choice(datos["usuarios"]), datos, rng)
+        propias_lat, propios_err = defaultdict(list), defaultdict(int)
+        operacion = "login"
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            try:
+                status = getattr(usuario, operacion)()
+            except Exception:
+                status = 599
+            propias_lat[operacion].append(time.perf_counter() - inicio)
+            if status >= 400 and status not in ESPERADOS:
+                propios_err[operacion] += 1
+            operacion = rng.choices(operaciones, pesos)[0] if usuario.token else "login"
+        with lock:
+            for operacion, valores in propias_lat.items():
+                latencias[operacion].extend(valores)
+            for operacion, cantidad in propios_err.items():
+                errores[operacion] += cantidad
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=usuario_virtual, args=(n,)) for n in range(concurrencia)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    total = time.perf_counter() - inicio
+
+    despues = consultas_por_endpoint(nuevo_cliente())
+
+    def resumen(valores, errores_op):
+        return {
+            "peticiones": len(valores),
+            "errores": errores_op,
+            "por_segundo": round(len(valores) / total, 2),
+            "p50_ms": round(percentil(valores, 50) * 1000, 2),
+            "p95_ms": round(percentil(valores, 95) * 1000, 2),
+            "p99_ms": round(percentil(valores, 99) * 1000, 2),
+        }
+
+    todas = [v for valores in latencias.values() for v in valores]
+    consultas = {}
+    for endpoint, (suma, cantidad) in despues.items():
+        suma_antes, cantidad_antes = antes.get(endpoint, (0.0, 0.0))
+        if cantidad > cantidad_antes:
+            consultas[endpoint] = round((suma - suma_antes) / (cantidad - cantidad_antes), 2)
+
+    return {
+        "operaciones": {op: resumen(latencias[op], errores[op]) for op in sorted(latencias)},
+        "total": resumen(todas, sum(errores.values())) if todas else {},
+        "consultas_por_peticion": dict(sorted(consultas.items())),
+        "segundos": round(total, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="sqlite:///bench.db")
+    parser.add_argument("--url", help="Servidor ya levantado (por ejemplo http://localhost:5000).")
+    parser.add_argument("--duracion", type=float, default=30)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default=RESULTADOS_DIR, help="Carpeta donde guardar el JSON.")
+    args = parser.parse_args(argv)
+
+    # Todo el tráfico sale de una IP y repite logins: sin límites de peticiones
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.db, "RATE_LIMIT_ENABLED": False})
+    resultado = ejecutar(app, args.url, args.duracion, args.concurrencia, args.semilla)
+    commit = commit_actual()
+    resultado = {
+        "commit": commit,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "modo": "http" if args.url else "test_client",
+        "db": app.config["SQLALCHEMY_DATABASE_URI"].split("://")[0],
+        "duracion": args.duracion,
+        "concurrencia": args.concurrencia,
+        **resultado,
+    }
+
+    print(f"{'operación':<22} {'n':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for nombre, r in list(resultado["operaciones"].items()) + [("TOTAL", resultado["total"])]:
+        print(f"{nombre:<22} {r['peticiones']:>7} {r['errores']:>5} {r['por_segundo']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+    print("\nConsultas SQL por petición:")
+    for endpoint, promedio in resultado["consultas_por_peticion"].items():
+        print(f"  {endpoint:<45} {promedio:>6.2f}")
+
+    os.makedirs(args.salida, exist_ok=True)
+    archivo = os.path.join(args.salida, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    with open(archivo, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultado guardado en {archivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# bench/login_throughput.py
+"""
+Mide cuántos logins por segundo soporta el pool de hash de contraseñas con
+distintos costos (rondas de pbkdf2_sha256) y cuánto esperan los logins
+cuando llega una ráfaga. Sirve para elegir PASSWORD_HASH_ROUNDS y
+PASSWORD_HASH_WORKERS antes de cambiarlos en producción.
+
+Uso (desde backend/):
+    python -m bench.login_throughput --rondas 10000 29000 100000 --logins 200 --concurrencia 32
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.auth import passwords
+from bench import percentil
+
+
+def medir(rondas, logins, concurrencia, workers):
+    passwords.configure(rounds=rondas, workers=workers, queue=logins)
+    guardado = passwords.hash_password("clave-de-prueba")
+
+    def login(_):
+        inicio = time.perf_counter()
+        valida, _nuevo = passwords.verify_password("clave-de-prueba", guardado)
+        assert valida
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as clientes:
+        latencias = list(clientes.map(login, range(logins)))
+    total = time.perf_counter() - inicio
+
+    return {
+        "rondas": rondas,
+        "logins_por_segundo": logins / total,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p95_ms": percentil(latencias, 95) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rondas", type=int, nargs="+", default=[10000, 29000, 100000])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args(argv)
+
+    print(f"{'rondas':>8} {'logins/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for rondas in args.rondas:
+        r = medir(rondas, args.logins, args.concurrencia, args.workers)
+        print(f"{r['rondas']:>8} {r['logins_por_segundo']:>10.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench/seat_stress.py
+"""
+Prueba de estrés de la reserva de cupos: muchos hilos inscriben usuarios
+distintos en un mismo curso a la vez y al final se comprueba que no se haya
+superado cupo_maximo y que el contador coincida con las inscripciones.
+
+Uso (desde backend/):
+    python -m bench.seat_stress --db sqlite:///stress.db --usuarios 500 --cupo 50 --hilos 32
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from app.app import create_app
+from app.db import db
+from app.models import User, Course, Enrollment
+from app.crud import CupoAgotado, create_enrollment
+
+
+def crear_app(uri):
+    return create_app({"SQLALCHEMY_DATABASE_URI": uri})
+
+
+def preparar_datos(usuarios, cupo):
+    db.drop_all()
+    db.create_all()
+    curso = Course(
+        titulo="Curso de estrés",
+        duracion_horas=1,
+        fecha_inicio=date.today(),
+        fecha_fin=date.today(),
+        instructor="bench",
+        cupo_maximo=cupo,
+    )
+    db.session.add(curso)
+    db.session.add_all([
+        User(username=f"stress{i}", email=f"stress{i}@bench.local", password="x")
+        for i in range(usuarios)
+    ])
+    db.session.commit()
+    return curso.id, [u.id for u in User.query.with_entities(User.id)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="sqlite:///seat_stress.db")
+    parser.add_argument("--usuarios", type=int, default=500)
+    parser.add_argument("--cupo", type=int, default=50)
+    parser.add_argument("--hilos", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    app = crear_app(args.db)
+    with app.app_context():
+        curso_id, user_ids = preparar_datos(args.usuarios, args.cupo)
+
+    def inscribir(user_id):
+        with app.app_context():
+            try:
+                return "ok" if create_enrollment(user_id, curso_id) else "duplicado"
+            except CupoAgotado:
+                return "lleno"
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+        resultados = list(pool.map(inscribir, user_ids))
+    duracion = time.perf_counter() - inicio
+
+    with app.app_context():
+        inscritos = Enrollment.query.filter_by(course_id=curso_id).count()
+        contador = db.session.get(Course, curso_id).inscritos
+
+    aceptadas = resultados.count("ok")
+    esperado = min(args.cupo, args.usuarios)
+    print(f"Intentos: {len(resultados)} en {duracion:.2f}s ({len(resultados) / duracion:.0f}/s)")
+    print(f"Aceptadas: {aceptadas}  Rechazadas por cupo: {resultados.count('lleno')}")
+    print(f"Filas en enrollment: {inscritos}  Contador inscritos: {contador}  Cupo: {args.cupo}")
+
+    correcto = aceptadas == inscritos == contador == esperado
+    print("✅ Sin sobreventa de cupos" if correcto else "❌ Inconsistencia en la reserva de cupos")
+    return 0 if correcto else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# bench/seed.py
+"""
+Carga datos sintéticos para pruebas de rendimiento: usuarios, cursos,
+ofertas, inscripciones y postulaciones con fechas repartidas en el último
+año. Todos los usuarios se llaman bench<N> y tienen la contraseña "bench123".
+
+Uso (desde backend/):
+    python -m bench.seed --db sqlite:///bench.db --usuarios 5000 --cursos 500 \\
+        --ofertas 500 --inscripciones 20000 --postulaciones 20000 --reset
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select, text
+
+from app import search
+from app.app import create_app
+from app.auth.passwords import hash_password
+from app.cache import invalidate
+from app.crud import rebuild_summaries
+from app.db import db
+from app.migrations import schema_version, upgrade
+from app.sync import require_full_sync
+from app.models import User, Course, JobOffer, Enrollment, Application, EstadoCapacitacion
+
+CLAVE = "bench123"
+LOTE = 5000
+
+PALABRAS = (
+    "farmacia atención cliente inventario medicamentos químico técnico caja "
+    "ventas dermocosmética regente bodega despacho recetas control calidad "
+    "primeros auxilios vacunación logística nutrición pediatría laboratorio"
+).split()
+
+
+def _frase(rng, n):
+    return " ".join(rng.choice(PALABRAS) for _ in range(n)).capitalize()
+
+
+def _insertar(modelo, filas):
+    for inicio in range(0, len(filas), LOTE):
+        db.session.execute(insert(modelo), filas[inicio:inicio + LOTE])
+    db.session.commit()
+
+
+def _ids(modelo):
+    return list(db.session.scalars(select(modelo.id).order_by(modelo.id)))
+
+
+def _pares(rng, n, usuarios, destinos):
+    # Pares (usuario, destino) distintos, como exige la restricción única
+    n = min(n, len(usuarios) * len(destinos))
+    pares = set()
+    while len(pares) < n:
+        pares.add((rng.choice(usuarios), rng.choice(destinos)))
+    return pares
+
+
+def reset():
+    db.drop_all()
+    with db.engine.begin() as conn:
+        schema_version.drop(conn, checkfirst=True)
+
+
+def sembrar(usuarios, cursos, ofertas, inscripciones, postulaciones, semilla=42):
+    """
+    Inserta los volúmenes pedidos (dentro de un app context) y devuelve los
+    conteos y la duración.
+    """
+    rng = random.Random(semilla)
+    hoy = date.today()
+    inicio = time.perf_counter()
+
+    upgrade(db.engine, log=lambda mensaje: None)
+    desplazamiento = db.session.scalar(select(db.func.count()).select_from(User))
+
+    clave = hash_password(CLAVE)
+    _insertar(User, [
+        {
+            "username": f"bench{desplazamiento + i}",
+            "email": f"bench{desplazamiento + i}@bench.local",
+            "password": clave,
+            "role": "usuario",
+        }
+        for i in range(usuarios)
+    ])
+    usuario_ids = _ids(User)
+
+    filas_cursos = []
+    for _ in range(cursos):
+        fecha_inicio = hoy + timedelta(days=rng.randint(-365, 180))
+        filas_cursos.append({
+            "titulo": _frase(rng, 3),
+            "descripcion": _frase(rng, 12),
+            "duracion_horas": rng.randint(4, 80),
+            "fecha_inicio": fecha_inicio,
+            "fecha_fin": fecha_inicio + timedelta(days=rng.randint(1, 60)),
+            "instructor": f"Instructor {rng.randint(1, max(cursos // 10, 1))}",
+            "cupo_maximo": rng.randint(20, 200),
+            "estado": rng.choice([EstadoCapacitacion.activo] * 4 + [EstadoCapacitacion.inactivo]),
+            "inscritos": 0,
+        })
+    _insertar(Course, filas_cursos)
+
+    _insertar(JobOffer, [
+        {
+            "titulo": _frase(rng, 3),
+            "descripcion": _frase(rng, 15),
+            "requisitos": _frase(rng, 6),
+            "fecha_publicacion": hoy - timedelta(days=rng.randint(0, 365)),
+        }
+        for _ in range(ofertas)
+    ])
+
+    curso_ids, oferta_ids = _ids(Course), _ids(JobOffer)
+    if usuario_ids and curso_ids and inscripciones:
+        _insertar(Enrollment, [
+            {
+                "user_id": u,
+                "course_id": c,
+                "fecha_inscripcion": datetime.utcnow() - timedelta(minutes=rng.randint(0, 525600)),
+            }
+            for u, c in _pares(rng, inscripciones, usuario_ids, curso_ids)
+        ])
+    if usuario_ids and oferta_ids and postulaciones:
+        _insertar(Application, [
+            {
+                "user_id": u,
+                "job_offer_id": o,
+                "fecha_postulacion": datetime.utcnow() - timedelta(minutes=rng.randint(0, 525600)),
+            }
+            for u, o in _pares(rng, postulaciones, usuario_ids, oferta_ids)
+        ])
+
+    # Contadores y resúmenes coherentes con los datos (los clientes vuelven a
+    # pedir los listados completos); el cupo se amplía si hace falta
+    rebuild_summaries(db.session)
+    require_full_sync(db.session)
+    db.session.execute(text("UPDATE course SET cupo_maximo = inscritos + 20 WHERE cupo_maximo < inscritos + 20"))
+    db.session.commit()
+
+    # Un servidor ya levantado no debe seguir sirviendo el catálogo anterior
+    invalidate("cursos", "ofertas", "inscripciones", "postulaciones")
+    search.mark_stale("cursos")
+    search.mark_stale("ofertas")
+
+    return {
+        modelo.__tablename__: db.session.scalar(select(db.func.count()).select_from(modelo))
+        for modelo in (User, Course, JobOffer, Enrollment, Application)
+    } | {"segundos": round(time.perf_counter() - inicio, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="sqlite:///bench.db")
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--cursos", type=int, default=300)
+    parser.add_argument("--ofertas", type=int, default=300)
+    parser.add_argument("--inscripciones", type=int, default=10000)
+    parser.add_argument("--postulaciones", type=int, default=10000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Borra todas las tablas antes de cargar.")
+    args = parser.parse_args(argv)
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.db})
+    with app.app_context():
+        if args.reset:
+            reset()
+        resumen = sembrar(
+            args.usuarios, args.cursos, args.ofertas, args.inscripciones, args.postulaciones, args.semilla
+        )
+    print(" ".join(f"{clave}={valor}" for clave, valor in resumen.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# gunicorn.conf.py
+# Uso (desde backend/):  gunicorn -c gunicorn.conf.py wsgi:app   o   python serve.py
+#
+# Reinicio sin cortar peticiones: `kill -HUP <master>` recrea los workers y
+# deja terminar las peticiones en curso (hasta graceful_timeout). Como la app
+# se precarga en el master, para desplegar código nuevo usar USR2 (nuevo
+# master) seguido de WINCH y QUIT sobre el master anterior.
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+
+# Procesos y hilos por proceso (gthread: un export CSV lento ocupa un hilo,
+# no el servidor entero)
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+
+# La app se importa una vez en el master y los workers la heredan al hacer fork
+preload_app = True
+
+keepalive = int(os.environ.get("WEB_KEEPALIVE", 5))
+timeout = int(os.environ.get("WEB_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+
+# Recicla cada worker tras N peticiones (0 = nunca), escalonado con jitter
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 0))
+max_requests_jitter = max(max_requests // 10, 0)
+
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Las conexiones del pool no se comparten entre procesos: cada worker
+    # descarta las heredadas del master sin cerrarlas y abre las suyas, en
+    # la primaria y en cada réplica (db.engines["replica_<n>"]).
+    from app.db import db
+
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def on_starting(server):
+    # Las métricas por worker de una ejecución anterior ya no corresponden
+    from app.metrics import clear_dir
+
+    clear_dir()
@@ -1,9 +1,15 @@
 # run.py
+# Servidor de desarrollo (para producción usar serve.py)
 import sys
 import os
-from app.app import app
 # Agrega el directorio raíz al PYTHONPATH
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from app.app import create_app
+
+# Antes de la primera ejecución (y tras actualizar el código):
+#     flask --app app.app migrate
+app = create_app()
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=os.environ.get("FLASK_DEBUG", "1") == "1", threaded=True)
\ No newline at end of file
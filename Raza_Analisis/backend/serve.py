@@ -0,0 +1,40 @@
+# serve.py
+"""
+Servidor de producción de la API.
+
+    python serve.py
+
+En Linux/macOS lanza gunicorn con gunicorn.conf.py (varios procesos con
+hilos, ver WEB_WORKERS y WEB_THREADS). En Windows, donde gunicorn no
+funciona, usa waitress en un único proceso con WEB_THREADS hilos.
+run.py queda solo para desarrollo.
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, BASE_DIR)
+
+    if os.name != "nt":
+        from gunicorn.app.wsgiapp import run
+
+        sys.argv = ["gunicorn", "-c", os.path.join(BASE_DIR, "gunicorn.conf.py"), "wsgi:app"]
+        return run()
+
+    from waitress import serve
+    from wsgi import app
+
+    serve(
+        app,
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", 5000)),
+        threads=int(os.environ.get("WEB_THREADS", 8)),
+    )
+
+
+if __name__ == "__main__":
+    main()
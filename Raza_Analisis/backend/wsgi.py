@@ -0,0 +1,5 @@
+# wsgi.py
+# Punto de entrada WSGI para servidores de producción (gunicorn, waitress)
+from app.app import create_app
+
+app = create_app()